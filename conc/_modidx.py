@@ -7,12 +7,18 @@ d = { 'settings': { 'branch': 'main',
                 'lib_path': 'conc'},
   'syms': { 'conc.collocates': { 'conc.collocates.Collocates': ('api/collocates.html#collocates', 'conc/collocates.py'),
                                  'conc.collocates.Collocates.__init__': ('api/collocates.html#collocates.__init__', 'conc/collocates.py'),
+                                 'conc.collocates.Collocates._collocates_report': ( 'api/collocates.html#collocates._collocates_report',
+                                                                                    'conc/collocates.py'),
                                  'conc.collocates.Collocates.collocates': ( 'api/collocates.html#collocates.collocates',
-                                                                            'conc/collocates.py')},
+                                                                            'conc/collocates.py'),
+                                 'conc.collocates.Collocates.collocates_many': ( 'api/collocates.html#collocates.collocates_many',
+                                                                                 'conc/collocates.py')},
             'conc.conc': { 'conc.conc.Conc': ('api/conc.html#conc', 'conc/conc.py'),
                            'conc.conc.Conc.__init__': ('api/conc.html#conc.__init__', 'conc/conc.py'),
                            'conc.conc.Conc.collocates': ('api/conc.html#conc.collocates', 'conc/conc.py'),
+                           'conc.conc.Conc.collocates_many': ('api/conc.html#conc.collocates_many', 'conc/conc.py'),
                            'conc.conc.Conc.concordance': ('api/conc.html#conc.concordance', 'conc/conc.py'),
+                           'conc.conc.Conc.concordance_counts_many': ('api/conc.html#conc.concordance_counts_many', 'conc/conc.py'),
                            'conc.conc.Conc.concordance_plot': ('api/conc.html#conc.concordance_plot', 'conc/conc.py'),
                            'conc.conc.Conc.frequencies': ('api/conc.html#conc.frequencies', 'conc/conc.py'),
                            'conc.conc.Conc.keywords': ('api/conc.html#conc.keywords', 'conc/conc.py'),
@@ -24,18 +30,26 @@ d = { 'settings': { 'branch': 'main',
                                                                              'conc/concordance.py'),
                                   'conc.concordance.Concordance._build_concordance_result_with_sort': ( 'api/concordance.html#concordance._build_concordance_result_with_sort',
                                                                                                         'conc/concordance.py'),
+                                  'conc.concordance.Concordance._cache_result': ( 'api/concordance.html#concordance._cache_result',
+                                                                                  'conc/concordance.py'),
                                   'conc.concordance.Concordance._col_contains_sequence': ( 'api/concordance.html#concordance._col_contains_sequence',
                                                                                            'conc/concordance.py'),
                                   'conc.concordance.Concordance._concordance_filter_context': ( 'api/concordance.html#concordance._concordance_filter_context',
                                                                                                 'conc/concordance.py'),
+                                  'conc.concordance.Concordance._get_cached_result': ( 'api/concordance.html#concordance._get_cached_result',
+                                                                                       'conc/concordance.py'),
                                   'conc.concordance.Concordance._get_concordance_plot_script': ( 'api/concordance.html#concordance._get_concordance_plot_script',
                                                                                                  'conc/concordance.py'),
                                   'conc.concordance.Concordance._get_concordance_plot_style': ( 'api/concordance.html#concordance._get_concordance_plot_style',
                                                                                                 'conc/concordance.py'),
                                   'conc.concordance.Concordance._get_concordance_sort': ( 'api/concordance.html#concordance._get_concordance_sort',
                                                                                           'conc/concordance.py'),
+                                  'conc.concordance.Concordance._get_sort_column_positions': ( 'api/concordance.html#concordance._get_sort_column_positions',
+                                                                                               'conc/concordance.py'),
                                   'conc.concordance.Concordance.concordance': ( 'api/concordance.html#concordance.concordance',
                                                                                 'conc/concordance.py'),
+                                  'conc.concordance.Concordance.concordance_counts_many': ( 'api/concordance.html#concordance.concordance_counts_many',
+                                                                                            'conc/concordance.py'),
                                   'conc.concordance.Concordance.concordance_plot': ( 'api/concordance.html#concordance.concordance_plot',
                                                                                      'conc/concordance.py')},
             'conc.core': { 'conc.core.ConcLogger': ('api/core.html#conclogger', 'conc/core.py'),
@@ -44,6 +58,19 @@ d = { 'settings': { 'branch': 'main',
                            'conc.core.ConcLogger.memory_usage': ('api/core.html#conclogger.memory_usage', 'conc/core.py'),
                            'conc.core.ConcLogger.set_state': ('api/core.html#conclogger.set_state', 'conc/core.py'),
                            'conc.core.CorpusMetadata': ('api/core.html#corpusmetadata', 'conc/core.py'),
+                           'conc.core.ResultsCache': ('api/core.html#resultscache', 'conc/core.py'),
+                           'conc.core.ResultsCache.__contains__': ('api/core.html#resultscache.__contains__', 'conc/core.py'),
+                           'conc.core.ResultsCache.__delitem__': ('api/core.html#resultscache.__delitem__', 'conc/core.py'),
+                           'conc.core.ResultsCache.__getitem__': ('api/core.html#resultscache.__getitem__', 'conc/core.py'),
+                           'conc.core.ResultsCache.__init__': ('api/core.html#resultscache.__init__', 'conc/core.py'),
+                           'conc.core.ResultsCache.__iter__': ('api/core.html#resultscache.__iter__', 'conc/core.py'),
+                           'conc.core.ResultsCache.__len__': ('api/core.html#resultscache.__len__', 'conc/core.py'),
+                           'conc.core.ResultsCache.__setitem__': ('api/core.html#resultscache.__setitem__', 'conc/core.py'),
+                           'conc.core.ResultsCache.clear': ('api/core.html#resultscache.clear', 'conc/core.py'),
+                           'conc.core.ResultsCache.get': ('api/core.html#resultscache.get', 'conc/core.py'),
+                           'conc.core.ResultsCache.info': ('api/core.html#resultscache.info', 'conc/core.py'),
+                           'conc.core.ResultsCache.sizes': ('api/core.html#resultscache.sizes', 'conc/core.py'),
+                           'conc.core._estimate_nbytes': ('api/core.html#_estimate_nbytes', 'conc/core.py'),
                            'conc.core.create_large_dataset_sizes': ('api/core.html#create_large_dataset_sizes', 'conc/core.py'),
                            'conc.core.create_toy_corpus_sources': ('api/core.html#create_toy_corpus_sources', 'conc/core.py'),
                            'conc.core.get_garden_party': ('api/core.html#get_garden_party', 'conc/core.py'),
@@ -66,38 +93,76 @@ d = { 'settings': { 'branch': 'main',
             'conc.corpus': { 'conc.corpus.Corpus': ('api/corpus.html#corpus', 'conc/corpus.py'),
                              'conc.corpus.Corpus.__init__': ('api/corpus.html#corpus.__init__', 'conc/corpus.py'),
                              'conc.corpus.Corpus.__str__': ('api/corpus.html#corpus.__str__', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._append': ('api/corpus.html#corpus._append', 'conc/corpus.py'),
                              'conc.corpus.Corpus._build': ('api/corpus.html#corpus._build', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._build_positional_index': ( 'api/corpus.html#corpus._build_positional_index',
+                                                                             'conc/corpus.py'),
+                             'conc.corpus.Corpus._checkpoint_build': ('api/corpus.html#corpus._checkpoint_build', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._complete_append_process': ( 'api/corpus.html#corpus._complete_append_process',
+                                                                              'conc/corpus.py'),
                              'conc.corpus.Corpus._complete_build_process': ( 'api/corpus.html#corpus._complete_build_process',
                                                                              'conc/corpus.py'),
                              'conc.corpus.Corpus._create_indices': ('api/corpus.html#corpus._create_indices', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._expand_wildcard': ('api/corpus.html#corpus._expand_wildcard', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._get_build_files': ('api/corpus.html#corpus._get_build_files', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._get_document_frequency_columns': ( 'api/corpus.html#corpus._get_document_frequency_columns',
+                                                                                     'conc/corpus.py'),
+                             'conc.corpus.Corpus._get_query_tokenizer': ('api/corpus.html#corpus._get_query_tokenizer', 'conc/corpus.py'),
                              'conc.corpus.Corpus._get_text': ('api/corpus.html#corpus._get_text', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._get_tokenizer_exceptions': ( 'api/corpus.html#corpus._get_tokenizer_exceptions',
+                                                                               'conc/corpus.py'),
+                             'conc.corpus.Corpus._get_vocab_pattern_index': ( 'api/corpus.html#corpus._get_vocab_pattern_index',
+                                                                              'conc/corpus.py'),
                              'conc.corpus.Corpus._init_build_process': ('api/corpus.html#corpus._init_build_process', 'conc/corpus.py'),
                              'conc.corpus.Corpus._init_corpus_dataframes': ( 'api/corpus.html#corpus._init_corpus_dataframes',
                                                                              'conc/corpus.py'),
                              'conc.corpus.Corpus._init_spacy_model': ('api/corpus.html#corpus._init_spacy_model', 'conc/corpus.py'),
                              'conc.corpus.Corpus._init_token_arrays': ('api/corpus.html#corpus._init_token_arrays', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._load_build_strings': ('api/corpus.html#corpus._load_build_strings', 'conc/corpus.py'),
                              'conc.corpus.Corpus._prepare_csv': ('api/corpus.html#corpus._prepare_csv', 'conc/corpus.py'),
                              'conc.corpus.Corpus._prepare_files': ('api/corpus.html#corpus._prepare_files', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._prepare_table': ('api/corpus.html#corpus._prepare_table', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._process_build_file': ('api/corpus.html#corpus._process_build_file', 'conc/corpus.py'),
                              'conc.corpus.Corpus._process_punct_positions': ( 'api/corpus.html#corpus._process_punct_positions',
                                                                               'conc/corpus.py'),
                              'conc.corpus.Corpus._process_space_positions': ( 'api/corpus.html#corpus._process_space_positions',
                                                                               'conc/corpus.py'),
+                             'conc.corpus.Corpus._read_build_file': ('api/corpus.html#corpus._read_build_file', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._read_build_manifest': ('api/corpus.html#corpus._read_build_manifest', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._remove_build_files': ('api/corpus.html#corpus._remove_build_files', 'conc/corpus.py'),
                              'conc.corpus.Corpus._shift_zeroes_to_end': ('api/corpus.html#corpus._shift_zeroes_to_end', 'conc/corpus.py'),
                              'conc.corpus.Corpus._shift_zeroes_to_start': ( 'api/corpus.html#corpus._shift_zeroes_to_start',
                                                                             'conc/corpus.py'),
+                             'conc.corpus.Corpus._tokenize_pattern': ('api/corpus.html#corpus._tokenize_pattern', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._tokenize_queries': ('api/corpus.html#corpus._tokenize_queries', 'conc/corpus.py'),
+                             'conc.corpus.Corpus._tokenize_texts': ('api/corpus.html#corpus._tokenize_texts', 'conc/corpus.py'),
                              'conc.corpus.Corpus._update_build_process': ('api/corpus.html#corpus._update_build_process', 'conc/corpus.py'),
                              'conc.corpus.Corpus._zero_after_value': ('api/corpus.html#corpus._zero_after_value', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.append_from_csv': ('api/corpus.html#corpus.append_from_csv', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.append_from_files': ('api/corpus.html#corpus.append_from_files', 'conc/corpus.py'),
                              'conc.corpus.Corpus.build_from_csv': ('api/corpus.html#corpus.build_from_csv', 'conc/corpus.py'),
                              'conc.corpus.Corpus.build_from_files': ('api/corpus.html#corpus.build_from_files', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.build_from_ipc': ('api/corpus.html#corpus.build_from_ipc', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.build_from_ndjson': ('api/corpus.html#corpus.build_from_ndjson', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.build_from_parquet': ('api/corpus.html#corpus.build_from_parquet', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.cache_info': ('api/corpus.html#corpus.cache_info', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.clear_cache': ('api/corpus.html#corpus.clear_cache', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.get_context_positions': ('api/corpus.html#corpus.get_context_positions', 'conc/corpus.py'),
                              'conc.corpus.Corpus.get_ngrams_by_index': ('api/corpus.html#corpus.get_ngrams_by_index', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.get_nonpunct_positions': ( 'api/corpus.html#corpus.get_nonpunct_positions',
+                                                                            'conc/corpus.py'),
+                             'conc.corpus.Corpus.get_positional_index': ('api/corpus.html#corpus.get_positional_index', 'conc/corpus.py'),
                              'conc.corpus.Corpus.get_token_count_text': ('api/corpus.html#corpus.get_token_count_text', 'conc/corpus.py'),
                              'conc.corpus.Corpus.get_token_positions': ('api/corpus.html#corpus.get_token_positions', 'conc/corpus.py'),
                              'conc.corpus.Corpus.get_tokens_by_index': ('api/corpus.html#corpus.get_tokens_by_index', 'conc/corpus.py'),
                              'conc.corpus.Corpus.get_tokens_in_context': ('api/corpus.html#corpus.get_tokens_in_context', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.get_tokens_in_context_windows': ( 'api/corpus.html#corpus.get_tokens_in_context_windows',
+                                                                                   'conc/corpus.py'),
                              'conc.corpus.Corpus.info': ('api/corpus.html#corpus.info', 'conc/corpus.py'),
                              'conc.corpus.Corpus.load': ('api/corpus.html#corpus.load', 'conc/corpus.py'),
                              'conc.corpus.Corpus.report': ('api/corpus.html#corpus.report', 'conc/corpus.py'),
                              'conc.corpus.Corpus.save_corpus_metadata': ('api/corpus.html#corpus.save_corpus_metadata', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.save_token_arrays': ('api/corpus.html#corpus.save_token_arrays', 'conc/corpus.py'),
                              'conc.corpus.Corpus.summary': ('api/corpus.html#corpus.summary', 'conc/corpus.py'),
                              'conc.corpus.Corpus.text': ('api/corpus.html#corpus.text', 'conc/corpus.py'),
                              'conc.corpus.Corpus.token_ids_to_sort_order': ( 'api/corpus.html#corpus.token_ids_to_sort_order',
@@ -105,7 +170,21 @@ d = { 'settings': { 'branch': 'main',
                              'conc.corpus.Corpus.token_ids_to_tokens': ('api/corpus.html#corpus.token_ids_to_tokens', 'conc/corpus.py'),
                              'conc.corpus.Corpus.token_to_id': ('api/corpus.html#corpus.token_to_id', 'conc/corpus.py'),
                              'conc.corpus.Corpus.tokenize': ('api/corpus.html#corpus.tokenize', 'conc/corpus.py'),
+                             'conc.corpus.Corpus.tokenize_many': ('api/corpus.html#corpus.tokenize_many', 'conc/corpus.py'),
                              'conc.corpus.Corpus.tokens_to_token_ids': ('api/corpus.html#corpus.tokens_to_token_ids', 'conc/corpus.py'),
+                             'conc.corpus.__getattr__': ('api/corpus.html#__getattr__', 'conc/corpus.py'),
+                             'conc.corpus._get_punctuation_strings': ('api/corpus.html#_get_punctuation_strings', 'conc/corpus.py'),
+                             'conc.corpus._get_source_fingerprint': ('api/corpus.html#_get_source_fingerprint', 'conc/corpus.py'),
+                             'conc.corpus._get_table_files': ('api/corpus.html#_get_table_files', 'conc/corpus.py'),
+                             'conc.corpus._init_tokenizer_process': ('api/corpus.html#_init_tokenizer_process', 'conc/corpus.py'),
+                             'conc.corpus._merge_positional_index': ('api/corpus.html#_merge_positional_index', 'conc/corpus.py'),
+                             'conc.corpus._prefetch': ('api/corpus.html#_prefetch', 'conc/corpus.py'),
+                             'conc.corpus._read_file': ('api/corpus.html#_read_file', 'conc/corpus.py'),
+                             'conc.corpus._read_folder_files': ('api/corpus.html#_read_folder_files', 'conc/corpus.py'),
+                             'conc.corpus._read_tar_files': ('api/corpus.html#_read_tar_files', 'conc/corpus.py'),
+                             'conc.corpus._read_zip_files': ('api/corpus.html#_read_zip_files', 'conc/corpus.py'),
+                             'conc.corpus._scan_table': ('api/corpus.html#_scan_table', 'conc/corpus.py'),
+                             'conc.corpus._tokenize_in_process': ('api/corpus.html#_tokenize_in_process', 'conc/corpus.py'),
                              'conc.corpus.build_test_corpora': ('api/corpus.html#build_test_corpora', 'conc/corpus.py')},
             'conc.frequency': { 'conc.frequency.Frequency': ('api/frequency.html#frequency', 'conc/frequency.py'),
                                 'conc.frequency.Frequency.__init__': ('api/frequency.html#frequency.__init__', 'conc/frequency.py'),
@@ -128,7 +207,14 @@ d = { 'settings': { 'branch': 'main',
                                  'conc.listcorpus.ListCorpus.summary': ('api/listcorpus.html#listcorpus.summary', 'conc/listcorpus.py')},
             'conc.ngrams': { 'conc.ngrams.Ngrams': ('api/ngrams.html#ngrams', 'conc/ngrams.py'),
                              'conc.ngrams.Ngrams.__init__': ('api/ngrams.html#ngrams.__init__', 'conc/ngrams.py'),
+                             'conc.ngrams.Ngrams._count_ngrams_approximate': ( 'api/ngrams.html#ngrams._count_ngrams_approximate',
+                                                                               'conc/ngrams.py'),
+                             'conc.ngrams.Ngrams._count_ngrams_partitioned': ( 'api/ngrams.html#ngrams._count_ngrams_partitioned',
+                                                                               'conc/ngrams.py'),
+                             'conc.ngrams.Ngrams._get_ngram_chunks': ('api/ngrams.html#ngrams._get_ngram_chunks', 'conc/ngrams.py'),
                              'conc.ngrams.Ngrams._get_ngrams': ('api/ngrams.html#ngrams._get_ngrams', 'conc/ngrams.py'),
+                             'conc.ngrams.Ngrams._get_saved_ngram_frequencies': ( 'api/ngrams.html#ngrams._get_saved_ngram_frequencies',
+                                                                                  'conc/ngrams.py'),
                              'conc.ngrams.Ngrams.ngram_frequencies': ('api/ngrams.html#ngrams.ngram_frequencies', 'conc/ngrams.py'),
                              'conc.ngrams.Ngrams.ngrams': ('api/ngrams.html#ngrams.ngrams', 'conc/ngrams.py')},
             'conc.plot': { 'conc.plot.Plot': ('api/plot.html#plot', 'conc/plot.py'),
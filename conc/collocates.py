@@ -7,11 +7,11 @@ from __future__ import annotations
 import numpy as np
 import time
 import polars as pl
+from collections import deque
 from fastcore.basics import patch
-from scipy.stats import chi2
 
 # %% auto 0
-__all__ = ['Collocates']
+__all__ = ['COLLOCATES_BATCH_SIZE', 'Collocates']
 
 # %% ../nbs/api/74_collocates.ipynb 4
 from .corpus import Corpus
@@ -33,73 +33,36 @@ class Collocates:
 
 # %% ../nbs/api/74_collocates.ipynb 14
 @patch
-def collocates(self:Collocates, 
-				token_str:str, # Token to search for
-				effect_size_measure:str = 'logdice', # statistical measure to use for collocation calculation: logdice, mutual_information
-				statistical_significance_measure:str = 'log_likelihood', # statistical significance measure to use, currently only 'log_likelihood' is supported
-				order:str|None = None, # default of None orders by collocation measure, results can also be ordered by: collocate_frequency, frequency, log_likelihood
-				order_descending:bool = True, # order is descending or ascending
-				statistical_significance_cut: float|None = None, # statistical significance p-value to filter results, e.g. 0.05 or 0.01 or 0.001 - ignored if None or 0
-				apply_bonferroni:bool = False, # apply Bonferroni correction to the statistical significance cut-off
-				context_length:int|tuple[int, int]=5, # Window size per side in tokens - if an int (e.g. 5) context lengths on left and right will be the same, for independent control of left and right context length pass a tuple (context_length_left, context_left_right) (e.g. (0, 5)) 
-				min_collocate_frequency:int=5, # Minimum count of collocates
-				page_size:int=PAGE_SIZE, # number of rows to return, if 0 returns all
-				page_current:int=1, # current page, ignored if page_size is 0
-				exclude_punctuation:bool=True # exclude punctuation tokens
+def _collocates_report(self:Collocates,
+				token_str:str, # Token string the node was tokenized from
+				left_tokens:np.ndarray, # left context tokens for each hit
+				node_tokens:np.ndarray, # node tokens for each hit
+				right_tokens:np.ndarray, # right context tokens for each hit
+				sequence_len:int, # number of tokens in the node
+				vocab_df:pl.DataFrame, # vocab with token_id, token and frequency columns
+				count_tokens:int, # total tokens in the corpus for the report
+				tokens_descriptor:str, # description of the tokens the report is based on
+				context_left:int, # context tokens to the left
+				context_right:int, # context tokens to the right
+				effect_size_measure:str, 
+				statistical_significance_measure:str, 
+				order:str|None, 
+				order_descending:bool, 
+				statistical_significance_cut:float|None, 
+				apply_bonferroni:bool, 
+				min_collocate_frequency:int, 
+				page_size:int, 
+				page_current:int 
 				) -> Result:
-	""" Report collocates for a given token string. """
+	""" Calculate collocation measures from context tokens for a node and format the report. """
 
-	if effect_size_measure not in ['logdice', 'mutual_information']:
-		raise ValueError(f'Collocation measure must be one of "logdice" or "mutual_information".')
-	
-	if statistical_significance_measure not in ['log_likelihood']:
-		raise ValueError(f'Statistical significance measure must be "log_likelihood".')
-
-	if order not in [None, effect_size_measure, 'collocate_frequency', 'frequency', statistical_significance_measure]:
-		raise ValueError(f'The order parameter must be None (default) or one of: {effect_size_measure}, collocate_frequency, frequency, {statistical_significance_measure}')
-
-	token_sequence, index_id = self.corpus.tokenize(token_str, simple_indexing=True)
-
-	index_column = 'lower_index'
-	frequency_column = 'frequency_lower'
 	columns = ['rank', 'token', 'collocate_frequency', 'frequency']
-
-	start_time = time.time()
-	debug = False
-
-	sequence_len = len(token_sequence[0])
-	token_positions = self.corpus.get_token_positions(token_sequence, index_id)
-
-	if token_positions is None or token_positions[0].shape[0] == 0:
-		logger.warning(f'Token "{token_str}" not found in the corpus.')
-		return Result(type='collocates', df=pl.DataFrame(), title=f'No matches for "{token_str}"', description=f'{self.corpus.name}', summary_data={}, formatted_data=[])
-
-	count_tokens, tokens_descriptor, total_descriptor = self.corpus.get_token_count_text(exclude_punctuation)
+	hit_count = node_tokens.shape[1]
 
 	formatted_data = []
 	formatted_data.append(f'Report based on {tokens_descriptor}')
-
-	# if any of context_length, context_left, context_right are None - set them to 0
-	if type(context_length) == int:
-		if context_length < 1:
-			raise ValueError('Context length must be greater than 0')
-		context_left = context_length
-		context_right = context_length
-	elif type(context_length) == tuple:
-		if len(context_length) != 2:
-			raise ValueError('Context_length must be an int or a tuple of two ints (context_left, context_right).')
-		elif type(context_length[0]) != int or type(context_length[1]) != int:
-			raise ValueError('Context_length must be an int or a tuple of two ints (context_left, context_right).')
-		elif context_length[0] < 1 and context_length[1] < 1:
-			raise ValueError('If setting context lengths independently, at least one context length must be greater than 0')
-		else:
-			context_left, context_right = context_length
-
 	formatted_data.append(f'Context tokens left: {context_left}, context tokens right: {context_right}')
 
-	# getting context tokens
-	left_tokens = self.corpus.get_tokens_in_context(token_positions=token_positions, index=index_column, context_length=context_left, position_offset=-1, position_offset_step = -1, exclude_punctuation=exclude_punctuation, convert_eof = True)
-	right_tokens = self.corpus.get_tokens_in_context(token_positions=token_positions, index=index_column, context_length=context_right, position_offset=sequence_len, position_offset_step = 1, exclude_punctuation=exclude_punctuation, convert_eof = True)
 	combined_tokens = np.concatenate([left_tokens.flatten(), right_tokens.flatten()])
 	del left_tokens, right_tokens
 	combined_tokens = combined_tokens[combined_tokens != 0] # removes punctuation and space placeholder
@@ -107,7 +70,6 @@ def collocates(self:Collocates,
 	unique_token_ids, counts = np.unique(combined_tokens, return_counts=True)
 	token_count_in_context_window = combined_tokens.shape[0]
 
-	node_tokens = self.corpus.get_tokens_in_context(token_positions=token_positions, index=index_column, context_length=sequence_len, position_offset=0,  position_offset_step = 1, exclude_punctuation=exclude_punctuation, convert_eof = True)
 	unique_node_token_ids, node_counts = np.unique(node_tokens, return_counts=True)
 
 	df = pl.DataFrame({
@@ -125,8 +87,7 @@ def collocates(self:Collocates,
 	)
 
 	# adding frequency of collocates in corpus
-	df = df.join(self.corpus.vocab.collect().select(['token_id', 'token', frequency_column]), on='token_id', how='left', maintain_order='left')
-	df = df.rename({frequency_column: 'frequency'})
+	df = df.join(vocab_df, on='token_id', how='left', maintain_order='left')
 
 	filtering_descriptors = []
 	if min_collocate_frequency > 1: # applying min_frequency filter
@@ -139,14 +100,14 @@ def collocates(self:Collocates,
 		# calculating collocation measure
 		# from old code: logdice = 14 + math.log2((2 * collocate_count) / (node_frequency + loaded_corpora[corpus_name]['frequency_lookup'][collocate]))
 		df = df.with_columns(
-			(pl.lit(14) + ((2 * pl.col('collocate_frequency')) / (pl.lit(token_positions[0].shape[0]) + pl.col('frequency'))).log(2))
+			(pl.lit(14) + ((2 * pl.col('collocate_frequency')) / (pl.lit(hit_count) + pl.col('frequency'))).log(2))
 			.alias('logdice')
 		)
 		columns.append('logdice')
 	elif effect_size_measure == 'mutual_information':
 		# from old code: mi = math.log2((loaded_corpora[corpus_name]['token_count'] * collocate_count) / (node_frequency * loaded_corpora[corpus_name]['frequency_lookup'][collocate]))
 		df = df.with_columns(
-			(pl.lit(count_tokens) * pl.col('collocate_frequency') / (pl.lit(token_positions[0].shape[0]) * pl.col('frequency'))).log(2)
+			(pl.lit(count_tokens) * pl.col('collocate_frequency') / (pl.lit(hit_count) * pl.col('frequency'))).log(2)
 			.alias('mutual_information')
 		)
 		columns.append('mutual_information')
@@ -162,7 +123,7 @@ def collocates(self:Collocates,
 
 		# c = total tokens in context windows, is token_count_in_context_window calculated above
 		# d = total tokens outside context windows
-		total_tokens_outside_context_window = count_tokens - token_count_in_context_window - (token_positions[0].shape[0] * sequence_len)
+		total_tokens_outside_context_window = count_tokens - token_count_in_context_window - (hit_count * sequence_len)
 
 		# E1 = c*(a+b) / (c+d) 
 		# E2 = d*(a+b) / (c+d)
@@ -201,6 +162,7 @@ def collocates(self:Collocates,
 			p = p / unique_collocates # adjust by criteria
 		else:
 			p_value_descriptor = f'Keywords filtered based on p-value: {p}'
+		from scipy.stats import chi2
 		cut = chi2.ppf(1 - p, df=1)		
 		df = df.filter(pl.col('log_likelihood') > cut)
 		formatted_data.append(p_value_descriptor)
@@ -222,10 +184,110 @@ def collocates(self:Collocates,
 		formatted_data.append(f'Page {page_current} of {unique_collocates // page_size + 1}')
 
 	#formatted_data.append(f'{total_descriptor}: {count_tokens:,.0f}')
-	if debug:
-		columns = df.columns
+	return Result(type = 'collocates', df = df.select(columns), title=f'Collocates of "{token_str}"', description=f'{self.corpus.name}', summary_data={}, formatted_data=formatted_data)
 
-	logger.info(f"Collocates calculated in {time.time() - start_time:.2f} seconds.")
+# %% ../nbs/api/74_collocates.ipynb 15
+@patch
+def collocates(self:Collocates, 
+				token_str:str, # Token to search for
+				effect_size_measure:str = 'logdice', # statistical measure to use for collocation calculation: logdice, mutual_information
+				statistical_significance_measure:str = 'log_likelihood', # statistical significance measure to use, currently only 'log_likelihood' is supported
+				order:str|None = None, # default of None orders by collocation measure, results can also be ordered by: collocate_frequency, frequency, log_likelihood
+				order_descending:bool = True, # order is descending or ascending
+				statistical_significance_cut: float|None = None, # statistical significance p-value to filter results, e.g. 0.05 or 0.01 or 0.001 - ignored if None or 0
+				apply_bonferroni:bool = False, # apply Bonferroni correction to the statistical significance cut-off
+				context_length:int|tuple[int, int]=5, # Window size per side in tokens - if an int (e.g. 5) context lengths on left and right will be the same, for independent control of left and right context length pass a tuple (context_length_left, context_left_right) (e.g. (0, 5)) 
+				min_collocate_frequency:int=5, # Minimum count of collocates
+				page_size:int=PAGE_SIZE, # number of rows to return, if 0 returns all
+				page_current:int=1, # current page, ignored if page_size is 0
+				exclude_punctuation:bool=True # exclude punctuation tokens
+				) -> Result:
+	""" Report collocates for a given token string. """
 
-	return Result(type = 'collocates', df = df.select(columns), title=f'Collocates of "{token_str}"', description=f'{self.corpus.name}', summary_data={}, formatted_data=formatted_data)
+	return self.collocates_many([token_str], effect_size_measure = effect_size_measure, statistical_significance_measure = statistical_significance_measure, order = order, order_descending = order_descending, statistical_significance_cut = statistical_significance_cut, apply_bonferroni = apply_bonferroni, context_length = context_length, min_collocate_frequency = min_collocate_frequency, page_size = page_size, page_current = page_current, exclude_punctuation = exclude_punctuation)[token_str]
+
+# %% ../nbs/api/74_collocates.ipynb 16
+COLLOCATES_BATCH_SIZE = 1_000_000 # maximum number of node positions to retrieve context windows for in one pass
+
+# %% ../nbs/api/74_collocates.ipynb 17
+@patch
+def collocates_many(self:Collocates, 
+				token_strs:list[str], # Tokens to search for
+				effect_size_measure:str = 'logdice', # statistical measure to use for collocation calculation: logdice, mutual_information
+				statistical_significance_measure:str = 'log_likelihood', # statistical significance measure to use, currently only 'log_likelihood' is supported
+				order:str|None = None, # default of None orders by collocation measure, results can also be ordered by: collocate_frequency, frequency, log_likelihood
+				order_descending:bool = True, # order is descending or ascending
+				statistical_significance_cut: float|None = None, # statistical significance p-value to filter results, e.g. 0.05 or 0.01 or 0.001 - ignored if None or 0
+				apply_bonferroni:bool = False, # apply Bonferroni correction to the statistical significance cut-off
+				context_length:int|tuple[int, int]=5, # Window size per side in tokens - if an int (e.g. 5) context lengths on left and right will be the same, for independent control of left and right context length pass a tuple (context_length_left, context_left_right) (e.g. (0, 5)) 
+				min_collocate_frequency:int=5, # Minimum count of collocates
+				page_size:int=PAGE_SIZE, # number of rows to return, if 0 returns all
+				page_current:int=1, # current page, ignored if page_size is 0
+				exclude_punctuation:bool=True # exclude punctuation tokens
+				) -> dict[str, Result]: # Result for each token string, keyed by token string
+	""" Report collocates for many token strings, tokenizing the queries in one pass and retrieving context windows for batches of queries together. """
+
+	if effect_size_measure not in ['logdice', 'mutual_information']:
+		raise ValueError(f'Collocation measure must be one of "logdice" or "mutual_information".')
 	
+	if statistical_significance_measure not in ['log_likelihood']:
+		raise ValueError(f'Statistical significance measure must be "log_likelihood".')
+
+	if order not in [None, effect_size_measure, 'collocate_frequency', 'frequency', statistical_significance_measure]:
+		raise ValueError(f'The order parameter must be None (default) or one of: {effect_size_measure}, collocate_frequency, frequency, {statistical_significance_measure}')
+
+	# if any of context_length, context_left, context_right are None - set them to 0
+	if type(context_length) == int:
+		if context_length < 1:
+			raise ValueError('Context length must be greater than 0')
+		context_left = context_length
+		context_right = context_length
+	elif type(context_length) == tuple:
+		if len(context_length) != 2:
+			raise ValueError('Context_length must be an int or a tuple of two ints (context_left, context_right).')
+		elif type(context_length[0]) != int or type(context_length[1]) != int:
+			raise ValueError('Context_length must be an int or a tuple of two ints (context_left, context_right).')
+		elif context_length[0] < 1 and context_length[1] < 1:
+			raise ValueError('If setting context lengths independently, at least one context length must be greater than 0')
+		else:
+			context_left, context_right = context_length
+
+	start_time = time.time()
+
+	index_column = 'lower_index'
+	frequency_column = 'frequency_lower'
+
+	token_strs = list(dict.fromkeys(token_strs))
+	count_tokens, tokens_descriptor, total_descriptor = self.corpus.get_token_count_text(exclude_punctuation)
+	vocab_df = self.corpus.vocab.collect().select(['token_id', 'token', frequency_column]).rename({frequency_column: 'frequency'})
+
+	results = {}
+	batches = {} # queries with hits grouped by sequence length, so context windows can be retrieved together
+	for token_str, (token_sequence, index_id) in zip(token_strs, self.corpus.tokenize_many(token_strs, simple_indexing=True)):
+		token_positions = self.corpus.get_token_positions(token_sequence, index_id)
+		if token_positions[0].shape[0] == 0:
+			logger.warning(f'Token "{token_str}" not found in the corpus.')
+			results[token_str] = Result(type='collocates', df=pl.DataFrame(), title=f'No matches for "{token_str}"', description=f'{self.corpus.name}', summary_data={}, formatted_data=[])
+		else:
+			batches.setdefault(len(token_sequence[0]), []).append((token_str, token_positions[0]))
+
+	for sequence_len, queries in batches.items():
+		queries = deque(queries)
+		while len(queries) > 0:
+			batch = [queries.popleft()]
+			batch_size = batch[0][1].shape[0]
+			while len(queries) > 0 and batch_size + queries[0][1].shape[0] <= COLLOCATES_BATCH_SIZE:
+				batch_size += queries[0][1].shape[0]
+				batch.append(queries.popleft())
+
+			# getting context tokens for all queries in the batch and splitting the hit columns per query
+			positions = np.concatenate([positions for _, positions in batch])
+			left_tokens, node_tokens, right_tokens = self.corpus.get_tokens_in_context_windows(token_positions=(positions,), index=index_column, context_left=context_left, context_right=context_right, sequence_len=sequence_len, exclude_punctuation=exclude_punctuation, convert_eof = True)
+			splits = np.cumsum([positions.shape[0] for _, positions in batch])[:-1]
+			for (token_str, _), left, node, right in zip(batch, np.split(left_tokens, splits, axis=1), np.split(node_tokens, splits, axis=1), np.split(right_tokens, splits, axis=1)):
+				results[token_str] = self._collocates_report(token_str, left, node, right, sequence_len, vocab_df, count_tokens, tokens_descriptor, context_left, context_right, effect_size_measure, statistical_significance_measure, order, order_descending, statistical_significance_cut, apply_bonferroni, min_collocate_frequency, page_size, page_current)
+			del left_tokens, node_tokens, right_tokens
+
+	logger.info(f"Collocates calculated for {len(token_strs)} queries in {time.time() - start_time:.2f} seconds.")
+
+	return {token_str: results[token_str] for token_str in token_strs}
@@ -102,7 +102,9 @@ def ngram_frequencies(self: Conc,
 				page_size:int=PAGE_SIZE, # number of rows to return
 				page_current:int=1, # current page
                 show_document_frequency:bool=False, #show document frequency in output (slow to compute for large corpora)
-				exclude_punctuation:bool=True # exclude ngrams containing punctuation tokens
+				exclude_punctuation:bool=True, # exclude ngrams containing punctuation tokens
+				save_ngram_frequencies:bool=False, # save the ngram frequency table in the corpus directory and reuse it for later calls (e.g. paging through results)
+				counting_mode:str='default' # 'default' counts all ngrams in memory, 'partitioned' counts exactly with bounded memory, 'approximate' reports the most frequent ngrams with bounded memory
 				) -> Result: # return a Result object with the frequency table
     """ Report frequent ngrams. """
     return self.ngrams_.ngram_frequencies(ngram_length=ngram_length,
@@ -111,7 +113,9 @@ def ngram_frequencies(self: Conc,
                                     page_size=page_size,
                                     page_current=page_current,
                                     show_document_frequency=show_document_frequency,
-                                    exclude_punctuation=exclude_punctuation)
+                                    exclude_punctuation=exclude_punctuation,
+                                    save_ngram_frequencies=save_ngram_frequencies,
+                                    counting_mode=counting_mode)
 
 # %% ../nbs/api/50_conc.ipynb 23
 @patch
@@ -122,7 +126,7 @@ def concordance(self: Conc,
 				page_size:int=PAGE_SIZE, # number of results to display per results page
 				page_current:int=1, # current page of results
 				show_all_columns:bool = False, # df with all columns or just essentials
-				use_cache:bool = True, # retrieve the results from cache if available (currently ignored)
+				use_cache:bool = True, # retrieve the results from cache if available
 				ignore_punctuation:bool = True, # whether to ignore punctuation in the concordance sort
 				filter_context_str:str|None = None, # if a string is provided, the concordance lines will be filtered to show lines with contexts containing this string
 				filter_context_length:int|tuple[int, int]=5, # ignored if filter_context_str is None, otherwise this is the context window size per side in tokens - if an int (e.g. 5) context lengths on left and right will be the same, for independent control of left and right context length pass a tuple (context_length_left, context_left_right)
@@ -141,6 +145,21 @@ def concordance(self: Conc,
 
 # %% ../nbs/api/50_conc.ipynb 26
 @patch
+def concordance_counts_many(self: Conc, 
+				token_strs: list[str], # token strings to count concordance lines for
+				ignore_punctuation:bool = True, # whether to ignore punctuation when filtering contexts
+				filter_context_str:str|None = None, # if a string is provided, only concordance lines with contexts containing this string are counted
+				filter_context_length:int|tuple[int, int]=5, # ignored if filter_context_str is None, otherwise this is the context window size per side in tokens - if an int (e.g. 5) context lengths on left and right will be the same, for independent control of left and right context length pass a tuple (context_length_left, context_left_right)
+				) -> Result: # one row per token string with the number of concordance lines and documents
+	""" Count concordance lines and documents for many token strings. """
+	return self.concordance_.concordance_counts_many(token_strs = token_strs, 
+									  ignore_punctuation=ignore_punctuation,
+									  filter_context_str=filter_context_str,
+									  filter_context_length=filter_context_length
+									  )
+
+# %% ../nbs/api/50_conc.ipynb 28
+@patch
 def concordance_plot(self: Conc,
 				token_str: str, # token string for concordance plot
 				page_size: int = 10, # number of plots per page
@@ -151,7 +170,7 @@ def concordance_plot(self: Conc,
 												page_size=page_size,
 												append_info=append_info)
 
-# %% ../nbs/api/50_conc.ipynb 28
+# %% ../nbs/api/50_conc.ipynb 30
 @patch
 def set_reference_corpus(self: Conc, 
                     corpus: Corpus | ListCorpus # Reference corpus
@@ -159,7 +178,7 @@ def set_reference_corpus(self: Conc,
     """ Set a reference corpus for keyness analysis. """
     self.keyness_ = Keyness(self.corpus, corpus)
 
-# %% ../nbs/api/50_conc.ipynb 30
+# %% ../nbs/api/50_conc.ipynb 32
 @patch
 def keywords(self: Conc,
 				effect_size_measure:str = 'log_ratio', # effect size measure to use, currently only 'log_ratio' is supported
@@ -212,7 +231,7 @@ def keywords(self: Conc,
 									exclude_negative_keywords=exclude_negative_keywords
 									)
 
-# %% ../nbs/api/50_conc.ipynb 33
+# %% ../nbs/api/50_conc.ipynb 35
 @patch
 def collocates(self: Conc, 
 				token_str:str, # Token to search for
@@ -243,3 +262,35 @@ def collocates(self: Conc,
 										page_size=page_size, 
 										page_current=page_current,
 										exclude_punctuation=exclude_punctuation)
+
+# %% ../nbs/api/50_conc.ipynb 38
+@patch
+def collocates_many(self: Conc, 
+				token_strs:list[str], # Tokens to search for
+				effect_size_measure:str = 'logdice', # statistical measure to use for collocation calculation: logdice, mutual_information
+				statistical_significance_measure:str = 'log_likelihood', # statistical significance measure to use, currently only 'log_likelihood' is supported
+				order:str|None = None, # default of None orders by collocation_measure, results can also be ordered by: collocate_frequency, frequency, log_likelihood
+				order_descending:bool = True, # order is descending or ascending
+				statistical_significance_cut: float|None = None, # statistical significance p-value to filter results, e.g. 0.05 or 0.01 or 0.001 - ignored if None or 0
+				apply_bonferroni:bool = False, # apply Bonferroni correction to the statistical significance cut-off
+				context_length:int|tuple[int, int]=5, # Window size per side in tokens - if an int (e.g. 5) context lengths on left and right will be the same, for independent control of left and right context length pass a tuple (context_length_left, context_left_right) (e.g. (0, 5)) 
+				min_collocate_frequency:int=5, # Minimum count of collocates
+				page_size:int=PAGE_SIZE, # number of rows to return, if 0 returns all
+				page_current:int=1, # current page, ignored if page_size is 0
+				exclude_punctuation:bool=True # exclude punctuation tokens				
+				) -> dict[str, Result]: # Result for each token string, keyed by token string
+
+	""" Report collocates for many token strings. """
+
+	return self.collocates_.collocates_many(token_strs, 
+										effect_size_measure=effect_size_measure, 
+										statistical_significance_measure=statistical_significance_measure, 
+										order=order, 
+										order_descending=order_descending, 
+										statistical_significance_cut=statistical_significance_cut, 
+										apply_bonferroni=apply_bonferroni, 
+										context_length=context_length, 
+										min_collocate_frequency=min_collocate_frequency, 
+										page_size=page_size, 
+										page_current=page_current,
+										exclude_punctuation=exclude_punctuation)
@@ -11,6 +11,7 @@ import math
 from fastcore.basics import patch
 import msgspec
 import hashlib
+from collections import OrderedDict
 
 # %% auto 0
 __all__ = ['Concordance']
@@ -25,49 +26,85 @@ from .core import logger, PAGE_SIZE, EOF_TOKEN_STR, ERR_TOKEN_STR
 class Concordance:
 	""" Class for concordancing. """
 	def __init__(self,
-			  corpus:Corpus # Corpus instance
+			  corpus:Corpus, # Corpus instance
+			  cache_max_bytes:int = 100_000_000 # maximum size in bytes of concordance results kept in the corpus results cache, least recently used results are removed first
 			  ): 
 
 		if type(corpus) != Corpus:
 			raise ValueError('Conc concordance functionality is only available for instances of the Corpus class.')
 
 		self.corpus = corpus
+		self.cache_max_bytes = cache_max_bytes
 
 
 # %% ../nbs/api/72_concordance.ipynb 11
 @patch
+def _get_cached_result(self:Concordance,
+					   cache_id: tuple # cache id of the result
+					   ) -> tuple|None: # cached result or None if not cached
+	""" Get a result from the concordance cache and mark it as most recently used. """
+
+	cache = self.corpus.results_cache.get('concordance_cache')
+	if cache is None or cache_id not in cache:
+		return None
+	cache.move_to_end(cache_id)
+	return cache[cache_id][1]
+
+# %% ../nbs/api/72_concordance.ipynb 12
+@patch
+def _cache_result(self:Concordance,
+				  cache_id: tuple, # cache id of the result
+				  result: tuple, # result to cache
+				  size: int # estimated size of the result in bytes
+				  ):
+	""" Add a result to the concordance cache, removing least recently used results to keep the cache within cache_max_bytes. """
+
+	if size > self.cache_max_bytes:
+		logger.info(f'Concordance result ({size} bytes) is larger than the cache limit, not caching')
+		return
+	if 'concordance_cache' not in self.corpus.results_cache:
+		self.corpus.results_cache['concordance_cache'] = OrderedDict()
+	cache = self.corpus.results_cache['concordance_cache']
+	cache[cache_id] = (size, result)
+	cache.move_to_end(cache_id)
+	while sum(cached_size for cached_size, _ in cache.values()) > self.cache_max_bytes:
+		cache.popitem(last = False)
+	self.corpus.results_cache['concordance_cache'] = cache # update the size of the cache entry
+
+# %% ../nbs/api/72_concordance.ipynb 13
+@patch
+def _get_sort_column_positions(self:Concordance,
+							   token_positions: np.ndarray, # positions of the first token of each concordance line
+							   sort_column: int, # sort column, negative for columns left of the token sequence, sequence_len or greater for columns to the right
+							   sequence_len: int, # length of the token sequence being concordanced
+							   ignore_punctuation: bool = True # whether to skip punctuation tokens
+							   ) -> np.ndarray: # positions of the sort column tokens
+	""" Get positions of the tokens for a sort column, with punctuation skipped using the corpus non-punctuation positions. """
+
+	if sort_column < 0:
+		return self.corpus.get_context_positions(token_positions, [sort_column], exclude_punctuation = ignore_punctuation)[0]
+	else:
+		return self.corpus.get_context_positions(np.asarray(token_positions) + sequence_len - 1, [sort_column - sequence_len + 1], exclude_punctuation = ignore_punctuation)[0]
+
+# %% ../nbs/api/72_concordance.ipynb 14
+@patch
 def _get_concordance_sort(self:Concordance, 
 						 token_positions: list[np.ndarray], # token index to get sort columns for
 						 sort_columns: list, # sort columns to use
-						 ignore_punctuation: bool = True # whether to use punctuation tokens for sorts or skip
+						 ignore_punctuation: bool = True, # whether to use punctuation tokens for sorts or skip
+						 sequence_len: int = 1 # length of the token sequence being concordanced
 						 ) -> tuple[np.ndarray, np.ndarray]: # token ids for first sort column and corresponding sort order
 	""" Get the first sort column for a concordance. """
 
 	start_time = time.time()
-	index = 'orth_index'
-	seq = np.array(token_positions[0]+sort_columns[0])
-	sort_column_ids = self.corpus.get_tokens_by_index('orth_index')[seq]
-	if ignore_punctuation:
-		sort_column_ids_punct_mask = np.isin(sort_column_ids, self.corpus.punct_tokens)
-		next_column = 1
-		while np.any(sort_column_ids_punct_mask):
-			sum = np.sum(sort_column_ids_punct_mask)
-			logger.debug(f'Punct token correction for {sum} tokens, pass {next_column}')
-			sort_column_ids[sort_column_ids_punct_mask] = self.corpus.get_tokens_by_index('orth_index')[np.array(token_positions[0]+sort_columns[0]+next_column)][sort_column_ids_punct_mask]
-			next_column += 1
-			sort_column_ids_punct_mask = np.isin(sort_column_ids, self.corpus.punct_tokens)
-			if next_column > len(sort_columns):
-				sum = np.sum(sort_column_ids_punct_mask)
-				if sum > 0:
-					logger.warning(f'Concordance sort column retrieval reached maximum columns with sorts for {sum} lines not found, breaking as reached iteration limit')
-				break
-
+	sort_column_positions = self._get_sort_column_positions(token_positions[0], sort_columns[0], sequence_len, ignore_punctuation)
+	sort_column_ids = self.corpus.get_tokens_by_index('orth_index')[sort_column_positions]
 	sort_column_order = self.corpus.token_ids_to_sort_order(sort_column_ids)
 	logger.info(f'Concordance sort column ({sort_column_ids.shape[0]}) retrieval time: {(time.time() - start_time):.5f} seconds')
 	return sort_column_ids, sort_column_order
 
 
-# %% ../nbs/api/72_concordance.ipynb 18
+# %% ../nbs/api/72_concordance.ipynb 21
 @patch
 def _build_concordance_result_with_sort(self:Concordance,
 						sequence_length: int, # length of the sequence to concordance
@@ -90,60 +127,39 @@ def _build_concordance_result_with_sort(self:Concordance,
 	concordance_result_df = concordance_result_df.with_columns(concordance_columns)
 
 	if ignore_punctuation:
-		# get all positive integers from sort_columns
-		sort_columns_positive = [col for col in sort_columns if col > 0]
-		sort_columns_negative = [col for col in sort_columns if col < 0]
-		if len(sort_columns_positive) > 0:
-			right_tokens = np.array(concordance_result_df.select([f'{i}' for i in concordance_range if i > 0 and i not in list(range(sequence_length))]).to_numpy())
-			right_tokens = right_tokens.T
-			logger.debug(f"Context tokens collected: {right_tokens.shape}")
-			right_tokens = np.where(np.isin(right_tokens, self.corpus.punct_tokens), 0, right_tokens)
-			right_tokens = self.corpus._shift_zeroes_to_end(right_tokens)
-			logger.debug(f"Right tokens shape: {right_tokens.shape}")
-			for i, sort_column in enumerate(sort_columns_positive):
-				logger.debug(f"Adding left sort column sort{sort_columns.index(sort_column)} based on column {sort_column}")
-				concordance_result_df = concordance_result_df.with_columns(
-					# because only have positive columns after sequence the first position in right_tokens is sequence_length - so need to adjust sort_column by sequence_length
-					pl.Series(self.corpus.token_ids_to_sort_order(right_tokens[sort_column-sequence_length])).alias(f'sort{sort_columns.index(sort_column)}'),
-					pl.Series(self.corpus.token_ids_to_tokens(right_tokens[sort_column-sequence_length])).alias(f'sort_debug_{sort_columns.index(sort_column)}')
-				)
-		if len(sort_columns_negative) > 0:
-			left_tokens = np.array(concordance_result_df.select([f'{i}' for i in concordance_range if i < 0]).to_numpy())
-			left_tokens = left_tokens.T
-			logger.debug(f"Context tokens collected: {left_tokens.shape}")
-			left_tokens = np.where(np.isin(left_tokens, self.corpus.punct_tokens), 0, left_tokens)
-			left_tokens = self.corpus._shift_zeroes_to_start(left_tokens)
-			logger.debug(f"Left tokens shape: {left_tokens.shape}")
-			for i, sort_column in enumerate(sort_columns_negative):
-				logger.debug(f"Adding left sort column sort{sort_columns.index(sort_column)} based on column {sort_column}")
-				concordance_result_df = concordance_result_df.with_columns(
-					# because only have negative columns before sequence first position - can use sort_column direct
-					pl.Series(self.corpus.token_ids_to_sort_order(left_tokens[sort_column])).alias(f'sort{sort_columns.index(sort_column)}'),
-					pl.Series(self.corpus.token_ids_to_tokens(left_tokens[sort_column])).alias(f'sort_debug_{sort_columns.index(sort_column)}')
-				)
+		token_positions = concordance_result_df['index'].to_numpy()
+		for i, sort_column in enumerate(sort_columns):
+			logger.debug(f"Adding sort column sort{i} based on column {sort_column}")
+			sort_column_ids = self.corpus.get_tokens_by_index('orth_index')[self._get_sort_column_positions(token_positions, sort_column, sequence_length, ignore_punctuation)]
+			concordance_result_df = concordance_result_df.with_columns(
+				pl.Series(self.corpus.token_ids_to_sort_order(sort_column_ids)).alias(f'sort{i}'),
+				pl.Series(self.corpus.token_ids_to_tokens(sort_column_ids)).alias(f'sort_debug_{i}')
+			)
 
 	return concordance_result_df
 
 
-# %% ../nbs/api/72_concordance.ipynb 19
+# %% ../nbs/api/72_concordance.ipynb 22
 @patch
 def _col_contains_sequence(self:Concordance,
 						  haystack: np.ndarray,  # 2d array of token ids in order of token positions 
-						  needle: np.ndarray # token sequence (from tokenize) to search for in each column of haystack
+						  needle: tuple # token sequence (from tokenize) to search for in each column of haystack, each slot is a token id or a tuple of token ids
 						  ) -> np.ndarray: # mask to process token positions by to filter results
 	""" Get a mask of columns in haystack that contain sequence needle. """
 	n = len(needle)
-	result = []
-	for row in haystack.T:
-		if any((row[i:i+n] == needle).all() for i in range(len(row) - n + 1)):
-			result.append(True)
-		else:
-			result.append(False)
-	return np.array(result)
+	if haystack.shape[0] < n:
+		return np.zeros(haystack.shape[1], dtype=bool)
+	windows = np.lib.stride_tricks.sliding_window_view(haystack, n, axis = 0) # shape (number of windows, columns, n), a view without copying haystack
+	if not any(isinstance(slot, tuple) for slot in needle):
+		return (windows == np.asarray(needle)).all(axis = 2).any(axis = 0)
+	is_match = np.ones(windows.shape[:2], dtype=bool)
+	for i, slot in enumerate(needle):
+		is_match &= np.isin(windows[:, :, i], slot) if isinstance(slot, tuple) else windows[:, :, i] == slot
+	return is_match.any(axis = 0)
 
 
 
-# %% ../nbs/api/72_concordance.ipynb 20
+# %% ../nbs/api/72_concordance.ipynb 24
 @patch
 def _concordance_filter_context(self:Concordance,
 						filter_context_str:str|None, # if a string is provided, the concordance lines will be filtered to show lines containing this string
@@ -159,7 +175,7 @@ def _concordance_filter_context(self:Concordance,
 	logger.debug(f'Filtering concordance results for context string: {filter_context_str}')
 
 	context_token_sequence, context_index_id = self.corpus.tokenize(filter_context_str, simple_indexing=True)
-	if 0 in context_token_sequence[0]:
+	if all(any(slot == () if isinstance(slot, tuple) else slot == 0 for slot in sequence) for sequence in context_token_sequence):
 		token_positions[0] = [] # there will be no results as the context token contains a token not present in the corpus
 		logger.warning(f'Context string provided "{filter_context_str}" contains at least one token not present in the corpus, therefore there are no concordance lines')
 	else:
@@ -181,13 +197,10 @@ def _concordance_filter_context(self:Concordance,
 
 		# on to filtering
 		context_index_column = 'lower_index'
-		combined_tokens = np.empty((0, len(token_positions[0])), dtype=np.int32)
-		if context_left > 0:
-			combined_tokens = self.corpus.get_tokens_in_context(token_positions=token_positions, index=context_index_column, context_length=context_left, position_offset=-1, position_offset_step = -1, exclude_punctuation=ignore_punctuation, convert_eof = True)
-		if context_right > 0:
-			combined_tokens = np.concatenate([combined_tokens, self.corpus.get_tokens_in_context(token_positions=token_positions, index=context_index_column, context_length=context_right, position_offset=sequence_len, position_offset_step = 1, exclude_punctuation=ignore_punctuation, convert_eof = True)])
+		left_tokens, _, right_tokens = self.corpus.get_tokens_in_context_windows(token_positions=token_positions, index=context_index_column, context_left=context_left, context_right=context_right, sequence_len=sequence_len, exclude_punctuation=ignore_punctuation, convert_eof = True)
+		combined_tokens = np.concatenate([left_tokens, right_tokens])
 		logger.debug(f'Context tokens collected for left {context_left} and right {context_right}, shape: {combined_tokens.shape}')
-		valid_positions = self._col_contains_sequence(combined_tokens, context_token_sequence[0])
+		valid_positions = np.any([self._col_contains_sequence(combined_tokens, sequence) for sequence in context_token_sequence], axis = 0)
 		logger.debug(f'Length of token positions prior to filtering: {len(token_positions[0])}')
 		token_positions[0] = token_positions[0][valid_positions]
 		logger.debug(f'Length of token positions prior to filtering: {len(token_positions[0])}')
@@ -196,7 +209,7 @@ def _concordance_filter_context(self:Concordance,
 
 	return token_positions, formatted_data
 
-# %% ../nbs/api/72_concordance.ipynb 21
+# %% ../nbs/api/72_concordance.ipynb 25
 @patch
 def concordance(self: Concordance, 
 				token_str: str, # token string to get concordance for 
@@ -205,7 +218,7 @@ def concordance(self: Concordance,
 				page_size:int=PAGE_SIZE, # number of results to display per results page
 				page_current:int=1, # current page of results
 				show_all_columns:bool = False, # df with all columns or just essentials
-				use_cache:bool = True, # retrieve the results from cache if available (currently ignored)
+				use_cache:bool = True, # retrieve the results from cache if available
 				ignore_punctuation:bool = True, # whether to ignore punctuation in the concordance sort
 				filter_context_str:str|None = None, # if a string is provided, the concordance lines will be filtered to show lines with contexts containing this string
 				filter_context_length:int|tuple[int, int]=5, # ignored if filter_context_str is None, otherwise this is the context window size per side in tokens - if an int (e.g. 5) context lengths on left and right will be the same, for independent control of left and right context length pass a tuple (context_length_left, context_left_right)
@@ -234,17 +247,14 @@ def concordance(self: Concordance,
 	index = 'orth_index'
 	formatted_data = []
 
-	use_cache = False # forcing off for now
-
-	cache_id = tuple(['concordance'] + list(token_sequence) + [order])
+	# the corpus counts and path are part of the cache id so results are not reused if the corpus changes
+	cache_id = ('concordance', self.corpus.corpus_path, self.corpus.document_count, self.corpus.token_count, tuple(tuple(sequence) for sequence in token_sequence), index_id, order, ignore_punctuation, filter_context_str, filter_context_length if filter_context_str is not None else None)
+	cached_result = self._get_cached_result(cache_id) if use_cache == True else None
 
-	if use_cache == True and cache_id in self.corpus.results_cache:
+	if cached_result is not None:
 		logger.info('Using cached concordance results')
-		positional_columns = self.corpus.results_cache[cache_id][0]
-		concordance_df = self.corpus.results_cache[cache_id][1]
-		total_count = self.corpus.results_cache[cache_id][2]
-		total_docs = self.corpus.results_cache[cache_id][3]
-		sort_columns = self.corpus.results_cache[cache_id][4]
+		concordance_df, total_count, total_docs, sort_columns, formatted_data = cached_result
+		formatted_data = list(formatted_data)
 	else:
 		logger.info('Processing concordance results')
 		token_positions = self.corpus.get_token_positions(token_sequence, index_id)
@@ -269,7 +279,7 @@ def concordance(self: Concordance,
 			sort_columns = [sequence_len + 1 - 1,sequence_len + 2 - 1,sequence_len + 3 - 1]
 
 		# getting first sort column here
-		sort_column_ids, sort_column_order = self._get_concordance_sort(token_positions, sort_columns, ignore_punctuation=ignore_punctuation)
+		sort_column_ids, sort_column_order = self._get_concordance_sort(token_positions, sort_columns, ignore_punctuation=ignore_punctuation, sequence_len=sequence_len)
 
 		concordance_df = pl.DataFrame([pl.Series(name='index', values=token_positions[0]), pl.Series(name='sort0', values=sort_column_order), pl.Series(name=str(sort_columns[0]), values=sort_column_ids)])
 		concordance_df = concordance_df.sort('sort0')
@@ -279,7 +289,7 @@ def concordance(self: Concordance,
 		total_docs = len(np.unique(self.corpus.get_tokens_by_index('token2doc_index')[np.array(token_positions[0])])) # REFACTORED - was using old self.corpus.token2doc_index
 
 		if use_cache == True:
-			self.corpus.results_cache[cache_id] = [positional_columns, concordance_df, total_count, total_docs, sort_columns]
+			self._cache_result(cache_id, (concordance_df, total_count, total_docs, sort_columns, list(formatted_data)), concordance_df.estimated_size())
 
 	# working out relevant slice to populate 
 	resultset_start = page_size*(page_current-1)
@@ -350,7 +360,58 @@ def concordance(self: Concordance,
 	return Result(type = 'concordance', df=concordance_view_df, title=f'Concordance for "{token_str}"', description=f'{self.corpus.name}, Context tokens: {context_length}, Order: {order}', summary_data=summary_data, formatted_data=formatted_data)
 
 
-# %% ../nbs/api/72_concordance.ipynb 39
+# %% ../nbs/api/72_concordance.ipynb 32
+@patch
+def concordance_counts_many(self: Concordance, 
+				token_strs: list[str], # token strings to count concordance lines for
+				ignore_punctuation:bool = True, # whether to ignore punctuation when filtering contexts
+				filter_context_str:str|None = None, # if a string is provided, only concordance lines with contexts containing this string are counted
+				filter_context_length:int|tuple[int, int]=5, # ignored if filter_context_str is None, otherwise this is the context window size per side in tokens - if an int (e.g. 5) context lengths on left and right will be the same, for independent control of left and right context length pass a tuple (context_length_left, context_left_right)
+				) -> Result: # one row per token string with the number of concordance lines and documents
+	""" Count concordance lines and documents for many token strings, tokenizing the queries in one pass and filtering contexts for queries of the same length together. """
+
+	start_time = time.time()
+
+	token_strs = list(dict.fromkeys(token_strs))
+	formatted_data = []
+
+	# token strings with the same token sequence share positions
+	query_ids = []
+	query_sequences = {}
+	for token_sequence, index_id in self.corpus.tokenize_many(token_strs, simple_indexing=True):
+		query_ids.append(query_sequences.setdefault((tuple(tuple(sequence) for sequence in token_sequence), index_id), len(query_sequences)))
+
+	query_positions = {}
+	for (token_sequence, index_id), query_id in query_sequences.items():
+		token_positions = self.corpus.get_token_positions(list(token_sequence), index_id)
+		query_positions[query_id] = np.asarray(token_positions[0]).astype(np.int64)
+
+	if filter_context_str is not None: # filtering contexts for all queries with the same sequence length in one pass
+		for sequence_len in set(len(token_sequence[0]) for token_sequence, _ in query_sequences):
+			group = [query_id for (token_sequence, _), query_id in query_sequences.items() if len(token_sequence[0]) == sequence_len]
+			positions = np.unique(np.concatenate([query_positions[query_id] for query_id in group])) # queries with wildcards or alternatives can share positions
+			if positions.shape[0] == 0:
+				continue
+			token_positions, group_formatted_data = self._concordance_filter_context(filter_context_str=filter_context_str, filter_context_length=filter_context_length, ignore_punctuation = ignore_punctuation, sequence_len=sequence_len, token_positions=[positions], formatted_data=[])
+			filtered_positions = np.asarray(token_positions[0], dtype=np.int64)
+			for query_id in group:
+				query_positions[query_id] = query_positions[query_id][np.isin(query_positions[query_id], filtered_positions)]
+			if len(formatted_data) == 0: # the filter description is the same for every group
+				formatted_data = group_formatted_data
+
+	token2doc_index = self.corpus.get_tokens_by_index('token2doc_index')
+	counts = {query_id: (positions.shape[0], np.unique(token2doc_index[positions]).shape[0]) for query_id, positions in query_positions.items()}
+
+	df = pl.DataFrame({'token': token_strs, 'frequency': [counts[query_id][0] for query_id in query_ids], 'document_frequency': [counts[query_id][1] for query_id in query_ids]}, schema={'token': pl.Utf8, 'frequency': pl.UInt32, 'document_frequency': pl.UInt32})
+
+	formatted_data.append(f'Queries: {len(token_strs)}')
+	formatted_data.append(f'Queries with no concordance lines: {df.filter(pl.col("frequency") == 0).select(pl.len()).item()}')
+
+	logger.info(f'Concordance counts for {len(token_strs)} queries: {(time.time() - start_time):.5f} seconds')
+
+	return Result(type = 'concordance_counts', df=df, title=f'Concordance counts', description=f'{self.corpus.name}', summary_data={'total_queries': len(token_strs)}, formatted_data=formatted_data)
+
+# %% ../nbs/api/72_concordance.ipynb 48
 @patch
 def _get_concordance_plot_style(
 	self: Concordance,
@@ -448,7 +509,7 @@ def _get_concordance_plot_style(
 	return html_styles
 
 
-# %% ../nbs/api/72_concordance.ipynb 40
+# %% ../nbs/api/72_concordance.ipynb 49
 @patch
 def _get_concordance_plot_script(
 	self: Concordance,
@@ -618,7 +679,7 @@ def _get_concordance_plot_script(
 	'''
 	return html_script
 
-# %% ../nbs/api/72_concordance.ipynb 41
+# %% ../nbs/api/72_concordance.ipynb 50
 @patch
 def concordance_plot(self: Concordance,
 				token_str: str, # token string for concordance plot
@@ -6,18 +6,20 @@
 from __future__ import annotations
 import re
 import os
+import sys
 import logging
-from great_tables import GT
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import numpy as np
 import polars as pl
 import msgspec
-import spacy
-from memory_profiler import _get_memory
 
 # %% auto 0
-__all__ = ['PAGE_SIZE', 'EOF_TOKEN_STR', 'ERR_TOKEN_STR', 'DOCUMENTATION_URL', 'REPOSITORY_URL', 'PYPI_URL', 'CITATION_STR',
-           'logger', 'set_logger_state', 'spacy_attribute_name', 'CorpusMetadata', 'get_stop_words', 'list_corpora',
-           'create_toy_corpus_sources', 'show_toy_corpus', 'get_nltk_corpus_sources', 'get_garden_party',
-           'get_large_dataset', 'create_large_dataset_sizes']
+__all__ = ['PAGE_SIZE', 'EOF_TOKEN_STR', 'ERR_TOKEN_STR', 'ORTH', 'LOWER', 'SPACY', 'DOCUMENTATION_URL', 'REPOSITORY_URL',
+           'PYPI_URL', 'CITATION_STR', 'logger', 'RESULTS_CACHE_MAX_BYTES', 'set_logger_state', 'spacy_attribute_name',
+           'CorpusMetadata', 'ResultsCache', 'get_stop_words', 'list_corpora', 'create_toy_corpus_sources',
+           'show_toy_corpus', 'get_nltk_corpus_sources', 'get_garden_party', 'get_large_dataset',
+           'create_large_dataset_sizes']
 
 # %% ../nbs/api/80_core.ipynb 4
 from . import __version__
@@ -26,6 +28,7 @@ from . import __version__
 PAGE_SIZE = 20
 EOF_TOKEN_STR = ' conc-end-of-file-token'
 ERR_TOKEN_STR = 'ERROR: not a token'
+ORTH, LOWER, SPACY = 65, 66, 81 # spaCy attribute ids (spacy.attrs) for token indexes, defined here so spaCy is only imported when a model is needed
 
 # %% ../nbs/api/80_core.ipynb 6
 DOCUMENTATION_URL = 'https://geoffford.nz/conc'
@@ -40,6 +43,7 @@ class ConcLogger(logging.Logger):
 		super().__init__(name, level)
 		self._setup_handler(log_file)
 		self.last_memory_usage = None
+		self.peak_memory_usage = None # highest memory usage recorded by memory_usage checkpoints
 
 	def _setup_handler(self, log_file = None):
 		console_handler = logging.StreamHandler()
@@ -67,6 +71,7 @@ class ConcLogger(logging.Logger):
 	def memory_usage(self, message = '', init=False):
 		if init:
 			self.last_memory_usage = None
+		from memory_profiler import _get_memory
 		usage = _get_memory(-1, 'psutil', include_children=True)
 		if self.last_memory_usage is not None:
 			difference = usage - self.last_memory_usage
@@ -75,6 +80,8 @@ class ConcLogger(logging.Logger):
 			memory_message = f', memory usage: {usage} MB'
 		self.info(f"{message}{memory_message}")
 		self.last_memory_usage = usage
+		if self.peak_memory_usage is None or usage > self.peak_memory_usage:
+			self.peak_memory_usage = usage
 
 
 # %% ../nbs/api/80_core.ipynb 11
@@ -92,6 +99,7 @@ def set_logger_state(state:str # 'quiet' or 'verbose'
 # %% ../nbs/api/80_core.ipynb 15
 def spacy_attribute_name(index):
 	"""Get name of index from spacy."""
+	import spacy.attrs
 
 	return list(spacy.attrs.IDS.keys())[list(spacy.attrs.IDS.values()).index(index)]
 
@@ -116,10 +124,101 @@ class CorpusMetadata(msgspec.Struct):
     SPACY_MODEL_VERSION: str
     punct_tokens: list[int]
     space_tokens: list[int]
+    TOKENIZER_MODE: str = 'pipe' # corpora built before tokenizer modes were added used 'pipe'
 
 
 
 # %% ../nbs/api/80_core.ipynb 20
+RESULTS_CACHE_MAX_BYTES = 4_000_000_000 # default memory budget in bytes for results cached by a corpus
+
+# %% ../nbs/api/80_core.ipynb 21
+def _estimate_nbytes(value) -> int: # estimated size in bytes
+	""" Estimate the memory used by a cached value, using nbytes for arrays and counting memory mapped arrays as using no memory. """
+	if isinstance(value, np.memmap) and value.filename is not None: # backed by a file on disk
+		return 0
+	if isinstance(value, np.ndarray):
+		if value.dtype == object:
+			return value.nbytes + sum(sys.getsizeof(item) for item in value.flat)
+		return value.nbytes
+	if isinstance(value, (pl.DataFrame, pl.Series)):
+		return int(value.estimated_size())
+	if isinstance(value, dict):
+		return sys.getsizeof(value) + sum(_estimate_nbytes(key) + _estimate_nbytes(item) for key, item in value.items())
+	if isinstance(value, (list, tuple, set)):
+		return sys.getsizeof(value) + sum(_estimate_nbytes(item) for item in value)
+	return sys.getsizeof(value)
+
+# %% ../nbs/api/80_core.ipynb 22
+class ResultsCache(MutableMapping):
+	""" Dictionary of cached results with a memory budget, removing least recently used entries when the budget is exceeded. """
+	def __init__(self,
+				 max_bytes: int|None = RESULTS_CACHE_MAX_BYTES # memory budget in bytes, None for no limit
+				 ):
+		self.max_bytes = max_bytes
+		self._entries = OrderedDict() # key: (size in bytes, value), ordered from least to most recently used
+		self.nbytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def __contains__(self, key) -> bool:
+		""" Check if a key is cached, counting a hit or miss and marking the entry as recently used. """
+		if key in self._entries:
+			self.hits += 1
+			self._entries.move_to_end(key)
+			return True
+		self.misses += 1
+		return False
+
+	def __getitem__(self, key):
+		value = self._entries[key][1]
+		self._entries.move_to_end(key)
+		return value
+
+	def get(self, key, default = None):
+		""" Get a cached value, counting a hit or miss. """
+		return self[key] if key in self else default
+
+	def __setitem__(self, key, value):
+		""" Cache a value, removing least recently used entries if the budget is exceeded. The value being cached is always kept. """
+		if key in self._entries:
+			self.nbytes -= self._entries.pop(key)[0]
+		nbytes = _estimate_nbytes(value)
+		self._entries[key] = (nbytes, value)
+		self.nbytes += nbytes
+		if self.max_bytes is not None:
+			while self.nbytes > self.max_bytes and len(self._entries) > 1:
+				evicted_key, (evicted_nbytes, _) = self._entries.popitem(last = False)
+				self.nbytes -= evicted_nbytes
+				self.evictions += 1
+				logger.debug(f'Removed {evicted_key} ({evicted_nbytes} bytes) from results cache')
+
+	def __delitem__(self, key):
+		self.nbytes -= self._entries.pop(key)[0]
+
+	def __iter__(self):
+		return iter(self._entries)
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def clear(self):
+		""" Remove all entries and reset the hit, miss and eviction counts. """
+		self._entries.clear()
+		self.nbytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def info(self) -> dict: # hits, misses, evictions, entries, nbytes and max_bytes
+		""" Get the size of the cache and hit, miss and eviction counts. """
+		return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'entries': len(self._entries), 'nbytes': self.nbytes, 'max_bytes': self.max_bytes}
+
+	def sizes(self) -> dict: # size in bytes of each entry, from least to most recently used
+		""" Get the size of each cached entry. """
+		return {key: nbytes for key, (nbytes, _) in self._entries.items()}
+
+# %% ../nbs/api/80_core.ipynb 25
 def get_stop_words(save_path:str, # directory to save stop words to, file name will be created based on spaCy model name
 				   spacy_model:str = 'en_core_web_sm' # model to get stop words for
 					):
@@ -135,6 +234,7 @@ def get_stop_words(save_path:str, # directory to save stop words to, file name w
 			stop_words = sorted(set(f.read().splitlines()))
 
 	if stop_words is None:
+		import spacy
 		nlp = spacy.load(spacy_model)
 		stop_words = nlp.Defaults.stop_words
 		del nlp
@@ -150,7 +250,7 @@ def get_stop_words(save_path:str, # directory to save stop words to, file name w
 
 	return stop_words
 
-# %% ../nbs/api/80_core.ipynb 23
+# %% ../nbs/api/80_core.ipynb 28
 def list_corpora(
 		path: str # path to load corpus
 		) -> pl.DataFrame: # Dataframe with path, corpus, corpus name, document count, token count
@@ -162,7 +262,7 @@ def list_corpora(
 	return _list_corpora(path=path)
 
 
-# %% ../nbs/api/80_core.ipynb 24
+# %% ../nbs/api/80_core.ipynb 29
 def create_toy_corpus_sources(source_path:str # path to location of sources for building corpora
 							 ):
 	""" (Deprecated - call via conc.corpora) Create txt files and csv to test build of toy corpus. """
@@ -172,7 +272,7 @@ def create_toy_corpus_sources(source_path:str # path to location of sources for
 	from conc.corpora import create_toy_corpus_sources as _create_toy_corpus_sources
 	return _create_toy_corpus_sources(source_path=source_path)
 
-# %% ../nbs/api/80_core.ipynb 25
+# %% ../nbs/api/80_core.ipynb 30
 def show_toy_corpus(
         csv_path:str # path to location of csv for building corpora
         ) -> GT: 
@@ -183,7 +283,7 @@ def show_toy_corpus(
     from conc.corpora import show_toy_corpus as _show_toy_corpus
     return _show_toy_corpus(csv_path=csv_path)
 
-# %% ../nbs/api/80_core.ipynb 26
+# %% ../nbs/api/80_core.ipynb 31
 def get_nltk_corpus_sources(source_path:str # path to location of sources for building corpora
 							 ):
 	""" (Deprecated - call via conc.corpora) Get NLTK corpora as sources for development or testing Conc functionality. """
@@ -193,7 +293,7 @@ def get_nltk_corpus_sources(source_path:str # path to location of sources for bu
 	from conc.corpora import get_nltk_corpus_sources as _get_nltk_corpus_sources
 	return _get_nltk_corpus_sources(source_path=source_path)
 
-# %% ../nbs/api/80_core.ipynb 27
+# %% ../nbs/api/80_core.ipynb 32
 def get_garden_party(source_path: str #path to location of sources for building corpora
 					):
 	""" (Deprecated - call via conc.corpora) Get corpus of The Garden Party by Katherine Mansfield for development of Conc and testing Conc functionality. """
@@ -203,7 +303,7 @@ def get_garden_party(source_path: str #path to location of sources for building
 	from conc.corpora import get_garden_party as _get_garden_party
 	return _get_garden_party(source_path=source_path)
 
-# %% ../nbs/api/80_core.ipynb 28
+# %% ../nbs/api/80_core.ipynb 33
 def get_large_dataset(source_path: str #path to location of sources for building corpora
                     ):
     """ (Deprecated - call via conc.corpora) Get 1m rows of https://huggingface.co/datasets/Eugleo/us-congressional-speeches-subset for testing. """
@@ -213,7 +313,7 @@ def get_large_dataset(source_path: str #path to location of sources for building
     from conc.corpora import get_large_dataset as _get_large_dataset
     return _get_large_dataset(source_path=source_path)
 
-# %% ../nbs/api/80_core.ipynb 29
+# %% ../nbs/api/80_core.ipynb 34
 def create_large_dataset_sizes(source_path: str, #path to location of sources for building corpora
 						sizes: list = [10000, 100000, 200000, 500000] # list of sizes for test data-sets
 						):
@@ -5,27 +5,26 @@
 # %% ../nbs/api/45_corpus.ipynb 3
 from __future__ import annotations
 import re
+import bisect
 import polars as pl
 import numpy as np
-from great_tables import GT
 import os
 import glob
-import spacy
-from spacy.attrs import ORTH, LOWER, SPACY # May extend to POS, TAG, SENT_START, LEMMA
 import string
 from fastcore.basics import patch
 import time
-from slugify import slugify
 import msgspec # tested against orjson - with validation was faster, without around the same
 import unicodedata
 import sys
+from collections import OrderedDict
 
 # %% auto 0
-__all__ = ['NOT_DOC_TOKEN', 'INDEX_HEADER_LENGTH', 'PUNCTUATION_STRINGS', 'README_TEMPLATE', 'Corpus', 'build_test_corpora']
+__all__ = ['NOT_DOC_TOKEN', 'INDEX_HEADER_LENGTH', 'TOKEN_ARRAY_FILES', 'TOKENIZER_MODES', 'README_TEMPLATE', 'FILE_READ_WORKERS',
+           'FILE_PREFETCH_SIZE', 'TOKENIZE_CACHE_SIZE', 'Corpus', 'build_test_corpora', 'PUNCTUATION_STRINGS']
 
 # %% ../nbs/api/45_corpus.ipynb 5
 from . import __version__
-from .core import logger, CorpusMetadata, PAGE_SIZE, EOF_TOKEN_STR, ERR_TOKEN_STR, REPOSITORY_URL, DOCUMENTATION_URL, CITATION_STR, PYPI_URL
+from .core import logger, CorpusMetadata, ResultsCache, RESULTS_CACHE_MAX_BYTES, PAGE_SIZE, ORTH, LOWER, SPACY, EOF_TOKEN_STR, ERR_TOKEN_STR, REPOSITORY_URL, DOCUMENTATION_URL, CITATION_STR, PYPI_URL
 from .result import Result
 from .text import Text
 
@@ -45,18 +44,35 @@ NOT_DOC_TOKEN = -1
 INDEX_HEADER_LENGTH = 100
 
 # %% ../nbs/api/45_corpus.ipynb 10
-PUNCTUATION_STRINGS = ''.join(set(list(string.punctuation) + 
-                                [chr(i) for i in range(sys.maxunicode + 1) if unicodedata.category(chr(i)).startswith("P")] + 
-                                [chr(i) for i in range(sys.maxunicode + 1) if unicodedata.category(chr(i)).startswith("Sc")]
-								))
+TOKEN_ARRAY_FILES = {'orth_index': ('tokens.orth.u32', np.uint32), 'lower_index': ('tokens.lower.u32', np.uint32), 'token2doc_index': ('tokens.doc.i32', np.int32)} # optional raw binary token arrays, memory mapped on load
 
-# %% ../nbs/api/45_corpus.ipynb 15
+# %% ../nbs/api/45_corpus.ipynb 11
+TOKENIZER_MODES = ['pipe', 'tokenizer', 'blank'] # ways to load and run spaCy for tokenization, see _init_spacy_model
+
+# %% ../nbs/api/45_corpus.ipynb 12
+_all_ = ['PUNCTUATION_STRINGS']
+_punctuation_strings = None
+
+def _get_punctuation_strings() -> str: # punctuation and currency symbol characters
+	""" Get punctuation and currency symbol characters, built on first use as checking every unicode character takes a few hundred milliseconds. """
+	global _punctuation_strings
+	if _punctuation_strings is None:
+		_punctuation_strings = ''.join(sorted(set(string.punctuation).union(c for c in map(chr, range(sys.maxunicode + 1)) if unicodedata.category(c) == 'Sc' or unicodedata.category(c).startswith('P'))))
+	return _punctuation_strings
+
+def __getattr__(name):
+	if name == 'PUNCTUATION_STRINGS': # built on first access
+		return _get_punctuation_strings()
+	raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+# %% ../nbs/api/45_corpus.ipynb 17
 class Corpus:
 	"""Represention of text corpus, with methods to build, load and save a corpus from a variety of formats and to work with the corpus data."""
 	
 	def __init__(self, 
 				name: str = '', # name of corpus
-				description: str = '' # description of corpus
+				description: str = '', # description of corpus
+				cache_max_bytes: int|None = RESULTS_CACHE_MAX_BYTES # memory budget in bytes for cached results, least recently used results are removed first when it is exceeded (None for no limit)
 				):
 		# information about corpus
 		self.name = name
@@ -73,8 +89,10 @@ class Corpus:
 		# settings
 		self.SPACY_MODEL = None
 		self.SPACY_MODEL_VERSION = None
+		self.TOKENIZER_MODE = None # how spaCy was loaded and run to tokenize the corpus, one of TOKENIZER_MODES, set on build or load
 		self.SPACY_EOF_TOKEN = None # set below as nlp.vocab[EOF_TOKEN_STR].orth in build or through load  - EOF_TOKEN_STR starts with space so eof_token can't match anything from corpus
 		self.EOF_TOKEN = None
+		self._nlp = None # spaCy model, loaded on build or load (or when first needed if the corpus is loaded with query_only)
 
 		# special token ids
 		self.punct_tokens = None
@@ -100,22 +118,31 @@ class Corpus:
 		# metadata for each document
 		self.metadata = None
 
-		self.ngram_index = {}
-		self.results_cache = {}
+		self.results_cache = ResultsCache(max_bytes = cache_max_bytes)
 
 		self.expected_files_ = ['corpus.json', 'vocab.parquet', 'tokens.parquet', 'puncts.parquet', 'spaces.parquet']
 		self.required_tables_ = ['vocab', 'tokens', 'puncts', 'spaces']
 
-# %% ../nbs/api/45_corpus.ipynb 17
+# %% ../nbs/api/45_corpus.ipynb 19
 @patch
 def _init_spacy_model(self: Corpus,
                 model: str = 'en_core_web_sm', # spacy model to use for tokenization
 				version: str|None = None, # version of spacy model expected, if mismatch will raise a warning
-				standardize_word_token_punctuation_characters: bool = False # whether to standardize apostrophes in word tokens
+				standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+				tokenizer_mode: str = 'pipe' # 'pipe' or 'tokenizer' to load the model without pipeline components, 'blank' to load a blank model with the default tokenizer for the model language
 				):
+	import spacy
+	if tokenizer_mode not in TOKENIZER_MODES:
+		raise ValueError(f'Tokenizer mode must be one of {TOKENIZER_MODES}')
 	try:
-		self._nlp = spacy.load(model)
-		self._nlp.disable_pipes(['parser', 'ner', 'lemmatizer', 'tagger', 'senter', 'tok2vec', 'attribute_ruler'])
+		if tokenizer_mode == 'blank': # the model files are not loaded, the language and version are read from the model meta
+			from spacy.util import get_model_meta, get_package_path, is_package
+			from pathlib import Path
+			meta = get_model_meta(get_package_path(model) if is_package(model) else Path(model))
+			self._nlp = spacy.blank(meta['lang'])
+			self._nlp.meta['version'] = meta['version']
+		else:
+			self._nlp = spacy.load(model, exclude = ['parser', 'ner', 'lemmatizer', 'tagger', 'senter', 'tok2vec', 'attribute_ruler']) # only the tokenizer is used, so pipeline components are not loaded
 		self._nlp.max_length = 10_000_000 # set max length to a large number to avoid issues with long documents
 	except OSError as e:
 		logger.error(f'Error loading model {model}. If you are working with texts in English, you need to run python -m spacy download en_core_web_sm to download the model. See https://spacy.io/models for available models for other languages.')
@@ -129,7 +156,7 @@ def _init_spacy_model(self: Corpus,
 		rules = self._nlp.tokenizer.rules.copy()
 		self._standardize_replacements = {}
 		for key in list(rules.keys()):
-			if key.strip(PUNCTUATION_STRINGS) != '' and "’" in key and key.replace("’", "'") in rules: # only standardize word tokens
+			if key.strip(_get_punctuation_strings()) != '' and "’" in key and key.replace("’", "'") in rules: # only standardize word tokens
 				for token in rules[key]:
 					for k, v in token.items():
 						if "’" in v:
@@ -141,16 +168,16 @@ def _init_spacy_model(self: Corpus,
 		logger.debug(f"Standardized word token rules as ids: {self._standardize_replacements_ids}")
 
 
-# %% ../nbs/api/45_corpus.ipynb 18
+# %% ../nbs/api/45_corpus.ipynb 20
 @patch
 def _process_punct_positions(self: Corpus):
 	""" Process punctuation positions in token data and populates punct_tokens and punct_positions. """
 
-	self.punct_tokens = np.array(list({k: v for k, v in self.vocab.items() if v.strip(PUNCTUATION_STRINGS) == ''}.keys()))
+	self.punct_tokens = np.array(list({k: v for k, v in self.vocab.items() if v.strip(_get_punctuation_strings()) == ''}.keys()))
 	punct_mask = np.isin(self.lower_index, self.punct_tokens) # faster to retrieve with isin than where
 	self.punct_positions = np.nonzero(punct_mask)[0] # storing this as smaller
 
-# %% ../nbs/api/45_corpus.ipynb 19
+# %% ../nbs/api/45_corpus.ipynb 21
 @patch
 def _process_space_positions(self: Corpus):
 	""" Process whitespace positions in token data and populates space_tokens and space_positions. """
@@ -160,13 +187,14 @@ def _process_space_positions(self: Corpus):
 	self.space_positions = np.nonzero(space_mask)[0] # storing this as smaller
 
 
-# %% ../nbs/api/45_corpus.ipynb 24
+# %% ../nbs/api/45_corpus.ipynb 27
 @patch
 def _init_build_process(self:Corpus,
 						save_path: str, # path to save corpus data 
 						):
 	""" Create slug, corpus_path, and create directory if needed. """
 
+	from slugify import slugify
 	self.conc_version = __version__
 	self.slug = slugify(self.name, stopwords=['corpus'])
 	self.corpus_path = os.path.join(save_path, f'{self.slug}.corpus')
@@ -174,7 +202,33 @@ def _init_build_process(self:Corpus,
 	if not os.path.isdir(self.corpus_path):
 		os.makedirs(self.corpus_path)
 
-# %% ../nbs/api/45_corpus.ipynb 25
+	if os.path.isdir(os.path.join(self.corpus_path, 'ngrams')): # saved ngram frequency tables of a previous build
+		import shutil
+		shutil.rmtree(os.path.join(self.corpus_path, 'ngrams'))
+
+	for part_file in glob.glob(os.path.join(self.corpus_path, '*_append_*.parquet')): # table parts appended to a previous build
+		os.remove(part_file)
+
+# %% ../nbs/api/45_corpus.ipynb 28
+def _get_table_files(corpus_path: str, # path to the corpus directory
+					 table: str # name of the table, e.g. tokens, spaces or positions
+					 ) -> list[str]: # table file followed by the parts added by appends, in the order they were appended
+	""" Get the files for a corpus table. Documents appended to a corpus are saved as parts (e.g. tokens_append_1.parquet) rather than rewriting the table. """
+	parts = glob.glob(os.path.join(corpus_path, f'{table}_append_*.parquet'))
+	return [os.path.join(corpus_path, f'{table}.parquet')] + sorted(parts, key = lambda part: int(part.rsplit('_', 1)[1].split('.')[0]))
+
+def _scan_table(corpus_path: str, # path to the corpus directory
+				table: str # name of the table, e.g. tokens, spaces or metadata
+				) -> pl.LazyFrame: # the table including parts added by appends
+	""" Scan a corpus table and any parts added by appends. Each tokens file ends with an index header, which is replaced by the tokens of the next part. """
+	files = _get_table_files(corpus_path, table)
+	if table == 'tokens':
+		frames = [pl.scan_parquet(file).head(pl.scan_parquet(file).select(pl.len()).collect().item() - INDEX_HEADER_LENGTH) for file in files[:-1]] + [pl.scan_parquet(files[-1])]
+	else:
+		frames = [pl.scan_parquet(file) for file in files]
+	return frames[0] if len(frames) == 1 else pl.concat(frames, how = 'vertical_relaxed')
+
+# %% ../nbs/api/45_corpus.ipynb 29
 @patch
 def _update_build_process(self: Corpus, 
                            orth_index: list[np.ndarray], # orthographic token ids
@@ -185,94 +239,254 @@ def _update_build_process(self: Corpus,
                            ) -> int: # next store pos
     """ Write in-progress build data to Parquet disk store. """
 
-    pl.DataFrame([np.concatenate(orth_index), np.concatenate(lower_index), np.concatenate(token2doc_index), np.concatenate(has_spaces)], schema = [('orth_index', pl.UInt64), ('lower_index', pl.UInt64), ('token2doc_index', pl.Int32), ('has_spaces', pl.Boolean)] ).write_parquet(f'{self.corpus_path}/build_{store_pos}.parquet')
+    build_file = f'{self.corpus_path}/build_{store_pos}.parquet'
+    pl.DataFrame([np.concatenate(orth_index), np.concatenate(lower_index), np.concatenate(token2doc_index), np.concatenate(has_spaces)], schema = [('orth_index', pl.UInt64), ('lower_index', pl.UInt64), ('token2doc_index', pl.Int32), ('has_spaces', pl.Boolean)] ).write_parquet(f'{build_file}.tmp')
+    os.replace(f'{build_file}.tmp', build_file) # an interrupted write does not leave an incomplete build file
     return store_pos + 1
 
-# %% ../nbs/api/45_corpus.ipynb 27
+# %% ../nbs/api/45_corpus.ipynb 31
+@patch
+def _read_build_file(self: Corpus,
+					 build_file: str, # path to in-progress build file
+					 standardize_word_token_punctuation_characters: bool = False # whether to standardize apostrophes in word tokens
+					 ) -> pl.DataFrame: # in-progress build data
+	""" Read in-progress build data from disk. """
+
+	build_df = pl.read_parquet(build_file)
+	if standardize_word_token_punctuation_characters:
+		# tokenizsation still seems to let some word tokens through, even with revised rules, so this is a final check to standardize word tokens
+		build_df = build_df.with_columns(pl.col('orth_index').replace(self._standardize_replacements_ids), pl.col('lower_index').replace(self._standardize_replacements_ids)) # replace orth and lower with standardized versions
+	return build_df
+
+# %% ../nbs/api/45_corpus.ipynb 32
+@patch
+def _build_positional_index(self: Corpus,
+							token_counts: dict[str, np.ndarray], # counts of each token id (including 0) for orth_index and lower_index
+							max_partition_size: int = 20_000_000, # maximum number of positions to sort in memory at once (a single token id with more positions is sorted in one partition)
+							tokens_df: pl.LazyFrame|None = None, # tokens to index, defaults to the corpus tokens
+							position_offset: int = 0, # position in the corpus of the first token in tokens_df
+							table_suffix: str = '' # suffix of the positions and offsets files, used to save the index of appended tokens as a part
+							):
+	""" Build the positional index for orth_index and lower_index and save to disk. """
+
+	if tokens_df is None:
+		tokens_df = _scan_table(self.corpus_path, 'tokens')
+	part_files = {}
+	offsets = {}
+	for index in ['orth_index', 'lower_index']:
+		offsets[index] = pl.Series(index, np.concatenate([[0], np.cumsum(token_counts[index])]), dtype = pl.UInt32)
+		# partition by ranges of token ids so the number of positions sorted at once is bounded
+		partitions = [0]
+		partition_size = 0
+		for token_id, count in enumerate(token_counts[index]):
+			if partition_size > 0 and partition_size + count > max_partition_size:
+				partitions.append(token_id)
+				partition_size = 0
+			partition_size += count
+		partitions.append(len(token_counts[index]))
+		part_files[index] = []
+		for part, (start_id, end_id) in enumerate(zip(partitions[:-1], partitions[1:])):
+			part_df = tokens_df.select(pl.col(index)).with_row_index('position', offset = position_offset).filter((pl.col(index) >= start_id) & (pl.col(index) < end_id)).collect(engine='streaming')
+			part_files[index].append(f'{self.corpus_path}/build_positions_{index}_{part}.parquet')
+			part_df.sort([index, 'position']).select(pl.col('position').alias(index)).write_parquet(part_files[index][-1])
+			del part_df
+
+	pl.concat([pl.scan_parquet(part_files['orth_index']), pl.scan_parquet(part_files['lower_index'])], how = 'horizontal').sink_parquet(f'{self.corpus_path}/positions{table_suffix}.parquet', maintain_order = True)
+	pl.DataFrame(offsets).write_parquet(f'{self.corpus_path}/offsets{table_suffix}.parquet')
+	for part_file in part_files['orth_index'] + part_files['lower_index']:
+		os.remove(part_file)
+
+# %% ../nbs/api/45_corpus.ipynb 33
+@patch
+def _get_build_files(self: Corpus) -> list[str]: # paths to in-progress build files, in build order
+	""" Get in-progress build files from the corpus directory. """
+
+	build_files = [f for f in glob.glob(f'{self.corpus_path}/build_*.parquet') if re.search(r'build_\d+\.parquet$', f)]
+	return sorted(build_files, key = lambda f: int(re.search(r'build_(\d+)\.parquet$', f).group(1))) # numeric order, as glob order would place build_10 before build_2
+
+# %% ../nbs/api/45_corpus.ipynb 35
+def _get_source_fingerprint(source_path: str # path to a source file or directory
+							) -> dict: # path, size and modification time of the source
+	""" Get the size and modification time of a source file, or of the files in a source directory, to check a resumed build uses the same source. """
+	if os.path.isdir(source_path):
+		import hashlib
+		entries = sorted((entry.name, entry.stat().st_size, entry.stat().st_mtime_ns) for entry in os.scandir(source_path) if entry.is_file())
+		return {'path': os.path.abspath(source_path), 'files': len(entries), 'hash': hashlib.sha1(repr(entries).encode('utf8')).hexdigest()}
+	stat = os.stat(source_path)
+	return {'path': os.path.abspath(source_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+# %% ../nbs/api/45_corpus.ipynb 36
+@patch
+def _remove_build_files(self: Corpus):
+	""" Remove in-progress build files, their token strings and the build manifest from the corpus directory. """
+	for build_file in self._get_build_files() + glob.glob(f'{self.corpus_path}/build_strings_*.parquet') + glob.glob(f'{self.corpus_path}/build_manifest.json'):
+		os.remove(build_file)
+
+# %% ../nbs/api/45_corpus.ipynb 37
+@patch
+def _checkpoint_build(self: Corpus,
+					  orth_index: list[np.ndarray], # orthographic token ids in the build file that was saved
+					  lower_index: list[np.ndarray], # lower case token ids in the build file that was saved
+					  store_pos: int, # next store pos
+					  docs_processed: int, # number of documents in the saved build files
+					  build_options: dict, # source and options of the build
+					  finished: bool = False # whether all documents have been saved to build files
+					  ):
+	""" Save the token strings of the last build file and update the build manifest, so an interrupted build can be resumed. """
+	# build files store spaCy ids, the strings are saved so a resumed build can look them up in a new spaCy vocab
+	source_ids = np.unique(np.concatenate(orth_index + lower_index))
+	pl.DataFrame({'token': [self._nlp.vocab.strings[int(source_id)] for source_id in source_ids]}, schema = [('token', pl.String)]).write_parquet(f'{self.corpus_path}/build_strings_{store_pos - 1}.parquet')
+
+	manifest = {'options': build_options, 'store_pos': store_pos, 'docs_processed': docs_processed, 'build_files': [os.path.basename(f) for f in self._get_build_files()], 'finished': finished}
+	with open(f'{self.corpus_path}/build_manifest.json.tmp', 'wb') as f:
+		f.write(msgspec.json.encode(manifest))
+	os.replace(f'{self.corpus_path}/build_manifest.json.tmp', f'{self.corpus_path}/build_manifest.json')
+
+# %% ../nbs/api/45_corpus.ipynb 38
+@patch
+def _read_build_manifest(self: Corpus) -> dict|None: # build manifest, None if there is no resumable build
+	""" Read the build manifest of an interrupted build, checking the build files it records are in the corpus directory. """
+	if not os.path.isfile(f'{self.corpus_path}/build_manifest.json'):
+		return None
+	with open(f'{self.corpus_path}/build_manifest.json', 'rb') as f:
+		manifest = msgspec.json.decode(f.read())
+	if [os.path.basename(f) for f in self._get_build_files()][:len(manifest['build_files'])] != manifest['build_files']:
+		logger.warning('Build files recorded in the build manifest are missing, starting the build from the beginning')
+		return None
+	for build_file in self._get_build_files()[len(manifest['build_files']):]: # saved after the manifest was last updated
+		os.remove(build_file)
+	return manifest
+
+# %% ../nbs/api/45_corpus.ipynb 39
+@patch
+def _load_build_strings(self: Corpus):
+	""" Add the token strings of saved build files to the spaCy vocab, so ids from an interrupted build can be looked up. """
+	for strings_file in glob.glob(f'{self.corpus_path}/build_strings_*.parquet'):
+		for token in pl.read_parquet(strings_file)['token']:
+			self._nlp.vocab.strings.add(token)
+
+# %% ../nbs/api/45_corpus.ipynb 40
+@patch
+def _process_build_file(self: Corpus,
+						build_file: str, # path to in-progress build file
+						part: int, # part number used to name the output files
+						position: int, # position in tokens.parquet of the first token in the build file
+						source_ids: np.ndarray, # sorted spaCy token ids
+						token_ids: np.ndarray, # corpus token ids corresponding to source_ids
+						is_space: np.ndarray, # lookup by token id of space tokens
+						is_punct: np.ndarray, # lookup by token id of punctuation tokens
+						token_counts: dict[str, np.ndarray], # counts of each token id for orth_index and lower_index, updated in place
+						document_counts: dict[str, np.ndarray], # counts of documents containing each token id for orth_index and lower_index, updated in place
+						standardize_word_token_punctuation_characters: bool = False # whether to standardize apostrophes in word tokens
+						) -> tuple[int, int]: # position after the last token of the build file, highest document id in the build file
+	""" Remap a build file to corpus token ids, remove spaces and write tokens, space positions and punct positions to part files. """
+
+	build_df = self._read_build_file(build_file, standardize_word_token_punctuation_characters)
+	build_df = build_df.with_columns(pl.Series('orth_index', token_ids[np.searchsorted(source_ids, build_df['orth_index'].to_numpy())], dtype = pl.UInt32), 
+									 pl.Series('lower_index', token_ids[np.searchsorted(source_ids, build_df['lower_index'].to_numpy())], dtype = pl.UInt32))
+
+	not_space_mask = ~is_space[build_df['lower_index'].to_numpy()]
+	# space tokens are positioned before the token that follows them once spaces are removed
+	spaces_df = build_df.with_columns(pl.Series('position', position + np.cumsum(not_space_mask) - not_space_mask, dtype = pl.UInt32)).filter(~not_space_mask).select(['position', 'orth_index', 'lower_index', 'token2doc_index', 'has_spaces'])
+	build_df = build_df.filter(not_space_mask)
+	puncts_df = pl.DataFrame([pl.Series('position', np.nonzero(is_punct[build_df['lower_index'].to_numpy()])[0] + position, dtype = pl.UInt32)])
+
+	for table, table_df in [('tokens', build_df), ('spaces', spaces_df), ('puncts', puncts_df)]:
+		table_df.write_parquet(f'{self.corpus_path}/build_{table}_{part}.parquet')
+
+	for index in token_counts:
+		token_counts[index] += np.bincount(build_df[index].to_numpy(), minlength = len(token_counts[index]))
+	# documents are not split across build files, so counts of documents per build file can be summed
+	for index in document_counts:
+		document_counts[index] += np.bincount(build_df.select(index, 'token2doc_index').unique()[index].to_numpy(), minlength = len(document_counts[index]))
+
+	return position + len(build_df), int(build_df['token2doc_index'].max())
+
+# %% ../nbs/api/45_corpus.ipynb 41
+@patch
+def _get_document_frequency_columns(self: Corpus,
+									document_counts: dict[str, np.ndarray] # counts of documents containing each token id for orth_index and lower_index
+									) -> list[pl.Series]: # document_frequency_lower and document_frequency_orth columns, ordered by token id
+	""" Get vocab columns for document frequency, end of file tokens and tokens that do not occur in an index have null document frequency. """
+
+	columns = []
+	for index, column in [('lower_index', 'document_frequency_lower'), ('orth_index', 'document_frequency_orth')]:
+		document_frequency = document_counts[index][1:].copy()
+		document_frequency[self.EOF_TOKEN - 1] = 0
+		columns.append(pl.Series(column, document_frequency, dtype = pl.UInt32))
+	return [pl.when(series > 0).then(series).alias(series.name) for series in columns]
+
+# %% ../nbs/api/45_corpus.ipynb 42
 @patch
 def _complete_build_process(self: Corpus, 
 							build_process_cleanup: bool = True,  # Remove the build files after build is complete, retained for development and testing purposes
 							standardize_word_token_punctuation_characters: bool = False # whether to standardize apostrophes in word tokens
 							):
-	""" Complete the disk-based build to create representation of the corpus. """
+	""" Complete the disk-based build to create representation of the corpus. Build files are processed one at a time, so memory usage depends on the build process batch size rather than the size of the corpus. """
 
 	logger.memory_usage('init', init=True)
-	tokens_df = pl.scan_parquet(f'{self.corpus_path}/build_*.parquet')
+	build_files = self._get_build_files()
 
-	if standardize_word_token_punctuation_characters:
-		# tokenizsation still seems to let some word tokens through, even with revised rules, so this is a final check to standardize word tokens
-		tokens_df = tokens_df.with_columns(pl.col('orth_index').replace(self._standardize_replacements_ids), pl.col('lower_index').replace(self._standardize_replacements_ids)) # replace orth and lower with standardized versions
-		
 	# get unique vocab ids (combining orth and lower) and create new index
-	vocab_df = pl.concat([tokens_df.select(pl.col('orth_index').unique().alias('index')), tokens_df.select(pl.col('lower_index').unique().alias('index'))])
-	#vocab_df  = combined_df.select(pl.col('index').unique().sort().alias('source_id')).with_row_index('token_id', offset=1) #.collect(engine='streaming')
-	vocab_df = vocab_df.select(pl.col('index').unique().sort().alias('source_id')).with_row_index('token_id', offset=1) 
+	source_ids = np.array([], dtype=np.uint64)
+	for build_file in build_files:
+		build_df = self._read_build_file(build_file, standardize_word_token_punctuation_characters)
+		source_ids = np.union1d(source_ids, np.concatenate([build_df['orth_index'].unique().to_numpy(), build_df['lower_index'].unique().to_numpy()]))
+	vocab_df = pl.DataFrame({'source_id': source_ids}).with_row_index('token_id', offset=1)
+	vocab_size = len(source_ids)
 	logger.memory_usage('collected vocab')
 
-	# combined_df = (combined_df.with_columns(pl.col('index').replace(vocab_df.select(pl.col('source_id'))['source_id'], vocab_df.select(pl.col('token_id'))['token_id']).cast(pl.UInt32)))
-	# combined_df = combined_df.with_columns(pl.col('index').cast(pl.UInt32))
-
-	tokens_df = (
-		tokens_df
-		.join(vocab_df, left_on="orth_index", right_on="source_id", how="left", maintain_order="left")
-		.drop("orth_index")
-		.rename({"token_id": "orth_index"})
-		.with_columns(pl.col("orth_index").cast(pl.UInt32).alias("orth_index"))
-	)
-
-	tokens_df = (
-		tokens_df
-		.join(vocab_df, left_on="lower_index", right_on="source_id", how="left", maintain_order="left")
-		.drop("lower_index")
-		.rename({"token_id": "lower_index"})
-		.with_columns(pl.col("lower_index").cast(pl.UInt32).alias("lower_index"))
-	) # should have aligned data for token2doc_index and has_spaces
-
-	# this is currently the most intensive operation in terms of memory usage - this needs attention - can't use sink_parquet currently or collect(engine='streaming') as it doesn't maintain order (including changing order between two columns)
-	tokens_df.select([pl.col('orth_index'), pl.col('lower_index'), pl.col('token2doc_index'), pl.col('has_spaces')]).collect().write_parquet(f'{self.corpus_path}/tokens.parquet') # if using streaming or sink will need to verify ordering - check for maintain_order parameters
-	logger.memory_usage('wrote pending tokens to disk')
-	tokens_df = pl.scan_parquet(f'{self.corpus_path}/tokens.parquet') # re-read as lazy frame
-
-	# could batch this to reduce memory usage - but leaving for now
-	vocab_query = vocab_df.select(pl.col('source_id')).collect().to_numpy().flatten() # get vocab ids as numpy array for faster processing
-	vocab = {k:self._nlp.vocab[k].text for k in vocab_query} # get vocab strings from spacy vocab
+	vocab = {k:self._nlp.vocab[k].text for k in source_ids} # get vocab strings from spacy vocab
 	token_strs = list(vocab.values())
 	vocab_df = vocab_df.with_columns(pl.Series(token_strs).alias('token'))
-	del vocab_query
+	del vocab
 	logger.memory_usage('added vocab strings')
 
-	self.EOF_TOKEN = vocab_df.filter(pl.col('source_id') == self.SPACY_EOF_TOKEN).select(pl.col('token_id')).collect().item() # casting to int for storage
+	self.EOF_TOKEN = vocab_df.filter(pl.col('source_id') == self.SPACY_EOF_TOKEN).select(pl.col('token_id')).item()
 	
-	self.punct_tokens = [(k + 1) for k, v in enumerate(token_strs) if v.strip(PUNCTUATION_STRINGS) == '']
+	self.punct_tokens = [(k + 1) for k, v in enumerate(token_strs) if v.strip(_get_punctuation_strings()) == '']
 	logger.memory_usage(f'got punct tokens')
 	self.space_tokens = [(k + 1) for k, v in enumerate(token_strs) if v.strip() == '']
 	logger.memory_usage(f'got space tokens')
 	del token_strs
 
-	# new spaces handling
-	spaces_df = tokens_df.with_row_index('position').filter(pl.col('lower_index').is_in(self.space_tokens))
-	spaces_df = spaces_df.with_row_index('adjust_by').with_columns((pl.col('position') - pl.col('adjust_by')).alias('corrected'))
-	spaces_df = spaces_df.with_columns(pl.col('corrected').alias('position')).drop('adjust_by').drop('corrected')
-	spaces_df.collect().write_parquet(f'{self.corpus_path}/spaces.parquet') 
-	logger.memory_usage('saved space positions')
-
-	# remove spaces from tokens_df
-	tokens_df = tokens_df.filter(~pl.col('lower_index').is_in(self.space_tokens))
-	tokens_df.collect().write_parquet(f'{self.corpus_path}/tokens.parquet') # if using streaming or sink will need to verify ordering - check for maintain_order parameters
-	logger.memory_usage('wrote final tokens to disk')
-	tokens_df = pl.scan_parquet(f'{self.corpus_path}/tokens.parquet') # re-read as lazy frame
-
-	# Create LazyFrames for punct_positions
-	tokens_df.select(pl.col('lower_index')).with_row_index('position').filter(pl.col('lower_index').is_in(self.punct_tokens)).select('position').sink_parquet(f'{self.corpus_path}/puncts.parquet', maintain_order = True) #.collect(engine='streaming').to_numpy().flatten()
-	logger.memory_usage('saved punct positions')
-
-	# get counts from tokens_df
-	frequency_lower = tokens_df.filter(pl.col('lower_index') != self.EOF_TOKEN).select(pl.col('lower_index')).group_by('lower_index').agg(pl.count('lower_index').alias('frequency_lower')) #.collect(engine='streaming')
-	frequency_orth = tokens_df.filter(pl.col('orth_index') != self.EOF_TOKEN).select(pl.col('orth_index')).group_by('orth_index').agg(pl.count('orth_index').alias('frequency_orth')) #.collect(engine='streaming')
-	vocab_df = vocab_df.join(frequency_lower, left_on = 'token_id', right_on = 'lower_index', how='left', maintain_order="left").join(frequency_orth, left_on = 'token_id', right_on = 'orth_index', how='left', maintain_order="left")
+	is_punct = np.zeros(vocab_size + 1, dtype=np.bool)
+	is_punct[self.punct_tokens] = True
+	is_space = np.zeros(vocab_size + 1, dtype=np.bool)
+	is_space[self.space_tokens] = True
+
+	# remap each build file to token ids, remove spaces and get space and punct positions (positions exclude spaces)
+	token_ids = np.arange(1, vocab_size + 1, dtype=np.uint32)
+	token_counts = {'orth_index': np.zeros(vocab_size + 1, dtype=np.int64), 'lower_index': np.zeros(vocab_size + 1, dtype=np.int64)}
+	document_counts = {'orth_index': np.zeros(vocab_size + 1, dtype=np.int64), 'lower_index': np.zeros(vocab_size + 1, dtype=np.int64)}
+	position = 0
+	self.document_count = 0
+	for part, build_file in enumerate(build_files):
+		position, document_count = self._process_build_file(build_file, part, position, source_ids, token_ids, is_space, is_punct, token_counts, document_counts, standardize_word_token_punctuation_characters)
+		self.document_count = max(self.document_count, document_count)
+		logger.memory_usage(f'processed {os.path.basename(build_file)}')
+
+	# combine parts in order
+	for table in ['tokens', 'spaces', 'puncts']:
+		part_files = [f'{self.corpus_path}/build_{table}_{part}.parquet' for part in range(len(build_files))]
+		pl.scan_parquet(part_files).sink_parquet(f'{self.corpus_path}/{table}.parquet', maintain_order = True)
+		for part_file in part_files:
+			os.remove(part_file)
+	logger.memory_usage('wrote tokens, spaces and punct positions to disk')
+
+	self._build_positional_index(token_counts)
+	logger.memory_usage('saved positional index')
+
+	# frequencies exclude end of file tokens, tokens that do not occur in an index have null frequency
+	frequency_lower = token_counts['lower_index'][1:].copy()
+	frequency_orth = token_counts['orth_index'][1:].copy()
+	frequency_lower[self.EOF_TOKEN - 1] = 0
+	frequency_orth[self.EOF_TOKEN - 1] = 0
+	vocab_df = vocab_df.with_columns(pl.Series('frequency_lower', frequency_lower, dtype = pl.UInt32), pl.Series('frequency_orth', frequency_orth, dtype = pl.UInt32))
+	vocab_df = vocab_df.with_columns(pl.when(pl.col('frequency_lower') > 0).then(pl.col('frequency_lower')).alias('frequency_lower'), pl.when(pl.col('frequency_orth') > 0).then(pl.col('frequency_orth')).alias('frequency_orth'))
 	logger.memory_usage('added frequency to vocab')
 
-	self.unique_tokens = frequency_lower.select(pl.len()).collect(engine='streaming').item() # was len(frequency_lower) before used polars streaming
+	self.unique_tokens = int(np.count_nonzero(frequency_lower))
 	logger.memory_usage(f'got unique tokens {self.unique_tokens}')
 
 	del frequency_lower
@@ -281,28 +495,27 @@ def _complete_build_process(self: Corpus,
 	# add column for is_punct and is_space based on punct_tokens and space_tokens and token_id
 	vocab_df = vocab_df.with_columns((pl.col("token_id").is_in(self.punct_tokens)).alias("is_punct"))
 	vocab_df = vocab_df.with_columns((pl.col("token_id").is_in(self.space_tokens)).alias("is_space"))
+	vocab_df = vocab_df.with_columns(self._get_document_frequency_columns(document_counts))
 	vocab_df = vocab_df.sort(by = pl.col('token').str.to_lowercase(), descending = False).with_row_index('tokens_sort_order', offset=1) # leave with no zero for handling of error tokens
 	vocab_df = vocab_df.drop('source_id').sort(by = pl.col('frequency_orth'), descending = True, nulls_last = True).with_row_index(name='rank', offset=1)
-	logger.memory_usage('added is_punct is_space to vocab')
+	logger.memory_usage('added is_punct is_space and document frequency to vocab')
 
-	vocab_df.collect().write_parquet(f'{self.corpus_path}/vocab.parquet') #, maintain_order = True 
+	vocab_df.write_parquet(f'{self.corpus_path}/vocab.parquet')
 	del vocab_df
 	logger.memory_usage('wrote vocab to disk')
 
-	#self.document_count = tokens_df.select(pl.col('token2doc_index').filter(pl.col('token2doc_index') != NOT_DOC_TOKEN).unique().count()).collect(engine='streaming').item()
-	self.document_count = tokens_df.select(pl.col('token2doc_index')).max().collect().item()
+	self.document_count = int(self.document_count)
 	logger.memory_usage(f'got doc count {self.document_count}')
-	# reading now excludes spaces
-	input_length = tokens_df.select(pl.len()).collect(engine='streaming').item() # tested vs count - len seems to have slight memory overhead, but more correct (i.e. count only counts non-null)
+	input_length = position # excludes spaces
 	logger.memory_usage(f'got input length {input_length} (with eof headers)')
 
 	# adjusting token count for text breaks and headers at start and end of index
 	self.token_count = input_length - self.document_count - INDEX_HEADER_LENGTH - INDEX_HEADER_LENGTH 
 	logger.memory_usage(f'got token count {self.token_count}')
 
-	self.punct_token_count = pl.scan_parquet(f'{self.corpus_path}/puncts.parquet').select(pl.len()).collect(engine='streaming').item() # may be more efficient to do this prior to disk write
+	self.punct_token_count = int(token_counts['lower_index'][self.punct_tokens].sum())
 	logger.memory_usage(f'got punct token count ({self.punct_token_count})')
-	self.space_token_count = pl.scan_parquet(f'{self.corpus_path}/spaces.parquet').select(pl.len()).collect(engine='streaming').item() # may be more efficient to do this prior to disk write
+	self.space_token_count = _scan_table(self.corpus_path, 'spaces').select(pl.len()).collect(engine='streaming').item()
 	logger.memory_usage(f'got space token count ({self.space_token_count})')
 	self.word_token_count = self.token_count - self.punct_token_count
 	self.unique_word_tokens = self.unique_tokens - len(self.punct_tokens)
@@ -310,15 +523,31 @@ def _complete_build_process(self: Corpus,
 	self.date_created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
 
 	if build_process_cleanup:
-		for f in glob.glob(f'{self.corpus_path}/build_*.parquet'):
-			os.remove(f)
+		self._remove_build_files()
 		logger.memory_usage('removed build files')
 	
 	logger.memory_usage('done')
 
 
 
-# %% ../nbs/api/45_corpus.ipynb 28
+# %% ../nbs/api/45_corpus.ipynb 43
+@patch
+def save_token_arrays(self: Corpus,
+					  batch_size: int = 10_000_000 # number of tokens read from tokens.parquet and written at a time
+					  ):
+	""" Save token data as raw binary arrays (see TOKEN_ARRAY_FILES) alongside tokens.parquet. These are memory mapped when token data is accessed, so processes working with the same corpus share the operating system's page cache rather than loading their own copies. """
+
+	start_time = time.time()
+	tokens_df = _scan_table(self.corpus_path, 'tokens')
+	input_length = tokens_df.select(pl.len()).collect().item()
+	for index, (file, dtype) in TOKEN_ARRAY_FILES.items():
+		with open(f'{self.corpus_path}/{file}', 'wb') as f: # written in batches so the whole column is not held in memory
+			for offset in range(0, input_length, batch_size):
+				tokens_df.select(pl.col(index)).slice(offset, batch_size).collect()[index].to_numpy().astype(dtype, copy = False).tofile(f)
+		logger.memory_usage(f'saved {file}')
+	logger.info(f'Saved token arrays time: {(time.time() - start_time):.3f} seconds')
+
+# %% ../nbs/api/45_corpus.ipynb 44
 @patch
 def _create_indices(self: Corpus, 
 				   orth_index: list[np.ndarray], # list of np arrays of orth token ids 
@@ -357,7 +586,7 @@ def _create_indices(self: Corpus,
 	del self.frequency_lookup[self.EOF_TOKEN]
 	del unique_values
 
-# %% ../nbs/api/45_corpus.ipynb 29
+# %% ../nbs/api/45_corpus.ipynb 45
 @patch
 def _init_corpus_dataframes(self: Corpus):
 	""" Initialize dataframes after build or load """
@@ -367,12 +596,12 @@ def _init_corpus_dataframes(self: Corpus):
 			raise FileNotFoundError(f"Expected file '{file}' not found in corpus path '{self.corpus_path}'")
 
 	for file in self.required_tables_:
-		self.__setattr__(file, pl.scan_parquet(f'{self.corpus_path}/{file}.parquet'))
+		self.__setattr__(file, _scan_table(self.corpus_path, file))
 
 	if os.path.isfile(f'{self.corpus_path}/metadata.parquet'):
-		self.metadata = pl.scan_parquet(f'{self.corpus_path}/metadata.parquet')
+		self.metadata = _scan_table(self.corpus_path, 'metadata')
 
-# %% ../nbs/api/45_corpus.ipynb 30
+# %% ../nbs/api/45_corpus.ipynb 46
 README_TEMPLATE = """# {name}
 
 ## About
@@ -404,7 +633,7 @@ data directly.
 
 """
 
-# %% ../nbs/api/45_corpus.ipynb 31
+# %% ../nbs/api/45_corpus.ipynb 47
 @patch
 def save_corpus_metadata(self: Corpus, 
 						 template: str = README_TEMPLATE, # template for the README file
@@ -412,7 +641,7 @@ def save_corpus_metadata(self: Corpus,
 	""" Save corpus metadata. """
 	
 	start_time = time.time()
-	json_bytes = msgspec.json.encode(CorpusMetadata(**{k: getattr(self, k) for k in ['name', 'description', 'slug', 'conc_version', 'document_count', 'token_count', 'word_token_count', 'punct_token_count', 'space_token_count', 'unique_tokens', 'unique_word_tokens', 'date_created', 'EOF_TOKEN', 'SPACY_EOF_TOKEN', 'SPACY_MODEL', 'SPACY_MODEL_VERSION', 'punct_tokens', 'space_tokens']}))
+	json_bytes = msgspec.json.encode(CorpusMetadata(**{k: getattr(self, k) for k in ['name', 'description', 'slug', 'conc_version', 'document_count', 'token_count', 'word_token_count', 'punct_token_count', 'space_token_count', 'unique_tokens', 'unique_word_tokens', 'date_created', 'EOF_TOKEN', 'SPACY_EOF_TOKEN', 'SPACY_MODEL', 'SPACY_MODEL_VERSION', 'punct_tokens', 'space_tokens', 'TOKENIZER_MODE']}))
 
 	with open(f'{self.corpus_path}/corpus.json', 'wb') as f:
 		f.write(json_bytes)
@@ -438,7 +667,71 @@ def save_corpus_metadata(self: Corpus,
 		
 	logger.info(f'Saved corpus metadata time: {(time.time() - start_time):.3f} seconds')
 
-# %% ../nbs/api/45_corpus.ipynb 32
+# %% ../nbs/api/45_corpus.ipynb 48
+def _init_tokenizer_process(model: str, # spacy model to use for tokenization
+							standardize_word_token_punctuation_characters: bool, # whether to standardize apostrophes in word tokens
+							tokenizer_mode: str = 'pipe' # how the spaCy model is loaded and run, one of TOKENIZER_MODES
+							):
+	""" Load the spaCy model in a tokenizer worker process. """
+	global _tokenizer_process_corpus
+	_tokenizer_process_corpus = Corpus()
+	_tokenizer_process_corpus._init_spacy_model(model, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, tokenizer_mode = tokenizer_mode)
+
+# %% ../nbs/api/45_corpus.ipynb 49
+def _tokenize_in_process(texts: list[str], # batch of texts to tokenize
+						 spacy_batch_size: int, # batch size for spacy tokenizer
+						 tokenizer_mode: str = 'pipe' # how the spaCy model is loaded and run, one of TOKENIZER_MODES
+						 ) -> tuple[list[tuple[np.ndarray, np.ndarray, np.ndarray]], dict[int, str]]: # token arrays for each text, strings for token ids
+	""" Tokenize a batch of texts in a tokenizer worker process. """
+	nlp = _tokenizer_process_corpus._nlp
+	docs = []
+	for doc in (nlp.tokenizer if tokenizer_mode == 'tokenizer' else nlp).pipe(texts, batch_size = spacy_batch_size):
+		docs.append((doc.to_array(ORTH), doc.to_array(LOWER), doc.to_array(SPACY)))
+	# token ids are spaCy hashes, which are the same across processes, but strings need to be returned to add to the main process vocab
+	token_ids = np.unique(np.concatenate([np.concatenate([orth, lower]) for orth, lower, _ in docs] + [np.array([], dtype=np.uint64)]))
+	strings = {int(token_id): nlp.vocab.strings[token_id] for token_id in token_ids}
+	return docs, strings
+
+# %% ../nbs/api/45_corpus.ipynb 50
+@patch
+def _tokenize_texts(self: Corpus,
+					iterator: iter, # iterator of texts
+					spacy_batch_size: int = 500, # batch size for spacy tokenizer
+					n_process: int = 1, # number of processes to use for tokenization, -1 to use all CPUs
+					standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+					tokenizer_mode: str = 'pipe' # how the spaCy model is loaded and run, one of TOKENIZER_MODES
+					) -> iter: # iterator of orth, lower and has_spaces arrays for each text, in the order of the texts
+	""" Tokenize texts, optionally with multiple worker processes. """
+
+	if n_process == -1:
+		n_process = os.cpu_count()
+
+	if n_process <= 1:
+		for doc in (self._nlp.tokenizer if tokenizer_mode == 'tokenizer' else self._nlp).pipe(iterator, batch_size = spacy_batch_size): # see the build benchmark in the performance notes to compare the modes
+			yield doc.to_array(ORTH), doc.to_array(LOWER), doc.to_array(SPACY)
+	else:
+		from concurrent.futures import ProcessPoolExecutor
+		from collections import deque
+		from itertools import islice
+
+		iterator = iter(iterator)
+		pending = deque()
+		with ProcessPoolExecutor(max_workers = n_process, initializer = _init_tokenizer_process, initargs = (self.SPACY_MODEL, standardize_word_token_punctuation_characters, tokenizer_mode)) as executor:
+			while True:
+				texts = list(islice(iterator, spacy_batch_size))
+				if len(texts) > 0:
+					pending.append(executor.submit(_tokenize_in_process, texts, spacy_batch_size, tokenizer_mode))
+				# limit batches in progress so texts are not all read into memory, results are returned in submission order to retain document order
+				while len(pending) > 0 and (len(pending) >= n_process * 2 or len(texts) == 0):
+					docs, strings = pending.popleft().result()
+					for token_id, token_str in strings.items():
+						if token_id not in self._nlp.vocab.strings:
+							self._nlp.vocab.strings.add(token_str)
+					yield from docs
+				if len(texts) == 0:
+					break
+
+# %% ../nbs/api/45_corpus.ipynb 51
 @patch
 def _build(self: Corpus, 
 		  save_path:str, # directory where corpus will be created, a subdirectory will be automatically created with the corpus content
@@ -447,19 +740,35 @@ def _build(self: Corpus,
 		  spacy_batch_size:int=500, # batch size for spacy tokenizer
 		  build_process_batch_size:int=5000, # save in-progress build to disk every n docs
 		  build_process_cleanup:bool = True, # Remove the build files after build is complete, retained for development and testing purposes
-		  standardize_word_token_punctuation_characters: bool = False # whether to standardize apostrophes in word tokens
+		  standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+		  save_token_arrays: bool = False, # save token data as raw binary arrays that are memory mapped on load
+		  n_process: int = 1, # number of processes to use for tokenization, -1 to use all CPUs
+		  resume: bool = False, # resume an interrupted build from its last build file if the source and build options are unchanged
+		  build_options: dict|None = None, # source and options of the build, recorded in the build manifest to check a resumed build matches
+		  tokenizer_mode: str = 'pipe' # 'pipe' (default) to call nlp.pipe on the model loaded without its pipeline components, 'tokenizer' to call the model tokenizer directly, 'blank' to use a blank model with the default tokenizer for the model language
 		  ):
 	"""Build a corpus from an iterator of texts."""
 
-	self._init_spacy_model(model, standardize_word_token_punctuation_characters=standardize_word_token_punctuation_characters)
+	self._init_spacy_model(model, standardize_word_token_punctuation_characters=standardize_word_token_punctuation_characters, tokenizer_mode=tokenizer_mode)
 	
 	self.SPACY_MODEL = model
 	self.SPACY_MODEL_VERSION = self._nlp.meta['version']
+	self.TOKENIZER_MODE = tokenizer_mode
 	self.SPACY_EOF_TOKEN = self._nlp.vocab[EOF_TOKEN_STR].orth
 	
 	if self.corpus_path is None: # leaving for testing ... this should already be set if build has been initiated in standard way via build_from_csv, build_from_files or whatever other methods are implemented to handle build/imports in future
 		self._init_build_process(save_path)
 	
+	build_options = {**(build_options or {}), 'model': model, 'model_version': self.SPACY_MODEL_VERSION, 'build_process_batch_size': build_process_batch_size, 'standardize_word_token_punctuation_characters': standardize_word_token_punctuation_characters, 'tokenizer_mode': tokenizer_mode}
+	manifest = self._read_build_manifest() if resume else None
+	if manifest is not None and manifest['options'] != build_options:
+		logger.warning('The source or options of the build have changed since the build was interrupted, starting the build from the beginning')
+		manifest = None
+	if manifest is None:
+		self._remove_build_files() # from a previous build of the corpus
+	else:
+		self._load_build_strings()
+
 	logger.memory_usage('init', init=True)
 
 	start_time = time.time()
@@ -479,18 +788,27 @@ def _build(self: Corpus,
 	store_pos = 0
 
 	doc_order = 1
-	for doc in self._nlp.pipe(iterator, batch_size = spacy_batch_size): # was previously using self._nlp.tokenizer.pipe(iterator, batch_size=batch_size): but this is faster, test other options at some point
-		orth_index.append(doc.to_array(ORTH))
+	finished = False
+	if manifest is not None: # continue after the documents in the saved build files
+		from itertools import islice
+		logger.info(f'Resuming build after {manifest["docs_processed"]} documents')
+		orth_index, lower_index, token2doc_index, has_spaces = [], [], [], []
+		store_pos = manifest['store_pos']
+		doc_order = manifest['docs_processed'] + 1
+		finished = manifest['finished']
+		iterator = iter([]) if finished else islice(iterator, manifest['docs_processed'], None) # skipped documents are read but not tokenized
+
+	for orth_index_tmp, lower_index_tmp, has_spaces_tmp in self._tokenize_texts(iterator, spacy_batch_size = spacy_batch_size, n_process = n_process, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, tokenizer_mode = tokenizer_mode):
+		orth_index.append(orth_index_tmp)
 		orth_index.append(eof_arr)
 
-		lower_index_tmp = doc.to_array(LOWER)
 		lower_index.append(lower_index_tmp)
 		lower_index.append(eof_arr)
 
 		token2doc_index.append(np.array([doc_order] * len(lower_index_tmp), dtype=np.int32))
 		token2doc_index.append(not_doc_arr)
 
-		has_spaces.append(doc.to_array(SPACY))
+		has_spaces.append(has_spaces_tmp)
 		has_spaces.append(has_spaces_eof_arr)
 		# self.offsets.append(offset) 
 		# offset = offset + len(lower_index_tmp) + 1
@@ -500,6 +818,7 @@ def _build(self: Corpus,
 		if doc_order % build_process_batch_size == 0:
 			#was based on condition build_process_path is not None before disk-based build process
 			store_pos = self._update_build_process(orth_index, lower_index, token2doc_index, has_spaces, store_pos)
+			self._checkpoint_build(orth_index, lower_index, store_pos, doc_order - 1, build_options)
 			lower_index, orth_index, token2doc_index, has_spaces = [], [], [], []
 			logger.memory_usage(f'processed {doc_order} documents')
 			
@@ -511,9 +830,17 @@ def _build(self: Corpus,
 
 	logger.memory_usage(f'Completing build process')
 	if save_path is not None:
-		store_pos = self._update_build_process(orth_index, lower_index, token2doc_index, has_spaces, store_pos)
+		if not finished:
+			store_pos = self._update_build_process(orth_index, lower_index, token2doc_index, has_spaces, store_pos)
+			self._checkpoint_build(orth_index, lower_index, store_pos, doc_order - 1, build_options, finished = True)
 		lower_index, orth_index, token2doc_index, has_spaces = [], [], [], []
 		self._complete_build_process(build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters)
+		if save_token_arrays:
+			self.save_token_arrays()
+		else: # remove token arrays from a previous build of the corpus so they are not loaded
+			for file, _ in TOKEN_ARRAY_FILES.values():
+				if os.path.isfile(f'{self.corpus_path}/{file}'):
+					os.remove(f'{self.corpus_path}/{file}')
 	else:
 		# deprecated - leaving for now
 		self._create_indices(orth_index, lower_index, token2doc_index)
@@ -540,7 +867,122 @@ def _build(self: Corpus,
 	logger.info(f'Build time: {(time.time() - start_time):.3f} seconds')
 
 
-# %% ../nbs/api/45_corpus.ipynb 33
+# %% ../nbs/api/45_corpus.ipynb 52
+FILE_READ_WORKERS = 8 # number of threads reading text files from a folder when building from files
+FILE_PREFETCH_SIZE = 64 # maximum number of texts read ahead of tokenization when building from files
+
+# %% ../nbs/api/45_corpus.ipynb 53
+def _prefetch(iterator: iter, # iterator to run in a background thread
+			  size: int = FILE_PREFETCH_SIZE # maximum number of items to read ahead
+			  ) -> iter: # items from the iterator in the same order
+	""" Run an iterator in a background thread, keeping up to size items ready so that reading overlaps with processing. """
+	import threading
+	import queue
+
+	items = queue.Queue(maxsize = size)
+	stop = threading.Event()
+	end = object()
+
+	def _put(item) -> bool: # False if the consumer has stopped
+		while not stop.is_set():
+			try:
+				items.put(item, timeout = 0.1)
+				return True
+			except queue.Full:
+				pass
+		return False
+
+	def _read():
+		try:
+			for item in iterator:
+				if not _put((item, None)):
+					return
+			_put((end, None))
+		except BaseException as e: # raised in the consumer
+			_put((end, e))
+		finally:
+			if hasattr(iterator, 'close'):
+				iterator.close()
+
+	thread = threading.Thread(target = _read, daemon = True)
+	thread.start()
+	try:
+		while True:
+			item, error = items.get()
+			if item is end:
+				if error is not None:
+					raise error
+				return
+			yield item
+	finally:
+		stop.set()
+		thread.join()
+
+# %% ../nbs/api/45_corpus.ipynb 54
+def _read_file(path: str, # path to text file
+			   encoding: str # encoding of text file
+			   ) -> str: # text
+	""" Read a text file. """
+	with open(path, 'rb') as f:
+		return f.read().decode(encoding)
+
+def _read_folder_files(files: list[str], # paths of files to read
+					   encoding: str # encoding of text files
+					   ) -> iter: # texts in the order of files
+	""" Read text files with a pool of threads, keeping up to FILE_PREFETCH_SIZE files read ahead. """
+	from concurrent.futures import ThreadPoolExecutor
+	from collections import deque
+
+	pending = deque()
+	with ThreadPoolExecutor(max_workers = FILE_READ_WORKERS) as executor:
+		for path in files:
+			pending.append(executor.submit(_read_file, path, encoding))
+			if len(pending) >= FILE_PREFETCH_SIZE:
+				yield pending.popleft().result()
+		while len(pending) > 0:
+			yield pending.popleft().result()
+
+# %% ../nbs/api/45_corpus.ipynb 55
+def _read_zip_files(source_path: str, # path to zip file
+					files: list[str], # names of files in the zip file to read
+					encoding: str # encoding of text files
+					) -> iter: # texts in the order of files
+	""" Read text files from a zip file. """
+	import zipfile
+
+	with zipfile.ZipFile(source_path, 'r') as z:
+		for f in files:
+			yield z.read(f).decode(encoding)
+
+def _read_tar_files(source_path: str, # path to tar or tar.gz file
+					files: list[str], # names of files in the tar file to read
+					encoding: str, # encoding of text files
+					buffer_size: int = FILE_PREFETCH_SIZE # maximum number of files found before their turn in files that are held in memory
+					) -> iter: # texts in the order of files
+	""" Read text files from a tar file by streaming through the archive. Files found before files that come earlier in files are buffered up to buffer_size, keeping the earliest, and the archive is streamed again for files that were not kept. """
+	import tarfile
+
+	order = {f: i for i, f in enumerate(files)}
+	buffered = {}
+	next_file = 0
+	while next_file < len(files):
+		start_file = next_file
+		with tarfile.open(source_path, 'r|*') as t: # stream the archive rather than seeking to each file, which decompresses a tar.gz from the start for files earlier in the archive
+			for member in t:
+				if member.name not in order or not member.isfile() or order[member.name] < next_file or order[member.name] in buffered:
+					continue
+				if order[member.name] != next_file and len(buffered) >= buffer_size:
+					if len(buffered) == 0 or order[member.name] > max(buffered):
+						continue # read on a later pass through the archive
+					del buffered[max(buffered)]
+				buffered[order[member.name]] = t.extractfile(member).read().decode(encoding)
+				while next_file in buffered:
+					yield buffered.pop(next_file)
+					next_file += 1
+		if next_file == start_file:
+			raise FileNotFoundError(f"File '{files[next_file]}' not found in '{source_path}'")
+
+# %% ../nbs/api/45_corpus.ipynb 58
 @patch
 def _prepare_files(self: Corpus, 
 					source_path: str, # path to folder with text files, path can be a directory, zip or tar/tar.gz file
@@ -548,7 +990,8 @@ def _prepare_files(self: Corpus,
 					metadata_file: str|None=None, # path to a CSV with metadata
 					metadata_file_column:str = 'file', # column in metadata file with file names to align texts with metadata
 					metadata_columns:list[str]=[], # list of column names to import from metadata
-					encoding:str='utf8' # encoding of text files
+					encoding:str='utf8', # encoding of text files
+					metadata_output:str='metadata.parquet' # file in the corpus directory to save metadata to
 					):
 	"""Prepare text files and metadata for building a corpus. Returns an iterator to get file text for processing."""
 
@@ -589,7 +1032,7 @@ def _prepare_files(self: Corpus,
 			raise FileNotFoundError(f"Metadata file '{metadata_file}' not found")
 		try:
 			if metadata_file_column not in metadata_columns:
-				metadata_columns.insert(0, metadata_file_column)
+				metadata_columns = [metadata_file_column] + list(metadata_columns) # not modifying the list passed in (or the default argument)
 			
 			metadata = pl.scan_csv(metadata_file).select(metadata_columns)
 			# reordering files on metadata so token data and metadata aligned
@@ -598,25 +1041,21 @@ def _prepare_files(self: Corpus,
 		except pl.exceptions.ColumnNotFoundError as e:
 			raise
 	
-	metadata.sink_parquet(f'{self.corpus_path}/metadata.parquet')
+	metadata.sink_parquet(f'{self.corpus_path}/{metadata_output}')
 
 	self.source_path = source_path
 
+	# files are read ahead of tokenization, so reading and tokenization overlap
 	if type == 'folder':
-		for p in files:
-			yield open(p, "rb").read().decode(encoding)
+		yield from _read_folder_files(files, encoding)
 	elif type == 'zip':
-		with zipfile.ZipFile(source_path, 'r') as z:
-			for f in files:
-				yield z.read(f).decode(encoding)
+		yield from _prefetch(_read_zip_files(source_path, files, encoding))
 	elif type == 'tar':
-		with tarfile.open(source_path, 'r') as t:
-			for f in files:
-				yield t.extractfile(f).read().decode(encoding)		
+		yield from _prefetch(_read_tar_files(source_path, files, encoding))
 	
 
 
-# %% ../nbs/api/45_corpus.ipynb 34
+# %% ../nbs/api/45_corpus.ipynb 59
 @patch
 def build_from_files(self: Corpus,
 					source_path: str, # path to folder with text files, path can be a directory, zip or tar/tar.gz file
@@ -630,26 +1069,32 @@ def build_from_files(self: Corpus,
 					spacy_batch_size:int=1000, # batch size for spacy tokenizer
 					build_process_batch_size:int=5000, # save in-progress build to disk every n docs
 					build_process_cleanup:bool = True, # Remove the build files after build is complete, retained for development and testing purposes
-					standardize_word_token_punctuation_characters: bool = False # whether to standardize apostrophes in word tokens
+					standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+					save_token_arrays: bool = False, # save token data as raw binary arrays that are memory mapped on load
+					n_process: int = 1, # number of processes to use for tokenization, -1 to use all CPUs
+					resume: bool = False, # resume an interrupted build of the corpus from its last build file, if the source and build options are unchanged
+					tokenizer_mode: str = 'pipe' # 'pipe' (default) to call nlp.pipe on the model loaded without its pipeline components, 'tokenizer' to call the model tokenizer directly, 'blank' to use a blank model with the default tokenizer for the model language
 					):
 	"""Build a corpus from text files in a folder."""
 	
 	start_time = time.time()
 	self._init_build_process(save_path)
+	build_options = {'source': _get_source_fingerprint(source_path), 'file_mask': file_mask, 'metadata_file': None if metadata_file is None else _get_source_fingerprint(metadata_file), 'metadata_file_column': metadata_file_column, 'metadata_columns': ([metadata_file_column] if metadata_file is not None and metadata_file_column not in metadata_columns else []) + list(metadata_columns), 'encoding': encoding} # metadata columns as imported by _prepare_files
 	iterator = self._prepare_files(source_path, file_mask, metadata_file, metadata_file_column, metadata_columns, encoding) #, build_process_path=build_process_path
-	self._build(save_path = save_path, iterator = iterator, model = model, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters) #build_process_path = build_process_path, 
+	self._build(save_path = save_path, iterator = iterator, model = model, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, save_token_arrays = save_token_arrays, n_process = n_process, resume = resume, build_options = build_options, tokenizer_mode = tokenizer_mode) #build_process_path = build_process_path, 
 	logger.info(f'Build from files time: {(time.time() - start_time):.3f} seconds')
 
 	return self
 
-# %% ../nbs/api/45_corpus.ipynb 35
+# %% ../nbs/api/45_corpus.ipynb 60
 @patch
 def _prepare_csv(self: Corpus, 
 					source_path:str, # path to csv file
 					text_column:str='text', # column in csv with text
 					metadata_columns:list[str]=[], # list of column names to import from csv
 					encoding:str='utf8', # encoding of csv passed to Polars read_csv, see their documentation
-					build_process_batch_size:int=5000 # save in-progress build to disk every n rows
+					build_process_batch_size:int=5000, # save in-progress build to disk every n rows
+					metadata_output:str='metadata.parquet' # file in the corpus directory to save metadata to
 					) -> iter: # iterator to return rows for processing
 	"""Prepare to import from CSV, including metadata. Returns an iterator to process the text column."""
 
@@ -663,13 +1108,15 @@ def _prepare_csv(self: Corpus,
 
 	self.source_path = source_path
 	
-	df.select(metadata_columns).sink_parquet(f'{self.corpus_path}/metadata.parquet')
+	df.select(metadata_columns).sink_parquet(f'{self.corpus_path}/{metadata_output}')
 
-	for slice_df in df.collect(engine='streaming').iter_slices(n_rows=build_process_batch_size):  
-		for row in slice_df.iter_rows():
-			yield row[0]  
+	# read the text column in batches so memory use for the input does not depend on the size of the csv
+	reader = pl.read_csv_batched(source_path, encoding = encoding, columns = [text_column], schema_overrides = {text_column: pl.String}, batch_size = build_process_batch_size)
+	while (batches := reader.next_batches(1)):
+		for text in batches[0].get_column(text_column):
+			yield text
 
-# %% ../nbs/api/45_corpus.ipynb 36
+# %% ../nbs/api/45_corpus.ipynb 61
 @patch
 def build_from_csv(self: Corpus, 
 				   source_path:str, # path to csv file
@@ -682,22 +1129,156 @@ def build_from_csv(self: Corpus,
 				   #build_process_path:str=None, # path to save an in-progress build to disk to reduce memory usage
 				   build_process_batch_size:int=5000, # save in-progress build to disk every n docs
 				   build_process_cleanup:bool = True, # Remove the build files after build is complete, retained for development and testing purposes
-				   standardize_word_token_punctuation_characters: bool = False # whether to standardize apostrophes in word tokens
+				   standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+				   save_token_arrays: bool = False, # save token data as raw binary arrays that are memory mapped on load
+				   n_process: int = 1, # number of processes to use for tokenization, -1 to use all CPUs
+				   resume: bool = False, # resume an interrupted build of the corpus from its last build file, if the source and build options are unchanged
+				   tokenizer_mode: str = 'pipe' # 'pipe' (default) to call nlp.pipe on the model loaded without its pipeline components, 'tokenizer' to call the model tokenizer directly, 'blank' to use a blank model with the default tokenizer for the model language
 				   ):
 	"""Build a corpus from a csv file."""
 	
 	start_time = time.time()
 	self._init_build_process(save_path)
+	build_options = {'source': _get_source_fingerprint(source_path), 'text_column': text_column, 'metadata_columns': list(metadata_columns), 'encoding': encoding}
 	iterator = self._prepare_csv(source_path = source_path, text_column = text_column, metadata_columns = metadata_columns, encoding = encoding, build_process_batch_size = build_process_batch_size)
-	self._build(save_path = save_path, iterator = iterator, model = model, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters)
+	self._build(save_path = save_path, iterator = iterator, model = model, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, save_token_arrays = save_token_arrays, n_process = n_process, resume = resume, build_options = build_options, tokenizer_mode = tokenizer_mode)
 	logger.info(f'Build from csv time: {(time.time() - start_time):.3f} seconds')
 
 	return self
 
-# %% ../nbs/api/45_corpus.ipynb 40
+# %% ../nbs/api/45_corpus.ipynb 73
+@patch
+def _prepare_table(self: Corpus, 
+					source_path:str, # path to parquet, arrow ipc or ndjson file
+					source_format:str, # format of the file, 'parquet', 'ipc' or 'ndjson'
+					text_column:str='text', # column with text
+					metadata_columns:list[str]=[], # list of column names to import
+					build_process_batch_size:int=5000, # number of texts to read at a time
+					metadata_output:str='metadata.parquet' # file in the corpus directory to save metadata to
+					) -> iter: # iterator to return rows for processing
+	"""Prepare to import from a Parquet, Arrow IPC or NDJSON file, including metadata. Returns an iterator to process the text column."""
+
+	if not os.path.isfile(source_path):
+		raise FileNotFoundError(f'Path ({source_path}) is not a file')
+
+	scan_functions = {'parquet': pl.scan_parquet, 'ipc': pl.scan_ipc, 'ndjson': pl.scan_ndjson}
+	if source_format not in scan_functions:
+		raise ValueError(f'Source format must be one of {list(scan_functions.keys())}')
+
+	df = scan_functions[source_format](source_path)
+	column_names = df.collect_schema().names()
+	missing_columns = [column for column in [text_column] + metadata_columns if column not in column_names]
+	if len(missing_columns) > 0:
+		raise pl.exceptions.ColumnNotFoundError(f'Columns {missing_columns} not found in {source_path}, valid columns: {column_names}')
+
+	self.source_path = source_path
+
+	df.select(metadata_columns).sink_parquet(f'{self.corpus_path}/{metadata_output}') # the text column is not read
+
+	if source_format == 'parquet': # slices only read the row groups they need
+		text_df = df.select(text_column)
+		row_count = text_df.select(pl.len()).collect().item()
+		for offset in range(0, row_count, build_process_batch_size):
+			yield from text_df.slice(offset, build_process_batch_size).collect().get_column(text_column)
+	elif source_format == 'ipc': # memory mapped, so texts are read from the file as they are needed
+		for slice_df in pl.read_ipc(source_path, columns = [text_column], memory_map = True).iter_slices(n_rows = build_process_batch_size):
+			yield from slice_df.get_column(text_column)
+	else: # decode one line at a time
+		decoder = msgspec.json.Decoder()
+		with open(source_path, 'rb') as f:
+			for line in f:
+				if line.strip():
+					yield decoder.decode(line).get(text_column)
+
+# %% ../nbs/api/45_corpus.ipynb 74
+@patch
+def build_from_parquet(self: Corpus, 
+				   source_path:str, # path to parquet file
+				   save_path:str, # directory where corpus will be created, a subdirectory will be automatically created with the corpus content
+				   text_column:str='text', # column in parquet file with text
+				   metadata_columns:list[str]=[], # list of column names to import from parquet file
+				   model:str='en_core_web_sm', # spacy model to use for tokenisation
+				   spacy_batch_size:int=1000, # batch size for Spacy tokenizer
+				   build_process_batch_size:int=5000, # save in-progress build to disk every n docs
+				   build_process_cleanup:bool = True, # Remove the build files after build is complete, retained for development and testing purposes
+				   standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+				   save_token_arrays: bool = False, # save token data as raw binary arrays that are memory mapped on load
+				   n_process: int = 1, # number of processes to use for tokenization, -1 to use all CPUs
+				   resume: bool = False, # resume an interrupted build of the corpus from its last build file, if the source and build options are unchanged
+				   tokenizer_mode: str = 'pipe' # 'pipe' (default) to call nlp.pipe on the model loaded without its pipeline components, 'tokenizer' to call the model tokenizer directly, 'blank' to use a blank model with the default tokenizer for the model language
+				   ):
+	"""Build a corpus from a parquet file."""
+	
+	start_time = time.time()
+	self._init_build_process(save_path)
+	build_options = {'source': _get_source_fingerprint(source_path), 'text_column': text_column, 'metadata_columns': list(metadata_columns)}
+	iterator = self._prepare_table(source_path = source_path, source_format = 'parquet', text_column = text_column, metadata_columns = metadata_columns, build_process_batch_size = build_process_batch_size)
+	self._build(save_path = save_path, iterator = iterator, model = model, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, save_token_arrays = save_token_arrays, n_process = n_process, resume = resume, build_options = build_options, tokenizer_mode = tokenizer_mode)
+	logger.info(f'Build from parquet time: {(time.time() - start_time):.3f} seconds')
+
+	return self
+
+# %% ../nbs/api/45_corpus.ipynb 75
+@patch
+def build_from_ipc(self: Corpus, 
+				   source_path:str, # path to arrow ipc (feather) file
+				   save_path:str, # directory where corpus will be created, a subdirectory will be automatically created with the corpus content
+				   text_column:str='text', # column in arrow ipc file with text
+				   metadata_columns:list[str]=[], # list of column names to import from arrow ipc file
+				   model:str='en_core_web_sm', # spacy model to use for tokenisation
+				   spacy_batch_size:int=1000, # batch size for Spacy tokenizer
+				   build_process_batch_size:int=5000, # save in-progress build to disk every n docs
+				   build_process_cleanup:bool = True, # Remove the build files after build is complete, retained for development and testing purposes
+				   standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+				   save_token_arrays: bool = False, # save token data as raw binary arrays that are memory mapped on load
+				   n_process: int = 1, # number of processes to use for tokenization, -1 to use all CPUs
+				   resume: bool = False, # resume an interrupted build of the corpus from its last build file, if the source and build options are unchanged
+				   tokenizer_mode: str = 'pipe' # 'pipe' (default) to call nlp.pipe on the model loaded without its pipeline components, 'tokenizer' to call the model tokenizer directly, 'blank' to use a blank model with the default tokenizer for the model language
+				   ):
+	"""Build a corpus from an arrow ipc (feather) file."""
+	
+	start_time = time.time()
+	self._init_build_process(save_path)
+	build_options = {'source': _get_source_fingerprint(source_path), 'text_column': text_column, 'metadata_columns': list(metadata_columns)}
+	iterator = self._prepare_table(source_path = source_path, source_format = 'ipc', text_column = text_column, metadata_columns = metadata_columns, build_process_batch_size = build_process_batch_size)
+	self._build(save_path = save_path, iterator = iterator, model = model, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, save_token_arrays = save_token_arrays, n_process = n_process, resume = resume, build_options = build_options, tokenizer_mode = tokenizer_mode)
+	logger.info(f'Build from ipc time: {(time.time() - start_time):.3f} seconds')
+
+	return self
+
+# %% ../nbs/api/45_corpus.ipynb 76
+@patch
+def build_from_ndjson(self: Corpus, 
+				   source_path:str, # path to newline-delimited json file
+				   save_path:str, # directory where corpus will be created, a subdirectory will be automatically created with the corpus content
+				   text_column:str='text', # field in each json object with text
+				   metadata_columns:list[str]=[], # list of fields to import as metadata
+				   model:str='en_core_web_sm', # spacy model to use for tokenisation
+				   spacy_batch_size:int=1000, # batch size for Spacy tokenizer
+				   build_process_batch_size:int=5000, # save in-progress build to disk every n docs
+				   build_process_cleanup:bool = True, # Remove the build files after build is complete, retained for development and testing purposes
+				   standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+				   save_token_arrays: bool = False, # save token data as raw binary arrays that are memory mapped on load
+				   n_process: int = 1, # number of processes to use for tokenization, -1 to use all CPUs
+				   resume: bool = False, # resume an interrupted build of the corpus from its last build file, if the source and build options are unchanged
+				   tokenizer_mode: str = 'pipe' # 'pipe' (default) to call nlp.pipe on the model loaded without its pipeline components, 'tokenizer' to call the model tokenizer directly, 'blank' to use a blank model with the default tokenizer for the model language
+				   ):
+	"""Build a corpus from a newline-delimited json file."""
+	
+	start_time = time.time()
+	self._init_build_process(save_path)
+	build_options = {'source': _get_source_fingerprint(source_path), 'text_column': text_column, 'metadata_columns': list(metadata_columns)}
+	iterator = self._prepare_table(source_path = source_path, source_format = 'ndjson', text_column = text_column, metadata_columns = metadata_columns, build_process_batch_size = build_process_batch_size)
+	self._build(save_path = save_path, iterator = iterator, model = model, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, save_token_arrays = save_token_arrays, n_process = n_process, resume = resume, build_options = build_options, tokenizer_mode = tokenizer_mode)
+	logger.info(f'Build from ndjson time: {(time.time() - start_time):.3f} seconds')
+
+	return self
+
+# %% ../nbs/api/45_corpus.ipynb 79
 @patch
 def load(self: Corpus, 
-		 corpus_path: str # path to load corpus
+		 corpus_path: str, # path to load corpus
+		 query_only: bool = False # if True, the spaCy model is only loaded when a query needs it, which makes loading faster for reporting
 		 ):
 	""" Load corpus from disk and load the corresponding spaCy model. """
 
@@ -719,7 +1300,9 @@ def load(self: Corpus,
 	for k in data.__slots__:
 		setattr(self, k, getattr(data, k))
 
-	self._init_spacy_model(self.SPACY_MODEL, version = self.SPACY_MODEL_VERSION)
+	self._nlp = None
+	if not query_only:
+		self._init_spacy_model(self.SPACY_MODEL, version = self.SPACY_MODEL_VERSION, tokenizer_mode = self.TOKENIZER_MODE)
 
 	self._init_corpus_dataframes()
 
@@ -727,7 +1310,249 @@ def load(self: Corpus,
 
 	return self
 
-# %% ../nbs/api/45_corpus.ipynb 45
+# %% ../nbs/api/45_corpus.ipynb 85
+@patch
+def _complete_append_process(self: Corpus,
+							 build_process_cleanup: bool = True, # Remove the build files after the append is complete, retained for development and testing purposes
+							 standardize_word_token_punctuation_characters: bool = False # whether to standardize apostrophes in word tokens
+							 ):
+	""" Add the documents in the in-progress build files to the corpus on disk. Existing token ids are retained and new tokens are added to the end of the vocab. """
+
+	logger.memory_usage('init', init=True)
+	build_files = self._get_build_files()
+
+	# check metadata can be appended before the corpus is modified
+	metadata_columns = pl.scan_parquet(f'{self.corpus_path}/metadata.parquet').collect_schema().names() if os.path.isfile(f'{self.corpus_path}/metadata.parquet') else []
+	append_metadata_columns = pl.scan_parquet(f'{self.corpus_path}/append_metadata.parquet').collect_schema().names()
+	if metadata_columns != append_metadata_columns:
+		for f in build_files + [f'{self.corpus_path}/append_metadata.parquet']:
+			os.remove(f)
+		raise ValueError(f'Metadata columns of the appended documents ({append_metadata_columns}) do not match the corpus metadata columns ({metadata_columns})')
+
+	source_ids = np.array([], dtype=np.uint64)
+	for build_file in build_files:
+		build_df = self._read_build_file(build_file, standardize_word_token_punctuation_characters)
+		source_ids = np.union1d(source_ids, np.concatenate([build_df['orth_index'].unique().to_numpy(), build_df['lower_index'].unique().to_numpy()]))
+	logger.memory_usage('collected vocab')
+
+	# map spacy ids to existing token ids, new tokens are given ids after the existing vocab
+	vocab_df = pl.read_parquet(f'{self.corpus_path}/vocab.parquet')
+	vocab_columns = vocab_df.columns
+	vocab_df = vocab_df.sort('token_id')
+	vocab_size = len(vocab_df)
+	tokens_lookup = dict(zip(vocab_df['token'].to_list(), vocab_df['token_id'].to_list()))
+	new_tokens = []
+	token_ids = np.zeros(len(source_ids), dtype=np.uint32)
+	for i, source_id in enumerate(source_ids):
+		token_str = self._nlp.vocab[source_id].text
+		if token_str not in tokens_lookup:
+			new_tokens.append(token_str)
+			tokens_lookup[token_str] = vocab_size + len(new_tokens)
+		token_ids[i] = tokens_lookup[token_str]
+	del tokens_lookup
+	new_vocab_size = vocab_size + len(new_tokens)
+	logger.memory_usage(f'got {len(new_tokens)} new tokens')
+
+	self.punct_tokens = list(self.punct_tokens) + [vocab_size + k + 1 for k, v in enumerate(new_tokens) if v.strip(_get_punctuation_strings()) == '']
+	self.space_tokens = list(self.space_tokens) + [vocab_size + k + 1 for k, v in enumerate(new_tokens) if v.strip() == '']
+
+	is_punct = np.zeros(new_vocab_size + 1, dtype=np.bool)
+	is_punct[self.punct_tokens] = True
+	is_space = np.zeros(new_vocab_size + 1, dtype=np.bool)
+	is_space[self.space_tokens] = True
+
+	# appended documents replace the index header at the end of the corpus, the build files end with a new index header
+	input_length = _scan_table(self.corpus_path, 'tokens').select(pl.len()).collect().item()
+	position = input_length - INDEX_HEADER_LENGTH
+	token_counts = {'orth_index': np.zeros(new_vocab_size + 1, dtype=np.int64), 'lower_index': np.zeros(new_vocab_size + 1, dtype=np.int64)}
+	document_counts = {'orth_index': np.zeros(new_vocab_size + 1, dtype=np.int64), 'lower_index': np.zeros(new_vocab_size + 1, dtype=np.int64)}
+	for part, build_file in enumerate(build_files):
+		position, document_count = self._process_build_file(build_file, part, position, source_ids, token_ids, is_space, is_punct, token_counts, document_counts, standardize_word_token_punctuation_characters)
+		self.document_count = max(self.document_count, document_count)
+		logger.memory_usage(f'processed {os.path.basename(build_file)}')
+	append_token_counts = {index: counts.copy() for index, counts in token_counts.items()} # counts of the appended tokens only, for the positional index of the appended part
+
+	# raw token arrays are updated in place
+	for index, (file, dtype) in TOKEN_ARRAY_FILES.items():
+		if os.path.isfile(f'{self.corpus_path}/{file}'):
+			with open(f'{self.corpus_path}/{file}', 'r+b') as f:
+				f.truncate((input_length - INDEX_HEADER_LENGTH) * np.dtype(dtype).itemsize)
+				f.seek(0, os.SEEK_END)
+				for part in range(len(build_files)):
+					pl.read_parquet(f'{self.corpus_path}/build_tokens_{part}.parquet', columns = [index])[index].to_numpy().astype(dtype).tofile(f)
+
+	# appended rows are saved as parts alongside the existing tables, so the existing data is not rewritten
+	append_part = len(_get_table_files(self.corpus_path, 'tokens'))
+	for table in ['tokens', 'spaces', 'puncts']:
+		part_files = [f'{self.corpus_path}/build_{table}_{part}.parquet' for part in range(len(build_files))]
+		pl.scan_parquet(part_files).sink_parquet(f'{self.corpus_path}/build_{table}.parquet', maintain_order = True)
+		os.replace(f'{self.corpus_path}/build_{table}.parquet', f'{self.corpus_path}/{table}_append_{append_part}.parquet')
+		for part_file in part_files:
+			os.remove(part_file)
+	logger.memory_usage('appended tokens, spaces and punct positions')
+
+	if len(metadata_columns) > 0:
+		os.replace(f'{self.corpus_path}/append_metadata.parquet', f'{self.corpus_path}/metadata_append_{append_part}.parquet')
+	else:
+		os.remove(f'{self.corpus_path}/append_metadata.parquet')
+	logger.memory_usage('appended metadata')
+
+	if os.path.isdir(os.path.join(self.corpus_path, 'ngrams')): # saved ngram frequency tables no longer match the corpus
+		import shutil
+		shutil.rmtree(os.path.join(self.corpus_path, 'ngrams'))
+
+	# counts for existing tokens are recovered from vocab frequencies, end of file tokens are not included in frequencies
+	for index, column in [('orth_index', 'frequency_orth'), ('lower_index', 'frequency_lower')]:
+		token_counts[index][1:vocab_size + 1] += vocab_df[column].fill_null(0).to_numpy()
+		token_counts[index][self.EOF_TOKEN] = self.document_count + INDEX_HEADER_LENGTH + INDEX_HEADER_LENGTH
+	# appended documents are new documents, so document frequencies are added to the existing document frequencies (if stored)
+	for index, column in [('orth_index', 'document_frequency_orth'), ('lower_index', 'document_frequency_lower')]:
+		if column in vocab_columns:
+			document_counts[index][1:vocab_size + 1] += vocab_df[column].fill_null(0).to_numpy()
+
+	if os.path.isfile(f'{self.corpus_path}/positions.parquet'): # positions of the appended tokens are saved as a part, so the existing positional index is not rewritten
+		self._build_positional_index(append_token_counts, tokens_df = pl.scan_parquet(f'{self.corpus_path}/tokens_append_{append_part}.parquet'), position_offset = input_length - INDEX_HEADER_LENGTH, table_suffix = f'_append_{append_part}')
+	else:
+		self._build_positional_index(token_counts)
+	logger.memory_usage('saved positional index')
+
+	frequency_lower = token_counts['lower_index'][1:].copy()
+	frequency_orth = token_counts['orth_index'][1:].copy()
+	frequency_lower[self.EOF_TOKEN - 1] = 0
+	frequency_orth[self.EOF_TOKEN - 1] = 0
+	vocab_df = pl.concat([vocab_df.select(['token_id', 'token']), pl.DataFrame([pl.Series('token_id', range(vocab_size + 1, new_vocab_size + 1), dtype = pl.UInt32), pl.Series('token', new_tokens, dtype = pl.String)])])
+	vocab_df = vocab_df.with_columns(pl.Series('frequency_lower', frequency_lower, dtype = pl.UInt32), pl.Series('frequency_orth', frequency_orth, dtype = pl.UInt32))
+	vocab_df = vocab_df.with_columns(pl.when(pl.col('frequency_lower') > 0).then(pl.col('frequency_lower')).alias('frequency_lower'), pl.when(pl.col('frequency_orth') > 0).then(pl.col('frequency_orth')).alias('frequency_orth'))
+	vocab_df = vocab_df.with_columns((pl.col("token_id").is_in(self.punct_tokens)).alias("is_punct"), (pl.col("token_id").is_in(self.space_tokens)).alias("is_space"))
+	vocab_df = vocab_df.with_columns(self._get_document_frequency_columns(document_counts))
+	vocab_df = vocab_df.sort(by = pl.col('token').str.to_lowercase(), descending = False).with_row_index('tokens_sort_order', offset=1)
+	vocab_df = vocab_df.sort(by = pl.col('frequency_orth'), descending = True, nulls_last = True).with_row_index(name='rank', offset=1)
+	vocab_df.select(vocab_columns).write_parquet(f'{self.corpus_path}/vocab.parquet')
+	del vocab_df
+	logger.memory_usage('wrote vocab to disk')
+
+	self.unique_tokens = int(np.count_nonzero(frequency_lower))
+	self.token_count = position - self.document_count - INDEX_HEADER_LENGTH - INDEX_HEADER_LENGTH
+	self.punct_token_count = int(token_counts['lower_index'][self.punct_tokens].sum())
+	self.space_token_count = _scan_table(self.corpus_path, 'spaces').select(pl.len()).collect(engine='streaming').item()
+	self.word_token_count = self.token_count - self.punct_token_count
+	self.unique_word_tokens = self.unique_tokens - len(self.punct_tokens)
+
+	if build_process_cleanup:
+		for f in build_files:
+			os.remove(f)
+		logger.memory_usage('removed build files')
+
+	logger.memory_usage('done')
+
+# %% ../nbs/api/45_corpus.ipynb 86
+@patch
+def _append(self: Corpus,
+			iterator: iter, # iterator of texts
+			spacy_batch_size:int=500, # batch size for spacy tokenizer
+			build_process_batch_size:int=5000, # save in-progress build to disk every n docs
+			build_process_cleanup:bool = True, # Remove the build files after the append is complete, retained for development and testing purposes
+			standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+			n_process: int = 1 # number of processes to use for tokenization, -1 to use all CPUs
+			):
+	"""Append documents from an iterator of texts to a corpus that has been built or loaded."""
+
+	if self.corpus_path is None or self.tokens is None:
+		raise ValueError('A corpus must be built or loaded before documents can be appended to it.')
+
+	if standardize_word_token_punctuation_characters or self._nlp is None:
+		self._init_spacy_model(self.SPACY_MODEL, version = self.SPACY_MODEL_VERSION, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, tokenizer_mode = self.TOKENIZER_MODE)
+	self.SPACY_EOF_TOKEN = self._nlp.vocab[EOF_TOKEN_STR].orth # adds the end of file token string to the spacy vocab
+
+	start_time = time.time()
+
+	for build_file in self._get_build_files(): # build files retained from building the corpus
+		os.remove(build_file)
+
+	eof_arr = np.array([self.SPACY_EOF_TOKEN], dtype=np.uint64)
+	not_doc_arr = np.array([NOT_DOC_TOKEN], dtype=np.int32)
+	index_header_arr = np.array([self.SPACY_EOF_TOKEN] * INDEX_HEADER_LENGTH, dtype=np.uint64)
+	has_spaces_eof_arr = np.array([False], dtype=np.bool)
+
+	orth_index, lower_index, token2doc_index, has_spaces = [], [], [], []
+	store_pos = 0
+	doc_order = self.document_count + 1
+	for orth_index_tmp, lower_index_tmp, has_spaces_tmp in self._tokenize_texts(iterator, spacy_batch_size = spacy_batch_size, n_process = n_process, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, tokenizer_mode = self.TOKENIZER_MODE):
+		orth_index.extend([orth_index_tmp, eof_arr])
+		lower_index.extend([lower_index_tmp, eof_arr])
+		token2doc_index.extend([np.array([doc_order] * len(lower_index_tmp), dtype=np.int32), not_doc_arr])
+		has_spaces.extend([has_spaces_tmp, has_spaces_eof_arr])
+		doc_order += 1
+
+		if doc_order % build_process_batch_size == 0:
+			store_pos = self._update_build_process(orth_index, lower_index, token2doc_index, has_spaces, store_pos)
+			orth_index, lower_index, token2doc_index, has_spaces = [], [], [], []
+			logger.memory_usage(f'processed {doc_order - self.document_count - 1} documents')
+
+	orth_index.append(index_header_arr)
+	lower_index.append(index_header_arr)
+	token2doc_index.append(np.array([NOT_DOC_TOKEN] * INDEX_HEADER_LENGTH, dtype=np.int32))
+	has_spaces.append(np.array([0] * INDEX_HEADER_LENGTH, dtype=np.bool))
+	store_pos = self._update_build_process(orth_index, lower_index, token2doc_index, has_spaces, store_pos)
+	del orth_index, lower_index, token2doc_index, has_spaces
+
+	self._complete_append_process(build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters)
+
+	# cached data no longer reflects the corpus
+	self.results_cache.clear()
+
+	self.save_corpus_metadata()
+	self._init_corpus_dataframes()
+
+	logger.info(f'Append time: {(time.time() - start_time):.3f} seconds')
+
+# %% ../nbs/api/45_corpus.ipynb 87
+@patch
+def append_from_files(self: Corpus,
+					source_path: str, # path to folder with text files, path can be a directory, zip or tar/tar.gz file
+					file_mask:str='*.txt', # mask to select files 
+					metadata_file: str|None=None, # path to a CSV with metadata
+					metadata_file_column:str = 'file', # column in metadata file with file names to align texts with metadata
+					metadata_columns:list[str]=[], # list of column names to import from metadata
+					encoding:str='utf-8', # encoding of text files
+					spacy_batch_size:int=1000, # batch size for spacy tokenizer
+					build_process_batch_size:int=5000, # save in-progress build to disk every n docs
+					build_process_cleanup:bool = True, # Remove the build files after the append is complete, retained for development and testing purposes
+					standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+					n_process: int = 1 # number of processes to use for tokenization, -1 to use all CPUs
+					):
+	"""Append text files in a folder to a corpus that has been built or loaded."""
+
+	start_time = time.time()
+	iterator = self._prepare_files(source_path, file_mask, metadata_file, metadata_file_column, metadata_columns, encoding, metadata_output = 'append_metadata.parquet')
+	self._append(iterator = iterator, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, n_process = n_process)
+	logger.info(f'Append from files time: {(time.time() - start_time):.3f} seconds')
+
+	return self
+
+# %% ../nbs/api/45_corpus.ipynb 88
+@patch
+def append_from_csv(self: Corpus, 
+				   source_path:str, # path to csv file
+				   text_column:str='text', # column in csv with text
+				   metadata_columns:list[str]=[], # list of column names to import from csv
+				   encoding:str='utf8', # encoding of csv passed to Polars read_csv, see their documentation
+				   spacy_batch_size:int=1000, # batch size for Spacy tokenizer
+				   build_process_batch_size:int=5000, # save in-progress build to disk every n docs
+				   build_process_cleanup:bool = True, # Remove the build files after the append is complete, retained for development and testing purposes
+				   standardize_word_token_punctuation_characters: bool = False, # whether to standardize apostrophes in word tokens
+				   n_process: int = 1 # number of processes to use for tokenization, -1 to use all CPUs
+				   ):
+	"""Append the documents in a csv file to a corpus that has been built or loaded."""
+	
+	start_time = time.time()
+	iterator = self._prepare_csv(source_path = source_path, text_column = text_column, metadata_columns = metadata_columns, encoding = encoding, build_process_batch_size = build_process_batch_size, metadata_output = 'append_metadata.parquet')
+	self._append(iterator = iterator, spacy_batch_size = spacy_batch_size, build_process_batch_size = build_process_batch_size, build_process_cleanup = build_process_cleanup, standardize_word_token_punctuation_characters = standardize_word_token_punctuation_characters, n_process = n_process)
+	logger.info(f'Append from csv time: {(time.time() - start_time):.3f} seconds')
+
+	return self
+
+# %% ../nbs/api/45_corpus.ipynb 90
 @patch
 def info(self: Corpus, 
 		 include_disk_usage:bool = False, # include information of size on disk in output
@@ -747,13 +1572,15 @@ def info(self: Corpus,
 			result.append(str(value))
 
 	if include_disk_usage:
-		files = {'corpus.json': 'Corpus Metadata', 'metadata.parquet': 'Document Metadata', 'tokens.parquet': 'Tokens', 'vocab.parquet': 'Vocab', 'puncts.parquet': 'Punctuation positions', 'spaces.parquet': 'Space positions'}
+		files = {'corpus.json': 'Corpus Metadata', 'metadata.parquet': 'Document Metadata', 'tokens.parquet': 'Tokens', 'vocab.parquet': 'Vocab', 'puncts.parquet': 'Punctuation positions', 'spaces.parquet': 'Space positions', 'positions.parquet': 'Positional index', 'offsets.parquet': 'Positional index offsets', 'tokens.orth.u32': 'Token array (orth_index)', 'tokens.lower.u32': 'Token array (lower_index)', 'tokens.doc.i32': 'Token array (token2doc_index)'}
 		for file, file_descriptor in files.items():
-			size = os.path.getsize(f'{self.corpus_path}/{file}')
+			if not os.path.isfile(f'{self.corpus_path}/{file}'): # optional files or files not present for corpora built with older versions of Conc
+				continue
+			size = sum(os.path.getsize(table_file) for table_file in _get_table_files(self.corpus_path, file.removesuffix('.parquet'))) if file.endswith('.parquet') else os.path.getsize(f'{self.corpus_path}/{file}') # including parts added by appends
 			attributes.append(file_descriptor + ' (MB)')
 			result.append(f'{size/1024/1024:.3f}')
 
-	# maybe add in status of these: 'results_cache', 'ngram_index', 'frequency_table'
+	# maybe add in status of these: 'results_cache', 'frequency_table'
 	# size = sys.getsizeof(getattr(self, attr))
 	
 	if formatted:
@@ -763,7 +1590,7 @@ def info(self: Corpus,
 
 
 
-# %% ../nbs/api/45_corpus.ipynb 46
+# %% ../nbs/api/45_corpus.ipynb 91
 @patch
 def report(self: Corpus, 
 			include_memory_usage:bool = False # include memory usage in output
@@ -771,7 +1598,7 @@ def report(self: Corpus,
 	""" Get information about the corpus as a result object. """
 	return Result('summary', self.info(include_memory_usage), 'Corpus Summary', '', {}, [])	
 
-# %% ../nbs/api/45_corpus.ipynb 47
+# %% ../nbs/api/45_corpus.ipynb 92
 @patch
 def summary(self: Corpus, 
 			include_memory_usage:bool = False # include memory usage in output
@@ -780,7 +1607,7 @@ def summary(self: Corpus,
 	result = Result('summary', self.info(include_memory_usage), 'Corpus Summary', '', {}, [])
 	result.display()
 
-# %% ../nbs/api/45_corpus.ipynb 48
+# %% ../nbs/api/45_corpus.ipynb 93
 @patch
 def __str__(self: Corpus):
 	""" Formatted information about the corpus. """
@@ -789,64 +1616,77 @@ def __str__(self: Corpus):
 
 
 
-# %% ../nbs/api/45_corpus.ipynb 58
+# %% ../nbs/api/45_corpus.ipynb 103
 @patch
-def _init_token_arrays(self: Corpus):
+def _init_token_arrays(self: Corpus) -> tuple[np.ndarray, dict, np.ndarray]: # token strings by token id, token ids by token string, sort order by token id
 	""" Prepare the temporary token arrays for the corpus. """
-	if 'tokens_array' not in self.results_cache:
+	if 'tokens_array' in self.results_cache:
+		tokens_array = self.results_cache['tokens_array']
+	else:
 		start_time = time.time()
-		self.results_cache['tokens_array'] = self.vocab.sort(by = pl.col('token_id')).select(pl.col('token')).collect(engine='streaming').to_numpy().flatten()
-		self.results_cache['tokens_array'] = np.insert(self.results_cache['tokens_array'], 0, ERR_TOKEN_STR) # adding a dummy value at the 0 index to align token strings with token_ids
+		tokens_array = self.vocab.sort(by = pl.col('token_id')).select(pl.col('token')).collect(engine='streaming').to_numpy().flatten()
+		tokens_array = np.insert(tokens_array, 0, ERR_TOKEN_STR) # adding a dummy value at the 0 index to align token strings with token_ids
+		self.results_cache['tokens_array'] = tokens_array
 		logger.info(f'Created tokens_array in {(time.time() - start_time):.3f} seconds')
 
+	if 'tokens_lookup' in self.results_cache:
+		tokens_lookup = self.results_cache['tokens_lookup']
+	else:
 		start_time = time.time() 
 		# new functionality for disk-based build 
-		self.results_cache['tokens_lookup'] = dict(zip(self.results_cache['tokens_array'], range(len(self.results_cache['tokens_array']))))
+		tokens_lookup = dict(zip(tokens_array, range(len(tokens_array))))
+		self.results_cache['tokens_lookup'] = tokens_lookup
 		logger.info(f'Created tokens_lookup in {(time.time() - start_time):.3f} seconds')
 		
+	if 'tokens_sort_order' in self.results_cache:
+		tokens_sort_order = self.results_cache['tokens_sort_order']
+	else:
 		start_time = time.time()
-		self.results_cache['tokens_sort_order'] = self.vocab.sort(by = pl.col('token_id')).select(pl.col('tokens_sort_order')).collect(engine='streaming').to_numpy().flatten()
-		self.results_cache['tokens_sort_order'] = np.insert(self.results_cache['tokens_sort_order'], 0, 0) # adding a dummy value at the 0 index to align token strings with token_ids
+		tokens_sort_order = self.vocab.sort(by = pl.col('token_id')).select(pl.col('tokens_sort_order')).collect(engine='streaming').to_numpy().flatten()
+		tokens_sort_order = np.insert(tokens_sort_order, 0, 0) # adding a dummy value at the 0 index to align token strings with token_ids
+		self.results_cache['tokens_sort_order'] = tokens_sort_order
 		logger.info(f'Created tokens_sort_order in {(time.time() - start_time):.3f} seconds')
 
-		# start_time = time.time()  # move tokens sort order to build process - takes > 1 second for large corpora, but not needed for all results
-		# # building tokens_sort_order was implemented in _init_tokens_sort_order - deprecating to simplify as makes sense to build all these in one go
-		# tokens_array_lower = np.char.lower(self.results_cache['tokens_array'].astype(str))
-		# self.results_cache['tokens_sort_order'] = np.argsort(np.argsort(tokens_array_lower)) # lowercasing then sorting	
-		# logger.info(f'Created tokens_sort_order in {(time.time() - start_time):.3f} seconds')
-		# del tokens_array_lower	
+	# start_time = time.time()  # move tokens sort order to build process - takes > 1 second for large corpora, but not needed for all results
+	# # building tokens_sort_order was implemented in _init_tokens_sort_order - deprecating to simplify as makes sense to build all these in one go
+	# tokens_array_lower = np.char.lower(self.results_cache['tokens_array'].astype(str))
+	# self.results_cache['tokens_sort_order'] = np.argsort(np.argsort(tokens_array_lower)) # lowercasing then sorting	
+	# logger.info(f'Created tokens_sort_order in {(time.time() - start_time):.3f} seconds')
+	# del tokens_array_lower	
 
-# %% ../nbs/api/45_corpus.ipynb 60
+	return tokens_array, tokens_lookup, tokens_sort_order
+
+# %% ../nbs/api/45_corpus.ipynb 105
 @patch
 def token_ids_to_tokens(self: Corpus, 
 						token_ids: np.ndarray|list # token ids to return token strings for 
 						) -> np.ndarray: # return token strings for token ids
 	""" Get token strings for a list of token ids. """ 
 
-	self._init_token_arrays()
+	tokens_array, _, _ = self._init_token_arrays()
 	
 	if isinstance(token_ids, list):
 		token_ids = np.array(token_ids)
 	if np.any(token_ids < 0):
 		raise ValueError("Token ids must be non-negative integers.")
 	
-	return self.results_cache['tokens_array'][token_ids]
+	return tokens_array[token_ids]
 
-# %% ../nbs/api/45_corpus.ipynb 61
+# %% ../nbs/api/45_corpus.ipynb 106
 @patch
 def tokens_to_token_ids(self: Corpus, 
 				tokens: list[str]|np.ndarray[str] # list of tokens to get ids for
 				) -> np.ndarray[int]: # array of token ids, 0 for unknown tokens
 	""" Convert a list or np.array of token string to token ids """
 	
-	self._init_token_arrays()
+	_, tokens_lookup, _ = self._init_token_arrays()
 	
 	if isinstance(tokens, list):
 		tokens = np.array(tokens, dtype=str)
 	
-	return np.array([self.results_cache['tokens_lookup'].get(token, 0) for token in tokens])
+	return np.array([tokens_lookup.get(token, 0) for token in tokens])
 
-# %% ../nbs/api/45_corpus.ipynb 62
+# %% ../nbs/api/45_corpus.ipynb 107
 @patch
 def token_to_id(self: Corpus, 
 				token: str # token to get id for
@@ -856,23 +1696,23 @@ def token_to_id(self: Corpus,
 	token_ids = self.tokens_to_token_ids([token])
 	return int(token_ids[0])
 
-# %% ../nbs/api/45_corpus.ipynb 78
+# %% ../nbs/api/45_corpus.ipynb 123
 @patch
 def token_ids_to_sort_order(self: Corpus, 
 							token_ids: np.ndarray|list # token ids to return token strings for 
 							) -> np.ndarray: # rank of token ids
 	""" Get the sort order of token strings corresponding to token ids """
 
-	self._init_token_arrays()	
+	_, _, tokens_sort_order = self._init_token_arrays()	
 
 	if isinstance(token_ids, list):
 		token_ids = np.array(token_ids)
 	if np.any(token_ids < 0):
 		raise ValueError("Token ids must be non-negative integers.")
 	
-	return self.results_cache['tokens_sort_order'][token_ids]
+	return tokens_sort_order[token_ids]
 
-# %% ../nbs/api/45_corpus.ipynb 81
+# %% ../nbs/api/45_corpus.ipynb 126
 @patch
 def get_token_count_text(self: Corpus, 
 					exclude_punctuation:bool = False # exclude punctuation tokens from the count
@@ -889,97 +1729,187 @@ def get_token_count_text(self: Corpus,
 
 	return count_tokens, tokens_descriptor, total_descriptor
 
-# %% ../nbs/api/45_corpus.ipynb 84
+# %% ../nbs/api/45_corpus.ipynb 129
+TOKENIZE_CACHE_SIZE = 1000 # number of recent query tokenizations retained by a corpus
+
+# %% ../nbs/api/45_corpus.ipynb 130
+@patch
+def _get_query_tokenizer(self: Corpus):
+	""" Get the spaCy tokenizer used for queries, loading the spaCy model if it has not been loaded yet. """
+	if self._nlp is None:
+		self._init_spacy_model(self.SPACY_MODEL, version = self.SPACY_MODEL_VERSION, tokenizer_mode = self.TOKENIZER_MODE)
+	return self._nlp.tokenizer
+
+# %% ../nbs/api/45_corpus.ipynb 131
+@patch
+def _get_tokenizer_exceptions(self: Corpus) -> dict|None: # special case rules keyed by string, None if not available
+	""" Get the strings the spaCy tokenizer has special cases for, from the loaded model or the defaults for the language of the model. """
+	if self._nlp is not None:
+		return self._nlp.tokenizer.rules
+	if 'tokenizer_exceptions' not in self.results_cache:
+		try:
+			from spacy.util import get_lang_class
+			self.results_cache['tokenizer_exceptions'] = get_lang_class(self.SPACY_MODEL.split('_')[0]).Defaults.tokenizer_exceptions
+		except ImportError:
+			self.results_cache['tokenizer_exceptions'] = None
+	return self.results_cache['tokenizer_exceptions']
+
+# %% ../nbs/api/45_corpus.ipynb 132
+@patch
+def _tokenize_queries(self: Corpus, 
+					  strings: list[str] # query strings to tokenize
+					  ) -> list[tuple]: # lower case token ids for each string
+	""" Tokenize query strings to lower case token ids, skipping spaCy for single words without special case rules and caching recent queries. """
+
+	if 'tokenize_cache' not in self.results_cache:
+		self.results_cache['tokenize_cache'] = OrderedDict()
+	cache = self.results_cache['tokenize_cache']
+
+	exceptions = self._get_tokenizer_exceptions()
+	to_tokenize = []
+	for string in dict.fromkeys(strings):
+		if string in cache:
+			cache.move_to_end(string)
+		elif exceptions is not None and string.isalpha() and string not in exceptions: # spaCy does not split a word of letters without a special case rule
+			cache[string] = tuple(self.tokens_to_token_ids([string.lower()]))
+		else:
+			to_tokenize.append(string)
+
+	if len(to_tokenize) > 0:
+		for string, doc in zip(to_tokenize, self._get_query_tokenizer().pipe(to_tokenize)):
+			logger.debug(f'Tokens {list(doc)}')
+			cache[string] = tuple(self.tokens_to_token_ids([token.lower_ for token in doc]))
+
+	token_sequences = [cache[string] for string in strings]
+	while len(cache) > TOKENIZE_CACHE_SIZE:
+		cache.popitem(last = False)
+	self.results_cache['tokenize_cache'] = cache # update the size of the cache entry
+
+	return token_sequences
+
+# %% ../nbs/api/45_corpus.ipynb 133
+@patch
+def _get_vocab_pattern_index(self: Corpus) -> tuple[list[str], np.ndarray, list[str], np.ndarray]: # sorted tokens and token ids, sorted reversed tokens and token ids
+	""" Get lower case tokens in the vocab sorted by token string and by reversed token string, to look up tokens by prefix and suffix. """
+
+	if 'vocab_pattern_index' not in self.results_cache:
+		start_time = time.time()
+		vocab_df = self.vocab.filter((pl.col('frequency_lower') > 0) & (pl.col('token_id') != self.EOF_TOKEN)).select(['token', 'token_id']).collect()
+		prefix_df = vocab_df.sort('token') # polars sorts strings by utf-8 bytes, which is the same order as python string comparison
+		suffix_df = pl.DataFrame({'token': [token[::-1] for token in vocab_df['token'].to_list()], 'token_id': vocab_df['token_id']}).sort('token')
+		self.results_cache['vocab_pattern_index'] = (prefix_df['token'].to_list(), prefix_df['token_id'].to_numpy(), suffix_df['token'].to_list(), suffix_df['token_id'].to_numpy())
+		logger.info(f'Created vocab pattern index in {(time.time() - start_time):.3f} seconds')
+
+	return self.results_cache['vocab_pattern_index']
+
+# %% ../nbs/api/45_corpus.ipynb 134
+@patch
+def _expand_wildcard(self: Corpus, 
+					 pattern: str # lower case token pattern, where * matches any characters
+					 ) -> tuple: # sorted token ids of lower case tokens matching the pattern
+	""" Get the ids of lower case tokens in the vocab that match a wildcard pattern, using the prefix and suffix indexes for the start and end of the pattern. """
+
+	prefix_tokens, prefix_ids, suffix_tokens, suffix_ids = self._get_vocab_pattern_index()
+	parts = pattern.split('*')
+	prefix, suffix = parts[0], parts[-1]
+
+	def _range(sorted_tokens, start): # slice of sorted tokens starting with start
+		if start == '':
+			return 0, len(sorted_tokens)
+		return bisect.bisect_left(sorted_tokens, start), bisect.bisect_left(sorted_tokens, start[:-1] + chr(ord(start[-1]) + 1)) if ord(start[-1]) < sys.maxunicode else len(sorted_tokens)
+
+	prefix_start, prefix_end = _range(prefix_tokens, prefix)
+	suffix_start, suffix_end = _range(suffix_tokens, suffix[::-1])
+	if prefix_end - prefix_start <= suffix_end - suffix_start:
+		token_ids = prefix_ids[prefix_start:prefix_end]
+	else:
+		token_ids = suffix_ids[suffix_start:suffix_end]
+
+	if len(parts) > 2 or (prefix != '' and suffix != ''): # check the whole pattern for candidates, e.g. for overlapping prefix and suffix or characters between wildcards
+		if prefix == '' and suffix == '': # no index for the start or end of the pattern, narrowing candidates by each part first
+			tokens = pl.Series(self.token_ids_to_tokens(token_ids))
+			for part in parts[1:-1]:
+				is_match = tokens.str.contains(part, literal = True).to_numpy()
+				tokens, token_ids = tokens.filter(is_match), token_ids[is_match]
+		regex = re.compile('.*'.join(re.escape(part) for part in parts), re.DOTALL)
+		token_ids = token_ids[np.array([regex.fullmatch(token) is not None for token in self.token_ids_to_tokens(token_ids)], dtype = bool)]
+
+	return tuple(int(token_id) for token_id in np.sort(token_ids))
+
+# %% ../nbs/api/45_corpus.ipynb 135
+@patch
+def _tokenize_pattern(self: Corpus, 
+					  string: str # query string with alternatives separated by | and/or wildcards (*)
+					  ) -> list[tuple]: # lower case token ids for each alternative, with a tuple of token ids for each token with a wildcard
+	""" Tokenize a query with alternatives and wildcards, expanding wildcards to the token ids in the vocab that match. """
+
+	placeholder_string = 'zzxxzzplaceholderzzxxzz' # so spaCy doesn't split tokens on wildcards
+	alternatives = [alternative.strip() for alternative in string.split('|') if alternative.strip() != '']
+	if len(alternatives) == 0:
+		return self._tokenize_queries([string.strip()])
+
+	token_sequences = []
+	for alternative in alternatives:
+		if '*' not in alternative:
+			token_sequences.append(self._tokenize_queries([alternative])[0])
+		else:
+			doc = self._get_query_tokenizer()(alternative.replace('*', placeholder_string))
+			token_sequences.append(tuple(self._expand_wildcard(token.lower_.replace(placeholder_string, '*')) if placeholder_string in token.lower_ else self.tokens_to_token_ids([token.lower_])[0] for token in doc))
+	token_sequences = list(dict.fromkeys(token_sequences))
+
+	if len(set(len(token_sequence) for token_sequence in token_sequences)) > 1:
+		raise ValueError(f'Alternatives in query "{string}" must have the same number of tokens')
+
+	return token_sequences
+
+# %% ../nbs/api/45_corpus.ipynb 136
 @patch
 def tokenize(self: Corpus, 
-			 string:str, # string to tokenize 
-			#  return_tokens = False, # return token strings
+			 string:str, # string to tokenize, * matches any characters in a token and | separates alternatives (e.g. 'econom*' or 'run|ran|running')
 			 simple_indexing = False # use simple indexing
              ): # return tokenized string
-	""" Tokenize a string using the Spacy tokenizer. """
+	""" Tokenize a string using the Spacy tokenizer (or a vocab lookup for a single word token), expanding wildcards and alternatives to token ids in the vocab. """
 	# NOTE: when extending this function - ensure get_token_positions is compatible (e.g. currently assumes fixed sequence length of sequences)
 
 	start_time = time.time()
-	placeholder_string = 'zzxxzzplaceholderzzxxzz' # so doesn't split tokens
-	is_wildcard_search = False
 	if simple_indexing == True:
 		index_id = LOWER
-		strings_to_tokenize = [string.strip()]
 	else:
 		raise('only simple_indexing implemented')
 		# retained for future rework
-		# if '*' in string:
-		# 	is_wildcard_search = True
-		# 	string = string.replace('*',placeholder_string)
 		# if string.islower() == True:
 		# 	index_id = LOWER
 		# else:
 		# 	index_id = ORTH
-		# if '|' in string:
-		# 	strings_to_tokenize = string.split('|')
-		# else:
-		# 	strings_to_tokenize = [string.strip()]
-	token_sequences = []
-	for doc in self._nlp.pipe(strings_to_tokenize): # was tokenizer.pipe(strings_to_tokenize) - retaining for reference
-		# token_sequences.append(tuple(doc.to_array(index_id))) # not using spacy indexes once corpus created
-		logger.debug(f'Tokens {list(doc)}')
-		token_sequences.append(list(doc))
-	# if is_wildcard_search == True:
-	# 	tmp_token_sequence = []
-	# 	sequence_count = 1
-	# 	for token in doc:
-	# 		tmp_token_sequence.append([])
-	# 		if placeholder_string in token.text:
-	# 			chunked_string = token.text.split(placeholder_string)
-	# 			if len(chunked_string) > 2 or (len(chunked_string) == 2 and chunked_string[0] != '' and chunked_string[1] != ''):
-	# 				# use regex
-	# 				approach = 'regex'
-	# 				regex = re.compile('.*'.join(chunked_string))
-	# 			elif chunked_string[0] == '':
-	# 				approach = 'endswith'
-	# 			else:
-	# 				approach = 'startswith'
-	# 			for token_id in loaded_corpora[corpus_name]['frequency_lookup']:
-	# 				possible_word = False
-	# 				word = loaded_corpora[corpus_name]['vocab'][token_id]
-	# 				if approach == 'regex':
-	# 					if regex.match(word):
-	# 						possible_word = word
-	# 				elif getattr(word,approach)(''.join(chunked_string)):
-	# 					possible_word = word
-	# 				if possible_word != False:
-	# 					tmp_token_sequence[token.i].append(loaded_corpora[corpus_name]['vocab'][possible_word])
-	# 		else:
-	# 			tmp_token_sequence[token.i].append(token.orth)
-	# 		sequence_count *= len(tmp_token_sequence[token.i])
-	# 	rotated_token_sequence = []
-	# 	token_repeat = sequence_count
-	# 	for pos in range(len(tmp_token_sequence)):
-	# 		rotated_token_sequence.append([])
-	# 		if len(tmp_token_sequence[pos]) == 1:
-	# 			rotated_token_sequence[pos] += sequence_count * [tmp_token_sequence[pos][0]]
-	# 		else:
-	# 			token_repeat = token_repeat // len(tmp_token_sequence[pos])
-	# 			while len(rotated_token_sequence[pos]) < sequence_count:
-	# 				for token in tmp_token_sequence[pos]:
-	# 					rotated_token_sequence[pos] += token_repeat * [token]
-	# 	token_sequences = list(zip(*rotated_token_sequence))
-	# 	#for tokens in tmp_token_sequence:
-	# 	#    for token in tokens:
-	# covert token_sequences to reindexed tokens using original_to_new
-	
-	# convert sequences to lower case
-	if index_id == LOWER:
-		token_sequences = [[token.lower_ for token in sequence] for sequence in token_sequences]
-	token_sequences = [tuple(self.tokens_to_token_ids(sequence)) for sequence in token_sequences]
+
+	if '*' in string or '|' in string:
+		token_sequences = self._tokenize_pattern(string)
+	else:
+		token_sequences = self._tokenize_queries([string.strip()])
 	
 	logger.info(f'Tokenization time: {(time.time() - start_time):.5f} seconds')
-	# if return_tokens == True:
-		# return token_sequences, index_id, doc
-	# else:
 	return token_sequences, index_id
 
-# %% ../nbs/api/45_corpus.ipynb 87
+# %% ../nbs/api/45_corpus.ipynb 138
+@patch
+def tokenize_many(self: Corpus, 
+				  strings:list[str], # strings to tokenize
+				  simple_indexing = False # use simple indexing
+				  ) -> list[tuple[list[tuple], int]]: # token sequences and index id for each string, as returned by tokenize
+	""" Tokenize a list of strings in one pass of the Spacy tokenizer. """
+
+	if simple_indexing != True:
+		raise ValueError('only simple_indexing implemented')
+
+	start_time = time.time()
+	patterns = {string: self._tokenize_pattern(string) for string in strings if '*' in string or '|' in string}
+	token_sequences = iter(self._tokenize_queries([string.strip() for string in strings if string not in patterns]))
+	results = [(patterns[string], LOWER) if string in patterns else ([next(token_sequences)], LOWER) for string in strings]
+
+	logger.info(f'Tokenization time ({len(strings)} strings): {(time.time() - start_time):.5f} seconds')
+	return results
+
+# %% ../nbs/api/45_corpus.ipynb 142
 @patch
 def _get_text(self:Corpus,
         doc_id: int, # the id of the document
@@ -1003,7 +1933,7 @@ def _get_text(self:Corpus,
     else:
         return tokens, has_spaces, metadata
 
-# %% ../nbs/api/45_corpus.ipynb 88
+# %% ../nbs/api/45_corpus.ipynb 143
 @patch
 def text(self:Corpus,
         doc_id: int # the id of the document
@@ -1012,7 +1942,7 @@ def text(self:Corpus,
 
     return Text(*self._get_text(doc_id))
 
-# %% ../nbs/api/45_corpus.ipynb 91
+# %% ../nbs/api/45_corpus.ipynb 146
 @patch
 def get_tokens_by_index(self: Corpus, 
 			   index: str = 'orth_index', # index to get tokens from i.e. 'orth_index' 'lower_index' 'token2doc_index'
@@ -1032,45 +1962,99 @@ def get_tokens_by_index(self: Corpus,
 		logger.info(f'Tokens for index {index} with exclude_punctuation {exclude_punctuation} already cached, returning cached result in {(time.time() - start_time):.3f} seconds')
 		return self.results_cache[cache_key]
 	else:
-		if index not in self.results_cache: # in case build -nopuncts first - get both sorted
-			self.results_cache[index] = self.tokens.select(pl.col(index)).collect(engine='streaming').to_numpy().flatten()
+		if index in self.results_cache: # in case build -nopuncts first - get both sorted
+			tokens = self.results_cache[index]
+		else:
+			file, dtype = TOKEN_ARRAY_FILES[index]
+			if os.path.isfile(f'{self.corpus_path}/{file}'): # memory map raw token arrays if saved with corpus
+				tokens = np.memmap(f'{self.corpus_path}/{file}', dtype = dtype, mode = 'r')
+			else:
+				tokens = self.tokens.select(pl.col(index)).collect(engine='streaming').to_numpy().flatten()
+			self.results_cache[index] = tokens
 		if exclude_punctuation == False:
 			logger.info(f'Got tokens for index {index} with exclude_punctuation {exclude_punctuation} in {(time.time() - start_time):.3f} seconds')
-			return self.results_cache[index]
+			return tokens
 		else:
-			if 'puncts' not in self.results_cache:
-				self.results_cache['puncts'] = self.puncts.select(pl.col('position')).collect(engine='streaming').to_numpy().flatten()
-			self.results_cache[cache_key] = np.delete(self.results_cache[index], self.results_cache['puncts'])
-			self.results_cache[f'{cache_key}-positions'] = np.delete(np.arange(len(self.results_cache[index])), self.results_cache['puncts'])
+			nonpunct_positions, _ = self.get_nonpunct_positions()
+			tokens = tokens[nonpunct_positions]
+			self.results_cache[f'{cache_key}-positions'] = nonpunct_positions
+			self.results_cache[cache_key] = tokens
 			#self.results_cache[f'{index}-nopuncts'] = self.tokens.with_row_index('position').select(pl.col('position'), pl.col(index)).join(self.puncts.select('position'), on='position', how='anti').drop('position').collect(engine='streaming').to_numpy().flatten()
 			logger.info(f'Got tokens for index {index} with exclude_punctuation {exclude_punctuation} in {(time.time() - start_time):.3f} seconds')
-			return self.results_cache[cache_key]
+			return tokens
 
 
-# %% ../nbs/api/45_corpus.ipynb 95
+# %% ../nbs/api/45_corpus.ipynb 152
 @patch
 def get_ngrams_by_index(self: Corpus, 
 				ngram_length:int, # length of ngrams to get
 				index:str,  # index to get tokens from, e.g. 'orth_index' 'lower_index'
 				exclude_punctuation: bool = False # exclude punctuation tokens from the result (unused currently)
 				) -> np.ndarray:
-	""" Get ngrams for a given index and ngram length. """
+	""" Get ngrams for a given index and ngram length as a read-only view of the tokens array, with a row for each position an ngram can start at. """
 
 	if index not in ['orth_index', 'lower_index']:
 		raise ValueError("Index must be either 'orth_index' or 'lower_index'")
 
-	if (index, ngram_length, exclude_punctuation) not in self.ngram_index:
-		slices = []
-		[slices.append(np.roll(self.get_tokens_by_index(index, exclude_punctuation), shift)) for shift in -np.arange(ngram_length)]
-		seq = np.vstack(slices).T
-		self.ngram_index[(index, ngram_length, exclude_punctuation)] = seq
+	# the tokens array is padded with end of file tokens, so a strided view covers every ngram in the corpus without copying tokens
+	return np.lib.stride_tricks.sliding_window_view(self.get_tokens_by_index(index, exclude_punctuation), ngram_length)
+
+# %% ../nbs/api/45_corpus.ipynb 157
+def _merge_positional_index(parts: list[tuple[np.ndarray, np.ndarray]], # offsets and positions of the corpus and of each appended part
+							eof_token: int # end of file token id
+							) -> tuple[np.ndarray, np.ndarray]: # offsets by token id, positions sorted by token id
+	""" Merge the positional index of a corpus with the positional indexes of appended parts. Appended positions follow the existing positions of each token, so each part is placed after the positions of earlier parts without sorting. """
+
+	vocab_length = len(parts[-1][0]) - 1 # tokens added by appends only have offsets in later parts
+	part_counts = []
+	for i, (offsets, positions) in enumerate(parts):
+		counts = np.zeros(vocab_length, dtype = np.int64)
+		counts[:len(offsets) - 1] = np.diff(offsets.astype(np.int64))
+		if i < len(parts) - 1: # the index header at the end of the part was replaced by the next part, these are the last positions of the end of file token
+			end = int(offsets[eof_token + 1])
+			positions = np.delete(positions, np.arange(end - INDEX_HEADER_LENGTH, end))
+			counts[eof_token] -= INDEX_HEADER_LENGTH
+		part_counts.append((counts, positions))
+
+	merged_counts = np.sum([counts for counts, _ in part_counts], axis = 0)
+	merged_offsets = np.concatenate([[0], np.cumsum(merged_counts)])
+	merged_positions = np.empty(merged_offsets[-1], dtype = parts[0][1].dtype)
+	starts = merged_offsets[:-1].copy() # where the next positions for each token are placed
+	for counts, positions in part_counts:
+		part_offsets = np.concatenate([[0], np.cumsum(counts)])
+		merged_positions[np.repeat(starts - part_offsets[:-1], counts) + np.arange(len(positions))] = positions
+		starts += counts
+	return merged_offsets.astype(parts[-1][0].dtype), merged_positions
+
+# %% ../nbs/api/45_corpus.ipynb 158
+@patch
+def get_positional_index(self: Corpus,
+						index: str = 'lower_index' # index to get positional index for, 'orth_index' or 'lower_index'
+						) -> tuple[np.ndarray, np.ndarray]: # offsets by token id, positions sorted by token id
+	""" Get the positional index for a given index. """
 
-	return self.ngram_index[(index, ngram_length, exclude_punctuation)]
+	if index not in ['orth_index', 'lower_index']:
+		raise ValueError("Index must be either 'orth_index' or 'lower_index'")
 
-# %% ../nbs/api/45_corpus.ipynb 98
+	cache_key = f'{index}-positional'
+	if cache_key not in self.results_cache:
+		start_time = time.time()
+		if os.path.isfile(f'{self.corpus_path}/positions.parquet') and os.path.isfile(f'{self.corpus_path}/offsets.parquet'):
+			parts = [(pl.read_parquet(offsets_file, columns = [index])[index].to_numpy(), pl.read_parquet(positions_file, columns = [index])[index].to_numpy()) for offsets_file, positions_file in zip(_get_table_files(self.corpus_path, 'offsets'), _get_table_files(self.corpus_path, 'positions'))]
+			offsets, positions = parts[0] if len(parts) == 1 else _merge_positional_index(parts, self.EOF_TOKEN) # appended parts are indexed separately
+		else: # corpus built without positional index
+			tokens = self.get_tokens_by_index(index)
+			positions = np.argsort(tokens, kind = 'stable').astype(np.uint32)
+			offsets = np.searchsorted(tokens[positions], np.arange(self.vocab.select(pl.len()).collect().item() + 2)).astype(np.uint32)
+		self.results_cache[cache_key] = (offsets, positions)
+		logger.info(f'Got positional index for {index} in {(time.time() - start_time):.3f} seconds')
+
+	return self.results_cache[cache_key]
+
+# %% ../nbs/api/45_corpus.ipynb 160
 @patch
 def get_token_positions(self: Corpus, 
-					token_sequence: list[np.ndarray], # token sequence to get index for 
+					token_sequence: list[np.ndarray], # token sequences to get positions for (from tokenize), each slot is a token id or a tuple of token ids
 					index_id: int, # index to search (i.e. ORTH, LOWER)
 					exclude_punctuation: bool = False # exclude punctuation tokens from the result (unused currently)
 					) -> np.ndarray: # positions of token sequence
@@ -1088,64 +2072,117 @@ def get_token_positions(self: Corpus,
 	else:
 		index = 'lower_index'
 
-	if variants_len == 1:
-		results.append(np.where(np.all(self.get_ngrams_by_index(ngram_length = sequence_len, index = index, exclude_punctuation = exclude_punctuation) == token_sequence[0], axis=1))[0])
-	else:
-		condition_list = []
-		choice_list = variants_len * [True]
+	if exclude_punctuation == False:
+		# candidate positions come from the posting lists of the rarest slot in the sequence, then are checked against the other slots
+		offsets, positions = self.get_positional_index(index)
+		tokens = self.get_tokens_by_index(index)
+		sequence_positions = []
 		for seq in token_sequence:
-			condition_list.append(self.get_ngrams_by_index(ngram_length = sequence_len, index = index, exclude_punctuation = exclude_punctuation) == seq)
-		results.append(np.where(np.all(np.select(condition_list, choice_list),axis=1))[0])
+			slots = [np.atleast_1d(np.asarray(slot, dtype=np.int64)) for slot in seq] # a slot is a token id or a tuple of token ids (e.g. an expanded wildcard)
+			slots = [slot[(slot > 0) & (slot < len(offsets) - 1)] for slot in slots]
+			if any(len(slot) == 0 for slot in slots): # token not in corpus
+				continue
+			rarest = int(np.argmin([(offsets[slot + 1] - offsets[slot]).sum() for slot in slots]))
+			starts, lengths = offsets[slots[rarest]].astype(np.int64), (offsets[slots[rarest] + 1] - offsets[slots[rarest]]).astype(np.int64)
+			candidates = positions[np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())].astype(np.int64) - rarest # concatenated posting lists
+			if len(slots[rarest]) > 1:
+				candidates = np.sort(candidates)
+			candidates = candidates[(candidates >= 0) & (candidates + sequence_len <= len(tokens))]
+			for i, slot in enumerate(slots):
+				if i != rarest:
+					candidates = candidates[tokens[candidates + i] == slot[0]] if len(slot) == 1 else candidates[np.isin(tokens[candidates + i], slot)]
+			sequence_positions.append(candidates)
+		if len(sequence_positions) == 0:
+			results.append(np.array([], dtype=np.int64))
+		elif len(sequence_positions) == 1:
+			results.append(sequence_positions[0])
+		else:
+			results.append(np.unique(np.concatenate(sequence_positions)))
+	else:
+		# candidate positions come from the ids in the first slot of the variants, then each variant is checked at its candidates only
+		tokens = self.get_tokens_by_index(index, exclude_punctuation)
+		variants = [[np.atleast_1d(np.asarray(slot, dtype=np.int64)) for slot in seq] for seq in token_sequence]
+		candidates = np.flatnonzero(np.isin(tokens[:max(len(tokens) - sequence_len + 1, 0)], np.concatenate([slots[0] for slots in variants])))
+		sequence_positions = []
+		for slots in variants:
+			variant_candidates = candidates if variants_len == 1 else candidates[np.isin(tokens[candidates], slots[0])]
+			for i, slot in enumerate(slots[1:], start = 1):
+				variant_candidates = variant_candidates[np.isin(tokens[variant_candidates + i], slot)]
+			sequence_positions.append(variant_candidates)
+		results.append(sequence_positions[0] if variants_len == 1 else np.unique(np.concatenate(sequence_positions)))
 
 	logger.info(f'Token indexing ({len(results[0])}) time: {(time.time() - start_time):.5f} seconds')
 	return results
 
-# %% ../nbs/api/45_corpus.ipynb 101
+# %% ../nbs/api/45_corpus.ipynb 171
+@patch
+def get_nonpunct_positions(self: Corpus) -> tuple[np.ndarray, np.ndarray]: # positions of non-punctuation tokens, number of non-punctuation tokens before each position (with an extra value for the end of the corpus)
+	""" Get the positions of tokens that are not punctuation and the number of non-punctuation tokens before each position. """
+
+	if 'nonpunct_positions' not in self.results_cache:
+		start_time = time.time()
+		if 'puncts' not in self.results_cache:
+			self.results_cache['puncts'] = self.puncts.select(pl.col('position')).collect(engine='streaming').to_numpy().flatten()
+		input_length = self.tokens.select(pl.len()).collect().item()
+		is_nonpunct = np.ones(input_length, dtype=np.bool)
+		is_nonpunct[self.results_cache['puncts']] = False
+		nonpunct_rank = np.zeros(input_length + 1, dtype=np.uint32)
+		np.cumsum(is_nonpunct, out = nonpunct_rank[1:])
+		self.results_cache['nonpunct_positions'] = (np.flatnonzero(is_nonpunct), nonpunct_rank)
+		logger.info(f'Created non-punctuation positions in {(time.time() - start_time):.3f} seconds')
+
+	return self.results_cache['nonpunct_positions']
+
+# %% ../nbs/api/45_corpus.ipynb 173
+@patch
+def get_context_positions(self: Corpus,
+						  token_positions: np.ndarray, # positions to get context positions for
+						  offsets: list[int], # offsets from each position, negative for tokens to the left and positive for tokens to the right
+						  exclude_punctuation: bool = True # skip punctuation tokens, so offsets count non-punctuation tokens (e.g. 1 is the first non-punctuation token to the right)
+						  ) -> np.ndarray: # context positions with shape (len(offsets), len(token_positions))
+	""" Get the positions of tokens at offsets to the left or right of token positions. """
+
+	token_positions = np.asarray(token_positions, dtype=np.int64)
+	offsets = np.array(offsets, dtype=np.int64)[:, np.newaxis]
+	if not exclude_punctuation:
+		return token_positions + offsets
+
+	nonpunct_positions, nonpunct_rank = self.get_nonpunct_positions()
+	# nonpunct_rank[p] is the index in nonpunct_positions of the first non-punctuation token at or after p
+	left = nonpunct_rank[token_positions].astype(np.int64) + offsets
+	right = nonpunct_rank[token_positions + 1].astype(np.int64) + offsets - 1
+	ranks = np.clip(np.where(offsets < 0, left, right), 0, len(nonpunct_positions) - 1)
+	return nonpunct_positions[ranks]
+
+# %% ../nbs/api/45_corpus.ipynb 175
 @patch
 def _shift_zeroes_to_end(self:Corpus,
 						arr:np.ndarray # Numpy array of collocate frequencies to process
 						):
 	""" Move 0 value positions for punctuation and space removal, zeroes get moved to the end of each column. """
-	result = np.empty_like(arr)
-	for col in range(arr.shape[1]):
-		col_data = arr[:, col]
-		mask = col_data != 0
-		result[:mask.sum(), col] = col_data[mask]
-		result[mask.sum():, col] = 0
-	return result
+	order = np.argsort(arr == 0, axis=0, kind='stable') # stable sort keeps the order of non-zero values
+	return np.take_along_axis(arr, order, axis=0)
 
-# %% ../nbs/api/45_corpus.ipynb 102
+# %% ../nbs/api/45_corpus.ipynb 176
 @patch
 def _shift_zeroes_to_start(self:Corpus,
 						arr:np.ndarray # Numpy array of collocate frequencies to process
 						):
 	""" Move 0 value positions for punctuation and space removal to the start of each column """
-	result = np.empty_like(arr)
-	for col in range(arr.shape[1]):
-		col_data = arr[:, col]
-		mask = col_data != 0
-		n_zeros = (~mask).sum()
-		result[:n_zeros, col] = 0
-		result[n_zeros:, col] = col_data[mask]
-	return result
+	order = np.argsort(arr != 0, axis=0, kind='stable')
+	return np.take_along_axis(arr, order, axis=0)
 
-# %% ../nbs/api/45_corpus.ipynb 103
+# %% ../nbs/api/45_corpus.ipynb 177
 @patch
 def _zero_after_value(self:Corpus,
 					  arr:np.ndarray, # Numpy array of collocate frequencies to process
 					  target: int # Target value to find in the array (e.g., an end-of-file token or a specific collocate frequency)
 					  ):
 	""" Set values from first occurence of target value to 0 in each column (for processing tokens outside text using eof token) """
-	arr = arr.copy()  
-	for col in range(arr.shape[1]):
-		col_data = arr[:, col]
-		idx = np.where(col_data == target)[0]
-		if idx.size > 0:
-			first_idx = idx[0]
-			arr[first_idx:, col] = 0
-	return arr
+	after_target = np.logical_or.accumulate(arr == target, axis=0) # True from first occurence of target onwards
+	return np.where(after_target, 0, arr).astype(arr.dtype, copy=False)
 
-# %% ../nbs/api/45_corpus.ipynb 104
+# %% ../nbs/api/45_corpus.ipynb 179
 @patch
 def get_tokens_in_context(self:Corpus,
 							   token_positions:np.ndarray, # Numpy array of token positions in the corpus
@@ -1164,31 +2201,12 @@ def get_tokens_in_context(self:Corpus,
 		# return empty result
 		return np.zeros((0, 0), dtype=np.int32)
 
-	tokens_for_removal = []
-	if exclude_punctuation:
-		tokens_for_removal += self.punct_tokens
-	len_tokens_for_removal = len(tokens_for_removal)
-
-	collected = False
-	context_tokens_arr = []
-	while collected == False:
-		new_positions = np.array(token_positions[0] + position_offset, dtype = token_positions[0].dtype)
-		context_tokens_arr.append(self.get_tokens_by_index(index)[new_positions])
-		position_offset += position_offset_step
-		if len(context_tokens_arr) >= context_length: 
-			context_tokens = np.array(context_tokens_arr, dtype = token_positions[0].dtype)
-			# shape = (context_length, len(token_positions[0]))
-			logger.debug(f"Context tokens collected: {context_tokens.shape}")
-			if len_tokens_for_removal > 0: # cleaning punctuation and check if need more iterations
-				context_tokens = np.where(np.isin(context_tokens, tokens_for_removal), 0, context_tokens)
-			counts = np.count_nonzero(context_tokens, axis=0)
-			if np.min(counts) < context_length:
-				pass
-			else:
-				collected = True
-
-	context_tokens = self._shift_zeroes_to_end(context_tokens)
-	context_tokens = context_tokens[:context_length, :]
+	# positions of the context tokens are gathered directly, with punctuation skipped via the non-punctuation positions
+	offsets = position_offset_step * np.arange(1, context_length + 1)
+	context_positions = self.get_context_positions(token_positions[0].astype(np.int64) + position_offset - position_offset_step, offsets, exclude_punctuation = exclude_punctuation)
+	context_tokens = self.get_tokens_by_index(index)[context_positions].astype(token_positions[0].dtype)
+	# shape = (context_length, len(token_positions[0]))
+	logger.debug(f"Context tokens collected: {context_tokens.shape}")
 
 	if convert_eof: # delete any context that contains self.EOF_TOKEN
 		if self.EOF_TOKEN in context_tokens:
@@ -1198,7 +2216,49 @@ def get_tokens_in_context(self:Corpus,
 
 	return context_tokens
 
-# %% ../nbs/api/45_corpus.ipynb 105
+# %% ../nbs/api/45_corpus.ipynb 180
+@patch
+def get_tokens_in_context_windows(self:Corpus,
+							   token_positions:np.ndarray, # Numpy array of token positions in the corpus
+							   index:str, # Index to use - lower_index, orth_index
+							   context_left:int = 5, # Number of context words to the left of the node
+							   context_right:int = 5, # Number of context words to the right of the node
+							   sequence_len:int = 1, # Number of tokens in the node
+							   exclude_punctuation:bool = True, # ignore punctuation from context retrieved
+							   convert_eof:bool = True # if True, contexts with end of file tokens will have eof token and tokens after set to zero
+							   ) -> tuple[np.ndarray, np.ndarray, np.ndarray]: # left, node and right tokens, each with shape (number of tokens, len(token_positions[0])) and left tokens ordered from the node outwards
+	""" Get left context, node and right context tokens for given token positions in one pass. """
+
+	start_time = time.time()
+
+	positions = token_positions[0].astype(np.int64)
+	context_left, context_right = max(context_left, 0), max(context_right, 0)
+	context_positions = np.concatenate([self.get_context_positions(positions, -np.arange(1, context_left + 1), exclude_punctuation = exclude_punctuation),
+										self.get_context_positions(positions - 1, np.arange(1, sequence_len + 1), exclude_punctuation = exclude_punctuation),
+										self.get_context_positions(positions + sequence_len - 1, np.arange(1, context_right + 1), exclude_punctuation = exclude_punctuation)])
+	context_tokens = self.get_tokens_by_index(index)[context_positions].astype(token_positions[0].dtype)
+	left_tokens, node_tokens, right_tokens = np.split(context_tokens, [context_left, context_left + sequence_len])
+
+	if convert_eof: # zero any context from the end of file token outwards
+		left_tokens, node_tokens, right_tokens = [self._zero_after_value(tokens, self.EOF_TOKEN) if self.EOF_TOKEN in tokens else tokens for tokens in (left_tokens, node_tokens, right_tokens)]
+
+	logger.info(f"Context windows retrieved in {time.time() - start_time:.2f} seconds.")
+
+	return left_tokens, node_tokens, right_tokens
+
+# %% ../nbs/api/45_corpus.ipynb 184
+@patch
+def cache_info(self: Corpus) -> dict: # hits, misses, evictions, entries, nbytes and max_bytes
+	""" Get the size of the results cache and its hit, miss and eviction counts. """
+	return self.results_cache.info()
+
+# %% ../nbs/api/45_corpus.ipynb 185
+@patch
+def clear_cache(self: Corpus):
+	""" Remove all cached results for the corpus. """
+	self.results_cache.clear()
+
+# %% ../nbs/api/45_corpus.ipynb 188
 def build_test_corpora(
 		source_path:str, # path to folder with corpora
 		save_path:str, # path to save corpora
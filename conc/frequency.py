@@ -51,11 +51,11 @@ def frequencies(self: Frequency,
 	if case_sensitive:
 		frequency_column = 'frequency_orth'
 		document_count_column = 'orth_index'
-		listcorpus_document_count_column = 'document_frequency_orth'
+		document_frequency_column = 'document_frequency_orth'
 	else:
 		frequency_column = 'frequency_lower'
 		document_count_column = 'lower_index'
-		listcorpus_document_count_column = 'document_frequency_lower'
+		document_frequency_column = 'document_frequency_lower'
 
 	if page_size == 0:
 		page_current = 1 # if returning all, then only interested in first page
@@ -101,8 +101,8 @@ def frequencies(self: Frequency,
 
 	if show_document_frequency:
 		columns.append('document_frequency')
-		if type(self.corpus) == ListCorpus:
-			df = df.with_columns(pl.col(listcorpus_document_count_column).alias('document_frequency'))
+		if type(self.corpus) == ListCorpus or document_frequency_column in self.corpus.vocab.collect_schema().names(): # document frequency is stored in the vocab for list corpora and corpora built with this version of Conc or later
+			df = df.with_columns(pl.col(document_frequency_column).alias('document_frequency'))
 		else:
 			document_counts = self.corpus.tokens.select(pl.col(document_count_column).alias('token_id'), pl.col('token2doc_index')).group_by('token_id').agg(pl.col('token2doc_index').n_unique().alias('document_frequency'))
 			df = df.join(document_counts, on='token_id', how='left', maintain_order='left')
@@ -8,7 +8,6 @@ import numpy as np
 import time
 import polars as pl
 from fastcore.basics import patch
-from scipy.stats import chi2
 import re
 
 # %% auto 0
@@ -262,6 +261,7 @@ def keywords(self: Keyness,
 			p = p / unique_tokens # adjust by criteria
 		else:
 			p_value_descriptor = f'Keywords filtered based on p-value: {p}'
+		from scipy.stats import chi2
 		cut = chi2.ppf(1 - p, df=1)		
 		keyness_df = keyness_df.filter(pl.col(statistical_significance_measure) > cut)
 		formatted_data.append(p_value_descriptor)
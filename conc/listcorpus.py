@@ -6,7 +6,6 @@
 from __future__ import annotations
 from fastcore.basics import patch
 import shutil
-from slugify import slugify
 import time
 import msgspec
 import polars as pl
@@ -19,7 +18,7 @@ __all__ = ['LISTCORPUS_README_TEMPLATE', 'ListCorpus']
 # %% ../nbs/api/51_listcorpus.ipynb 5
 from . import __version__
 from .core import logger, CorpusMetadata, PAGE_SIZE, EOF_TOKEN_STR, ERR_TOKEN_STR, REPOSITORY_URL, DOCUMENTATION_URL, CITATION_STR, PYPI_URL
-from .corpus import Corpus
+from .corpus import Corpus, _scan_table
 from .result import Result
 
 # %% ../nbs/api/51_listcorpus.ipynb 9
@@ -72,7 +71,6 @@ class ListCorpus:
 		# metadata for each document
 		self.metadata = None
 
-		self.ngram_index = {}
 		self.results_cache = {}
 		self.expected_files_ = ['listcorpus.json', 'vocab.parquet']
 		self.required_tables_ = ['vocab']
@@ -165,14 +163,15 @@ def build_from_corpus(self: ListCorpus,
 			SPACY_MODEL_VERSION=self.SPACY_MODEL_VERSION
 		))
 
-	# adding document counts for each token
-	document_counts_lower = pl.scan_parquet(os.path.join(source_corpus_path, 'tokens.parquet')).select(pl.col('lower_index').alias('token_id'), pl.col('token2doc_index')).group_by('token_id').agg(pl.col('token2doc_index').n_unique().alias('document_frequency_lower'))
-	self.vocab = self.vocab.join(document_counts_lower, on='token_id', how='left', maintain_order='left')
-	document_counts_orth = pl.scan_parquet(os.path.join(source_corpus_path, 'tokens.parquet')).select(pl.col('orth_index').alias('token_id'), pl.col('token2doc_index')).group_by('token_id').agg(pl.col('token2doc_index').n_unique().alias('document_frequency_orth'))
-	self.vocab = self.vocab.join(document_counts_orth, on='token_id', how='left', maintain_order='left')
+	# adding document counts for each token, if not already stored in the vocab of the source corpus
+	if 'document_frequency_lower' not in self.vocab.collect_schema().names():
+		document_counts_lower = _scan_table(source_corpus_path, 'tokens').select(pl.col('lower_index').alias('token_id'), pl.col('token2doc_index')).group_by('token_id').agg(pl.col('token2doc_index').n_unique().alias('document_frequency_lower'))
+		self.vocab = self.vocab.join(document_counts_lower, on='token_id', how='left', maintain_order='left')
+		document_counts_orth = _scan_table(source_corpus_path, 'tokens').select(pl.col('orth_index').alias('token_id'), pl.col('token2doc_index')).group_by('token_id').agg(pl.col('token2doc_index').n_unique().alias('document_frequency_orth'))
+		self.vocab = self.vocab.join(document_counts_orth, on='token_id', how='left', maintain_order='left')
 	
-	# rewriting the vocab file with doc frequencies
-	self.vocab.collect().write_parquet(os.path.join(self.corpus_path, 'vocab.parquet'))
+		# rewriting the vocab file with doc frequencies
+		self.vocab.collect().write_parquet(os.path.join(self.corpus_path, 'vocab.parquet'))
 
 	self._init_corpus_dataframes()
 
@@ -6,18 +6,20 @@
 from __future__ import annotations
 import numpy as np
 import time
+import os
+import glob
+import tempfile
 import polars as pl
-from spacy.attrs import ORTH, LOWER # remove? - add ENT_TYPE, ENT_IOB
 import math
 from fastcore.basics import patch
 
 # %% auto 0
-__all__ = ['Ngrams']
+__all__ = ['NGRAM_CHUNK_SIZE', 'NGRAM_CANDIDATES', 'Ngrams']
 
 # %% ../nbs/api/71_ngrams.ipynb 4
 from .corpus import Corpus
 from .result import Result
-from .core import logger, PAGE_SIZE
+from .core import logger, PAGE_SIZE, ORTH, LOWER
 
 # %% ../nbs/api/71_ngrams.ipynb 10
 class Ngrams:
@@ -212,6 +214,167 @@ def ngrams(self: Ngrams,
 
 # %% ../nbs/api/71_ngrams.ipynb 30
 @patch
+def _get_saved_ngram_frequencies(self: Ngrams,
+								 ngram_length:int, # length of ngram
+								 index:str, # index to count ngrams for - lower_index or orth_index
+								 exclude_punctuation:bool # exclude ngrams containing punctuation tokens
+								 ) -> pl.LazyFrame: # ngram frequency table ordered by frequency
+	""" Get an ngram frequency table saved in the corpus directory, the table is created if it does not exist or was counted from a different build of the corpus. """
+
+	ngrams_path = os.path.join(self.corpus.corpus_path, 'ngrams')
+	table_path = os.path.join(ngrams_path, f'ngrams_{ngram_length}_{index}_{"nopunct" if exclude_punctuation else "punct"}.parquet')
+	# tables record the corpus they were counted from rather than relying on file times, which are kept when a corpus directory is copied or restored
+	corpus_key = f'{self.corpus.date_created}|{self.corpus.document_count}|{self.corpus.token_count}'
+
+	if not os.path.isfile(table_path) or pl.read_parquet_metadata(table_path).get('conc_corpus') != corpus_key:
+		start_time = time.time()
+		filter = [self.corpus.EOF_TOKEN]
+		if exclude_punctuation == True:
+			filter += list(self.corpus.punct_tokens)
+		schema = [f'token_{i+1}' for i in range(ngram_length)]
+
+		ngrams = self.corpus.tokens.select(pl.col('token2doc_index'), pl.col(index).alias('token_1'))
+		ngrams = ngrams.with_columns([pl.col('token_1').shift(-i).alias(f'token_{i+1}') for i in range(1, ngram_length)])
+		ngrams = ngrams.filter(~pl.any_horizontal([pl.col(column).is_in(filter) for column in schema]))
+		ngrams = ngrams.group_by(schema).agg(pl.len().alias('frequency'), pl.col('token2doc_index').n_unique().alias('document_frequency'))
+		ngrams = ngrams.sort(by = ['frequency'] + schema, descending = [True] + [False] * ngram_length) # sorted by token ids for ties, so pages are stable
+
+		os.makedirs(ngrams_path, exist_ok = True)
+		ngrams.collect(engine = 'streaming').write_parquet(f'{table_path}.tmp', metadata = {'conc_corpus': corpus_key})
+		os.replace(f'{table_path}.tmp', table_path)
+		logger.info(f'Saved ngram frequencies to {table_path}: {(time.time() - start_time):.3f} seconds')
+
+	return pl.scan_parquet(table_path)
+
+# %% ../nbs/api/71_ngrams.ipynb 32
+NGRAM_CHUNK_SIZE = 5_000_000 # number of token positions processed at a time when counting ngrams with bounded memory
+NGRAM_CANDIDATES = 100_000 # minimum number of candidate ngrams retained when counting ngrams approximately
+
+# %% ../nbs/api/71_ngrams.ipynb 33
+@patch
+def _get_ngram_chunks(self: Ngrams,
+					  ngram_length:int, # length of ngram
+					  index:str, # index to get ngrams from - lower_index or orth_index
+					  exclude_punctuation:bool, # exclude ngrams containing punctuation tokens
+					  chunk_size:int = NGRAM_CHUNK_SIZE # approximate number of token positions in each chunk
+					  ): # yields ngrams with shape (number of ngrams, ngram_length), document ids of the ngrams and hashed ngram keys
+	""" Iterate over ngrams in the corpus in chunks. Chunks end at end of file tokens, so ngrams and documents are not split across chunks. """
+
+	tokens = self.corpus.get_tokens_by_index(index)
+	document_ids = self.corpus.get_tokens_by_index('token2doc_index')
+	is_excluded = np.zeros(self.corpus.vocab.select(pl.len()).collect().item() + 1, dtype = np.bool)
+	is_excluded[self.corpus.EOF_TOKEN] = True
+	if exclude_punctuation:
+		is_excluded[self.corpus.punct_tokens] = True
+
+	start = 0
+	while start < len(tokens):
+		end = start + chunk_size
+		while end < len(tokens) and tokens[end] != self.corpus.EOF_TOKEN: # extend the chunk to the next end of file token
+			eof_positions = np.flatnonzero(tokens[end:end + chunk_size] == self.corpus.EOF_TOKEN)
+			end = end + eof_positions[0] if len(eof_positions) > 0 else end + chunk_size
+		end = min(end, len(tokens))
+		if end - start >= ngram_length:
+			ngrams = np.lib.stride_tricks.sliding_window_view(np.asarray(tokens[start:end]), ngram_length)
+			keep = ~is_excluded[ngrams].any(axis = 1)
+			ngrams = ngrams[keep]
+			keys = np.zeros(len(ngrams), dtype = np.uint64)
+			for i in range(ngram_length): # multiplicative hash of token ids, wraps around at 64 bits
+				keys = keys * np.uint64(0x9E3779B97F4A7C15) + ngrams[:, i].astype(np.uint64)
+			yield ngrams, np.asarray(document_ids[start:end - ngram_length + 1])[keep], keys
+		start = end
+
+# %% ../nbs/api/71_ngrams.ipynb 34
+@patch
+def _count_ngrams_partitioned(self: Ngrams,
+							  ngram_length:int, # length of ngram
+							  index:str, # index to get ngrams from - lower_index or orth_index
+							  exclude_punctuation:bool, # exclude ngrams containing punctuation tokens
+							  top_n:int # number of most frequent ngrams to return
+							  ) -> tuple[pl.DataFrame, int, int]: # most frequent ngrams with frequency and document frequency, total unique ngrams, total ngrams
+	""" Count ngrams exactly with bounded memory, ngrams are written to temporary files partitioned by a hash of the ngram and each partition is counted separately. """
+
+	schema = [f'token_{i+1}' for i in range(ngram_length)]
+	input_length = len(self.corpus.get_tokens_by_index(index))
+	partitions = max(1, math.ceil(input_length / NGRAM_CHUNK_SIZE))
+
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		for chunk, (ngrams, document_ids, keys) in enumerate(self._get_ngram_chunks(ngram_length, index, exclude_punctuation)):
+			chunk_df = pl.DataFrame({**{column: ngrams[:, i] for i, column in enumerate(schema)}, 'token2doc_index': document_ids, 'partition': keys % np.uint64(partitions)})
+			for (partition,), partition_df in chunk_df.partition_by('partition', as_dict = True, include_key = False).items():
+				partition_df.write_parquet(f'{tmp_dir}/partition_{partition}_{chunk}.parquet')
+			logger.memory_usage(f'partitioned chunk {chunk}')
+
+		total_unique, total_count = 0, 0
+		top_ngrams = []
+		for partition in range(partitions):
+			partition_files = glob.glob(f'{tmp_dir}/partition_{partition}_*.parquet')
+			if len(partition_files) == 0:
+				continue
+			counts = pl.scan_parquet(partition_files).group_by(schema).agg(pl.len().alias('frequency'), pl.col('token2doc_index').n_unique().alias('document_frequency')).collect()
+			total_unique += len(counts)
+			total_count += counts['frequency'].sum()
+			top_ngrams.append(counts.sort(by = ['frequency'] + schema, descending = [True] + [False] * ngram_length).head(top_n))
+			logger.memory_usage(f'counted partition {partition}')
+
+	if len(top_ngrams) == 0:
+		return pl.DataFrame(schema = {**{column: pl.UInt32 for column in schema}, 'frequency': pl.UInt32, 'document_frequency': pl.UInt32}), 0, 0
+	top_ngrams = pl.concat(top_ngrams).sort(by = ['frequency'] + schema, descending = [True] + [False] * ngram_length).head(top_n)
+	return top_ngrams, total_unique, total_count
+
+# %% ../nbs/api/71_ngrams.ipynb 35
+@patch
+def _count_ngrams_approximate(self: Ngrams,
+							  ngram_length:int, # length of ngram
+							  index:str, # index to get ngrams from - lower_index or orth_index
+							  exclude_punctuation:bool, # exclude ngrams containing punctuation tokens
+							  top_n:int # number of most frequent ngrams to return
+							  ) -> tuple[pl.DataFrame, int, int]: # most frequent ngrams with frequency and document frequency, total ngrams, largest frequency of an ngram that may be missing
+	""" Find the most frequent ngrams with bounded memory, candidates are found with the Misra-Gries heavy hitters algorithm and then counted exactly. """
+
+	schema = [f'token_{i+1}' for i in range(ngram_length)]
+	capacity = max(NGRAM_CANDIDATES, top_n * 10)
+
+	# first pass - candidate counts are lower bounds, an ngram that is not a candidate occurs at most max_missing_frequency times
+	candidate_keys = np.array([], dtype = np.uint64)
+	candidate_counts = np.array([], dtype = np.int64)
+	candidate_ngrams = np.zeros((0, ngram_length), dtype = np.uint32)
+	max_missing_frequency = 0
+	total_count = 0
+	for ngrams, _, keys in self._get_ngram_chunks(ngram_length, index, exclude_punctuation):
+		total_count += len(keys)
+		chunk_keys, chunk_idx, chunk_counts = np.unique(keys, return_index = True, return_counts = True)
+		all_keys = np.concatenate([candidate_keys, chunk_keys])
+		all_ngrams = np.concatenate([candidate_ngrams, ngrams[chunk_idx]])
+		candidate_keys, first_idx, inverse = np.unique(all_keys, return_index = True, return_inverse = True)
+		candidate_counts = np.bincount(inverse, weights = np.concatenate([candidate_counts, chunk_counts]), minlength = len(candidate_keys)).astype(np.int64)
+		candidate_ngrams = all_ngrams[first_idx]
+		if len(candidate_keys) > capacity:
+			threshold = np.partition(candidate_counts, -(capacity + 1))[-(capacity + 1)]
+			candidate_counts -= threshold
+			max_missing_frequency += int(threshold)
+			keep = candidate_counts > 0
+			candidate_keys, candidate_counts, candidate_ngrams = candidate_keys[keep], candidate_counts[keep], candidate_ngrams[keep]
+	logger.memory_usage(f'found {len(candidate_keys)} candidate ngrams')
+
+	# second pass - exact counts of candidates, chunks do not split documents so document frequencies can be summed across chunks
+	frequency = np.zeros(len(candidate_keys), dtype = np.int64)
+	document_frequency = np.zeros(len(candidate_keys), dtype = np.int64)
+	for ngrams, document_ids, keys in self._get_ngram_chunks(ngram_length, index, exclude_punctuation):
+		candidate_idx = np.searchsorted(candidate_keys, keys)
+		is_candidate = (candidate_idx < len(candidate_keys)) & (candidate_keys[np.minimum(candidate_idx, len(candidate_keys) - 1)] == keys) if len(candidate_keys) > 0 else np.zeros(len(keys), dtype = np.bool)
+		candidate_idx, document_ids = candidate_idx[is_candidate], document_ids[is_candidate]
+		frequency += np.bincount(candidate_idx, minlength = len(candidate_keys))
+		candidate_documents = np.unique(candidate_idx.astype(np.int64) * (self.corpus.document_count + 1) + document_ids) # unique pairs of candidate and document
+		document_frequency += np.bincount(candidate_documents // (self.corpus.document_count + 1), minlength = len(candidate_keys))
+	logger.memory_usage('counted candidate ngrams')
+
+	top_ngrams = pl.DataFrame({**{column: candidate_ngrams[:, i] for i, column in enumerate(schema)}, 'frequency': frequency, 'document_frequency': document_frequency})
+	top_ngrams = top_ngrams.sort(by = ['frequency'] + schema, descending = [True] + [False] * ngram_length).head(top_n)
+	return top_ngrams, total_count, max_missing_frequency
+
+# %% ../nbs/api/71_ngrams.ipynb 36
+@patch
 def ngram_frequencies(self: Ngrams, 
                 ngram_length:int=2, # length of ngram
                 case_sensitive:bool=False, # frequencies for tokens lowercased or with case preserved
@@ -219,13 +382,21 @@ def ngram_frequencies(self: Ngrams,
 				page_size:int=PAGE_SIZE, # number of rows to return
 				page_current:int=1, # current page
 				show_document_frequency:bool=False, #show document frequency in output
-				exclude_punctuation:bool=True # exclude ngrams containing punctuation tokens
+				exclude_punctuation:bool=True, # exclude ngrams containing punctuation tokens
+				save_ngram_frequencies:bool=False, # save the ngram frequency table in the corpus directory and reuse it for later calls (e.g. paging through results)
+				counting_mode:str='default' # 'default' counts all ngrams in memory, 'partitioned' counts exactly with bounded memory, 'approximate' reports the most frequent ngrams with bounded memory
 				) -> Result: # return a Result object with the frequency table
 	""" Report frequent ngrams. """
 	
 	if type(normalize_by) != int:
 		raise ValueError('normalize_by must be an integer, e.g. 1000000 or 10000')
 
+	if counting_mode not in ['default', 'partitioned', 'approximate']:
+		raise ValueError("counting_mode must be one of 'default', 'partitioned' or 'approximate'")
+
+	if save_ngram_frequencies and counting_mode != 'default':
+		raise ValueError("Saved ngram frequency tables are counted in memory, set counting_mode to 'default' to save ngram frequencies")
+
 	start_time = time.time()
 
 	if case_sensitive:
@@ -246,24 +417,39 @@ def ngram_frequencies(self: Ngrams,
 	if exclude_punctuation:
 		formatted_data.append(f'Ngrams containing punctuation tokens excluded')
 
-	ngrams = self.corpus.tokens.select(pl.col('token2doc_index'), pl.col(index).alias('token_1')).with_row_index('position')
+	exact = True
+	if counting_mode == 'partitioned':
+		ngrams_report, total_unique, total_count = self._count_ngrams_partitioned(ngram_length, index, exclude_punctuation, top_n = resultset_start + page_size)
+		ngrams_report = ngrams_report.lazy()
+	elif counting_mode == 'approximate':
+		ngrams_report, total_count, max_missing_frequency = self._count_ngrams_approximate(ngram_length, index, exclude_punctuation, top_n = resultset_start + page_size)
+		total_unique = None
+		page_frequencies = ngrams_report.slice(resultset_start, page_size)['frequency']
+		exact = len(page_frequencies) > 0 and page_frequencies.min() > max_missing_frequency # any missing ngram is less frequent than the ngrams on the page
+		ngrams_report = ngrams_report.lazy()
+		formatted_data.append(f'Approximate report of the most frequent ngrams, ngrams occurring up to {max_missing_frequency:,} times may be missing')
+	elif save_ngram_frequencies:
+		ngrams_report = self._get_saved_ngram_frequencies(ngram_length, index, exclude_punctuation)
+	else:
+		ngrams = self.corpus.tokens.select(pl.col('token2doc_index'), pl.col(index).alias('token_1')).with_row_index('position')
 
-	ngrams = ngrams.with_columns([pl.col('token_1').shift(-i).alias(f'token_{i+1}') for i in range(1, ngram_length)])
+		ngrams = ngrams.with_columns([pl.col('token_1').shift(-i).alias(f'token_{i+1}') for i in range(1, ngram_length)])
 
-	schema = [f'token_{i+1}' for i in range(ngram_length)]
+		schema = [f'token_{i+1}' for i in range(ngram_length)]
 
-	ngrams_report = ngrams.group_by(schema).agg(pl.len().alias("frequency")).sort(by="frequency", descending=True) # TODO - potentially improve by adding second sort so frequency lists are stable
+		ngrams_report = ngrams.group_by(schema).agg(pl.len().alias("frequency")).sort(by="frequency", descending=True) # TODO - potentially improve by adding second sort so frequency lists are stable
 
-	if show_document_frequency:
-		ngrams_report = ngrams_report.join(
-			ngrams.group_by(schema).agg(pl.col('token2doc_index').n_unique().alias('document_frequency')), on = schema, how='left', maintain_order='left'
-		)
+		if show_document_frequency:
+			ngrams_report = ngrams_report.join(
+				ngrams.group_by(schema).agg(pl.col('token2doc_index').n_unique().alias('document_frequency')), on = schema, how='left', maintain_order='left'
+			)
 
-	for i in range(ngram_length):
-		ngrams_report = ngrams_report.filter(~pl.col(f'token_{i+1}').is_in(filter))
+		for i in range(ngram_length):
+			ngrams_report = ngrams_report.filter(~pl.col(f'token_{i+1}').is_in(filter))
 
-	total_unique = ngrams_report.select(pl.len()).collect().item()
-	total_count = ngrams_report.select(pl.col('frequency').sum()).collect().item()
+	if counting_mode == 'default':
+		total_unique = ngrams_report.select(pl.len()).collect().item()
+		total_count = ngrams_report.select(pl.col('frequency').sum()).collect().item()
 
 	ngrams_report_page = ngrams_report.slice(resultset_start, page_size).collect(engine = 'streaming')
 	logger.info(f'collected report page: {(time.time() - start_time):.5f} seconds')
@@ -276,11 +462,15 @@ def ngram_frequencies(self: Ngrams,
 	ngrams_report_page = ngrams_report_page.with_columns(((pl.col("frequency") / pl.lit(count_tokens)) * normalize_by).alias('normalized_frequency'))
 	formatted_data.append(f'Normalized Frequency is per {normalize_by:,.0f} tokens')
 
-	formatted_data.extend([f'Total unique ngrams: {total_unique:,}', f'Total ngrams: {total_count:,}'])
+	if total_unique is not None:
+		formatted_data.append(f'Total unique ngrams: {total_unique:,}')
+	formatted_data.append(f'Total ngrams: {total_count:,}')
+	if not exact:
+		formatted_data.append(f'Ngrams on this page may not be the most frequent ngrams')
 
-	total_pages = math.ceil(total_unique/page_size)
+	total_pages = math.ceil(total_unique/page_size) if total_unique is not None else None
 	if page_size != 0 and total_count > page_size:
-		formatted_data.extend([f'Showing {min(page_size, total_count)} rows', f'Page {page_current} of {total_pages}']) 
+		formatted_data.extend([f'Showing {min(page_size, total_count)} rows', f'Page {page_current} of {total_pages}' if total_pages is not None else f'Page {page_current}']) 
 
 	columns = ['rank', 'ngram', 'frequency', 'normalized_frequency']
 	if show_document_frequency:
@@ -288,4 +478,6 @@ def ngram_frequencies(self: Ngrams,
 		
 	ngrams_report_page = ngrams_report_page[columns]
 
-	return Result(type = 'ngram_frequencies', df=ngrams_report_page, title=f'Ngram Frequencies', description=f'{self.corpus.name}', summary_data = {}, formatted_data = formatted_data)
+	summary_data = {'ngram_length': ngram_length, 'total_unique': total_unique, 'total_count': total_count, 'page_current': page_current, 'total_pages': total_pages, 'exact': exact}
+
+	return Result(type = 'ngram_frequencies', df=ngrams_report_page, title=f'Ngram Frequencies', description=f'{self.corpus.name}', summary_data = summary_data, formatted_data = formatted_data)
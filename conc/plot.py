@@ -5,7 +5,6 @@
 # %% ../nbs/api/77_plot.ipynb 3
 from __future__ import annotations
 from fastcore.basics import patch
-from IPython.display import display, HTML
 
 # %% auto 0
 __all__ = ['Plot']
@@ -47,6 +46,7 @@ def to_file(self: Plot,
 def display(self: Plot
 			   ):
 	""" Show the plot in a Jupyter notebook """
+	from IPython.display import display, HTML
 	
 	display(HTML(self.html))
 
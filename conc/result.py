@@ -6,7 +6,6 @@
 from __future__ import annotations
 import polars as pl
 from fastcore.basics import patch
-from great_tables import GT
 
 # %% auto 0
 __all__ = ['Result']
@@ -66,6 +65,7 @@ def _prepare(self:Result
 				elif not col.endswith('Id') and self.df[col].dtype in [pl.Int64, pl.Int32, pl.Int16, pl.Int8, pl.UInt64, pl.UInt32, pl.UInt16, pl.UInt8]:
 					columns_with_integers.append(col)
 
+		from great_tables import GT
 		self._gt = GT(self.df).tab_options(table_margin_left = 0)
 		if self.title != '' or self.description != '':
 			self._gt = self._gt.tab_header(self.title, self.description)
@@ -6,7 +6,6 @@
 from __future__ import annotations
 from fastcore.basics import patch
 import numpy as np
-from IPython.display import display, HTML
 import polars as pl
 import textwrap
 import re
@@ -177,6 +176,7 @@ def display(self:Text,
 	text_string = '\n'.join(text_string_chunks)
 
 	if output_html:
+		from IPython.display import display, HTML
 		display(HTML(style + self._div(metadata + self._div(text_string, class_str = 'conc-text'), class_str = 'conc-text-wrapper')))
 	else:
 		print(text_string)